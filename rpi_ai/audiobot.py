@@ -1,83 +1,852 @@
 """Audio processing utilities for the RPi AI application."""
 
 import base64
-from collections.abc import Callable
+import hashlib
+import logging
+import os
+import queue
+import re
+import subprocess
+import threading
+import wave
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO
+from itertools import groupby
+from pathlib import Path
+from typing import ClassVar
 
-from google.genai.types import Part
-from gtts import gTTS
-from gtts.tokenizer import pre_processors
+import numpy as np
+from google.genai.types import File, Part
+from gtts import gTTS, gTTSError
+from gtts.tokenizer import symbols
 
+from rpi_ai.metrics import AUDIO_BYTES_SAVED, ERRORS, STAGE_DURATION, TTS_CACHE_REQUESTS, TTS_DURATION
+from rpi_ai.models import TTSConfig
 
-def get_audio_request(audio_data: bytes) -> list[str | Part]:
-    """Create audio request with inline data.
+logger = logging.getLogger(__name__)
 
-    :param bytes audio_data:
-        Audio data in bytes
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+# Fragments without a word character, such as an emoticon or an ellipsis, have nothing to speak
+SPOKEN_TEXT_PATTERN = re.compile(r"\w")
+AUDIO_HEADER_BYTES = 12
+DEFAULT_AUDIO_MIME_TYPE = "audio/mp3"
+AUDIO_SIGNATURES = [
+    (b"ID3", "audio/mp3"),
+    (b"OggS", "audio/ogg"),
+    (b"fLaC", "audio/flac"),
+    (b"\x1a\x45\xdf\xa3", "audio/webm"),
+]
+CODE_FENCE = "```"
+SPEECH_SUBSTITUTIONS: dict[str, str] = {pattern.lower(): replacement for pattern, replacement in symbols.SUB_PAIRS}
+ABBREVIATION_LOOKBEHINDS = "|".join(
+    rf"(?<=\b(?i:{'|'.join(group)})\.)" for _, group in groupby(sorted(symbols.ABBREVIATIONS, key=len), key=len)
+)
+# Link targets may contain one level of balanced parentheses, as Wikipedia URLs often do
+LINK_TARGET_PATTERN = r"\((?:[^()\s]|\([^()\s]*\))*\)"
+SPEECH_LINE_PATTERN = re.compile(
+    r"^[ \t]*(?:```.*?(?:^[ \t]*```[^\n]*$|\Z)"  # Code blocks
+    r"|(?:[-*_][ \t]*){3,}$"  # Horizontal rules
+    # Ordered list numbers are limited to two digits so a year starting a line or sentence is still spoken
+    r"|(?:#{1,6}|[-*+]|\d{1,2}[.)]|>)(?:[ \t]+|$))",  # Headers, list items and quotes
+    re.DOTALL | re.MULTILINE,
+)
+# Every branch starts with a literal character so the regex engine can skip straight to the next candidate
+SPEECH_INLINE_PATTERN = re.compile(
+    rf"\.(?:{ABBREVIATION_LOOKBEHINDS})"
+    rf"|\[(?P<link_text>[^\]\n]*)\]{LINK_TARGET_PATTERN}"
+    rf"|!\[(?P<image_text>[^\]\n]*)\]{LINK_TARGET_PATTERN}"
+    + "".join(
+        rf"|{re.escape(first)}(?i:{re.escape(pattern[1:])})"
+        for pattern in SPEECH_SUBSTITUTIONS
+        for first in dict.fromkeys((pattern[0].lower(), pattern[0].upper()))
+    )
+    + r"|-\n|\|"
+    + "".join(rf"|{re.escape(mark)}(?=[^\s{re.escape(symbols.TONE_MARKS)}])" for mark in symbols.TONE_MARKS)
+)
+SPEECH_UNSPOKEN_PATTERN = re.compile(
+    r"[*`\u200d\u20e3\u2300-\u23ff\u2600-\u27bf\u2b00-\u2bff\ufe0f\U0001f000-\U0001faff\U000e0020-\U000e007f]+"
+)
+TRANSCRIPT_START = "<transcript>"
+TRANSCRIPT_END = "</transcript>"
+TRANSCRIPT_PATTERN = re.compile(rf"\s*{TRANSCRIPT_START}(?P<transcript>.*?){TRANSCRIPT_END}\s*", re.DOTALL)
+AUDIO_PROMPT = (
+    "Respond to the voice message. Start your reply with a transcript of the voice message in the form "
+    f"{TRANSCRIPT_START}what the user said{TRANSCRIPT_END}, then reply to it."
+)
+VAD_FRAME_MS = 20
+RESAMPLE_FILTER_TAPS = 63
+
+
+class TTSError(Exception):
+    """Raised when a text-to-speech engine fails to synthesise speech."""
+
+
+class TTSEngine(ABC):
+    """Abstract base class for text-to-speech engines.
+
+    Text is normalised once with `preprocess` before it is split into sentences, so `cache_key` and `synthesise` take
+    preprocessed text.
+    """
+
+    NAME: ClassVar[str] = ""
+    MIME_TYPE: ClassVar[str] = ""
+    STREAMABLE: ClassVar[bool] = True
+
+    def __init__(self, config: TTSConfig) -> None:
+        """Initialise the engine.
+
+        :param TTSConfig config:
+            Text-to-speech configuration
+        """
+        self.config = config
+
+    @property
+    @abstractmethod
+    def voice(self) -> str:
+        """Get the voice settings which change the synthesised audio."""
+
+    @staticmethod
+    def preprocess(text: str) -> str:
+        """Remove the markup and characters which are not spoken from text.
+
+        :param str text:
+            Text to clean
+        :return str:
+            Text to synthesise
+        """
+        return normalise_speech_text(text)
+
+    def cache_key(self, text: str) -> str:
+        """Get the key of the audio for a text in the text-to-speech cache.
+
+        :param str text:
+            Preprocessed text to convert to speech
+        :return str:
+            Hash of the engine, voice and text
+        """
+        return hashlib.sha256(f"{self.NAME}\0{self.voice}\0{text}".encode()).hexdigest()
+
+    @staticmethod
+    def join(chunks: list[bytes]) -> bytes:
+        """Join the audio of consecutive sentences into one stream.
+
+        :param list[bytes] chunks:
+            Audio data of each sentence in order
+        :return bytes:
+            Audio data of the whole text
+        """
+        return b"".join(chunks)
+
+    @abstractmethod
+    def synthesise(self, text: str) -> bytes:
+        """Convert text to audio.
+
+        :param str text:
+            Preprocessed text to convert to speech
+        :return bytes:
+            Audio data
+        :raise TTSError:
+            If the speech could not be synthesised
+        """
+
+
+class GTTSEngine(TTSEngine):
+    """Online engine using the Google Translate text-to-speech API."""
+
+    NAME = "gtts"
+    MIME_TYPE = "audio/mpeg"
+
+    @property
+    def voice(self) -> str:
+        """Get the language and accent of the gTTS voice."""
+        return f"{self.config.language}-{self.config.gtts_tld}"
+
+    def synthesise(self, text: str) -> bytes:
+        """Convert text to MP3 audio with gTTS.
+
+        :param str text:
+            Preprocessed text to convert to speech
+        :return bytes:
+            MP3 audio data
+        :raise TTSError:
+            If the text has nothing to speak or the request to the text-to-speech API fails
+        """
+        audio_fp = BytesIO()
+        try:
+            # The gTTS pre-processors are already applied by normalise_speech_text()
+            tts = gTTS(text, lang=self.config.language, tld=self.config.gtts_tld, pre_processor_funcs=[])
+            tts.write_to_fp(audio_fp)
+        except (gTTSError, AssertionError) as e:
+            # gTTS asserts the text has something to speak once its tokenizer has removed the punctuation
+            raise TTSError(str(e)) from e
+        return audio_fp.getvalue()
+
+
+class EspeakEngine(TTSEngine):
+    """Offline engine running espeak-ng as a subprocess."""
+
+    NAME = "espeak"
+    MIME_TYPE = "audio/wav"
+    # Each WAV file has its own header, so sentences are joined into one file before they are sent
+    STREAMABLE = False
+
+    @property
+    def voice(self) -> str:
+        """Get the espeak-ng voice and speaking rate."""
+        return f"{self.config.espeak_voice}-{self.config.espeak_speed}"
+
+    @staticmethod
+    def join(chunks: list[bytes]) -> bytes:
+        """Join WAV files into one file, keeping the format of the first.
+
+        :param list[bytes] chunks:
+            WAV audio data of each sentence in order
+        :return bytes:
+            WAV audio data of the whole text, or no data if there are no sentences
+        """
+        if len(chunks) <= 1:
+            return b"".join(chunks)
+
+        output = BytesIO()
+        with wave.open(output, "wb") as writer:
+            for index, chunk in enumerate(chunks):
+                with wave.open(BytesIO(chunk), "rb") as reader:
+                    if index == 0:
+                        writer.setparams(reader.getparams())
+                    writer.writeframes(reader.readframes(reader.getnframes()))
+        return output.getvalue()
+
+    def synthesise(self, text: str) -> bytes:
+        """Convert text to WAV audio with espeak-ng.
+
+        :param str text:
+            Preprocessed text to convert to speech
+        :return bytes:
+            WAV audio data
+        :raise TTSError:
+            If espeak-ng is not installed, fails or times out
+        """
+        command = [
+            self.config.espeak_executable,
+            "--stdout",
+            "-v",
+            self.config.espeak_voice,
+            "-s",
+            str(self.config.espeak_speed),
+        ]
+        try:
+            result = subprocess.run(  # noqa: S603
+                command, input=text.encode(), capture_output=True, check=True, timeout=self.config.timeout
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            msg = f"espeak-ng failed: {e}"
+            raise TTSError(msg) from e
+        return result.stdout
+
+
+TTS_ENGINES: dict[str, type[TTSEngine]] = {engine.NAME: engine for engine in (GTTSEngine, EspeakEngine)}
+
+
+def create_tts_engine(config: TTSConfig) -> TTSEngine:
+    """Create the text-to-speech engine selected in the configuration.
+
+    :param TTSConfig config:
+        Text-to-speech configuration
+    :return TTSEngine:
+        Text-to-speech engine
+    """
+    return TTS_ENGINES[config.engine](config)
+
+
+def sniff_audio_mime_type(header: bytes) -> str:
+    """Detect the container type of audio from its first bytes.
+
+    :param bytes header:
+        First bytes of the audio data
+    :return str:
+        MIME type of the audio, or the MP3 type if the container is not recognised
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "audio/wav"
+    if header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+        return "audio/aiff"
+    if header[4:8] == b"ftyp":
+        return "audio/mp4"
+    for signature, mime_type in AUDIO_SIGNATURES:
+        if header.startswith(signature):
+            return mime_type
+    if len(header) > 1 and header[0] == 0xFF:  # noqa: PLR2004
+        # ADTS frames have a zero layer field, MPEG audio frames do not
+        return "audio/aac" if header[1] & 0xF6 == 0xF0 else "audio/mp3"  # noqa: PLR2004
+    return DEFAULT_AUDIO_MIME_TYPE
+
+
+def get_audio_request(audio: bytes | File) -> list[str | Part]:
+    """Create audio request with inline data or a reference to an uploaded file.
+
+    :param bytes | File audio:
+        Audio data in bytes, or audio uploaded with the Files API
     :return list[str | Part]:
         List containing message and audio part
     """
-    inline_data = Part.from_bytes(
-        data=audio_data,
-        mime_type="audio/mp3",
-    )
-    return ["Respond to the voice message.", inline_data]
+    if isinstance(audio, File):
+        part = Part.from_uri(file_uri=str(audio.uri), mime_type=audio.mime_type)
+    else:
+        part = Part.from_bytes(data=audio, mime_type=sniff_audio_mime_type(audio[:AUDIO_HEADER_BYTES]))
+    return [AUDIO_PROMPT, part]
 
 
-def get_audio_bytes_from_text(text: str) -> str:
-    """Convert text to audio bytes.
+def split_transcript(text: str) -> tuple[str | None, str]:
+    """Split the transcript of the voice message from the start of a reply.
 
     :param str text:
-        Text to convert to speech
-    :return str:
-        Base64 encoded audio data
+        Reply text
+    :return tuple[str | None, str]:
+        Transcript, or None if the reply does not start with one, and the reply without the transcript
     """
-    audio_fp = BytesIO()
-    tts = gTTS(
-        text,
-        lang="en",
-        tld="co.uk",
-        pre_processor_funcs=[
-            *preprocess_default_list(),
-            preprocess_remove_asterisk,
-            preprocess_remove_emojis,
-        ],
-    )
-    tts.write_to_fp(audio_fp)
-    return base64.b64encode(audio_fp.getvalue()).decode("utf-8")
+    if match := TRANSCRIPT_PATTERN.match(text):
+        return match["transcript"].strip() or None, text[match.end() :]
+    return None, text
+
 
+class TranscriptFilter:
+    """Hold back the transcript at the start of a reply while it is streamed, passing on the text which follows it."""
 
-def preprocess_default_list() -> list[Callable]:
-    """Get default preprocessing functions.
+    def __init__(self, on_text: Callable[[str], None]) -> None:
+        """Initialise the transcript filter.
 
-    :return list[Callable]:
-        List of default preprocessing functions
+        :param Callable[[str], None] on_text:
+            Called with each part of the reply text after the transcript
+        """
+        self._on_text = on_text
+        self._buffer = ""
+        self._passing = False
+        self.transcript: str | None = None
+
+    def _pass_on(self, text: str) -> None:
+        """Stop holding back text and pass on the text held so far.
+
+        :param str text:
+            Text to pass on
+        """
+        self._passing = True
+        self._buffer = ""
+        if text:
+            self._on_text(text)
+
+    def add_text(self, text: str) -> None:
+        """Add the next part of the reply text.
+
+        :param str text:
+            Next part of the reply text
+        """
+        if self._passing:
+            self._on_text(text)
+            return
+
+        self._buffer += text
+        if not TRANSCRIPT_START.startswith(self._buffer.lstrip()[: len(TRANSCRIPT_START)]):
+            self._pass_on(self._buffer)
+        elif TRANSCRIPT_END in self._buffer:
+            self.transcript, text = split_transcript(self._buffer)
+            self._pass_on(text)
+
+    def close(self) -> None:
+        """Pass on any text still held back, such as a transcript which was never closed."""
+        if not self._passing:
+            self._pass_on(self._buffer.replace(TRANSCRIPT_START, "", 1).strip())
+
+
+def _read_pcm_samples(reader: wave.Wave_read) -> np.ndarray:
+    """Read the frames of a PCM WAV file as mono samples between -1 and 1.
+
+    :param wave.Wave_read reader:
+        Open WAV file
+    :return np.ndarray:
+        Samples of the channels mixed down to mono
+    :raise wave.Error:
+        If the sample width is not supported
     """
-    return [
-        pre_processors.tone_marks,
-        pre_processors.end_of_line,
-        pre_processors.abbreviations,
-        pre_processors.word_sub,
-    ]
+    sample_width = reader.getsampwidth()
+    num_channels = reader.getnchannels()
+    frames = reader.readframes(reader.getnframes())
+    # A truncated clip can end part way through a frame, which would not decode into whole samples
+    frames = frames[: len(frames) // (sample_width * num_channels) * sample_width * num_channels]
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 3:  # noqa: PLR2004
+        # Pad each 24-bit sample into the top bytes of a 32-bit integer to keep its sign
+        padded = np.zeros((len(frames) // 3, 4), dtype=np.uint8)
+        padded[:, 1:] = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        samples = padded.view("<i4").ravel().astype(np.float32) / 2**31
+    elif sample_width in (2, 4):
+        samples = np.frombuffer(frames, dtype=f"<i{sample_width}").astype(np.float32) / 2 ** (8 * sample_width - 1)
+    else:
+        msg = f"Unsupported sample width: {sample_width}"
+        raise wave.Error(msg)
+    return samples.reshape(-1, num_channels).mean(axis=1)
 
 
-def preprocess_remove_asterisk(text: str) -> str:
-    """Remove asterisk characters from text.
+def trim_silence(samples: np.ndarray, sample_rate: int, threshold_db: float, padding_ms: int) -> np.ndarray:
+    """Trim the leading and trailing silence from audio using the energy of short frames.
+
+    :param np.ndarray samples:
+        Mono samples between -1 and 1
+    :param int sample_rate:
+        Sample rate in Hz
+    :param float threshold_db:
+        Level in dBFS below which a frame is treated as silence
+    :param int padding_ms:
+        Silence kept before and after the speech in milliseconds
+    :return np.ndarray:
+        Samples from the first to the last frame of speech, or all samples if no speech was found
+    """
+    frame_length = max(1, sample_rate * VAD_FRAME_MS // 1000)
+    if (num_frames := len(samples) // frame_length) == 0:
+        return samples
+
+    frames = samples[: num_frames * frame_length].reshape(num_frames, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    voiced = np.flatnonzero(rms >= 10 ** (threshold_db / 20))
+    if voiced.size == 0:
+        return samples
+
+    padding = sample_rate * padding_ms // 1000
+    start = max(0, int(voiced[0]) * frame_length - padding)
+    end = min(len(samples), (int(voiced[-1]) + 1) * frame_length + padding)
+    return samples[start:end]
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Resample audio down to a lower sample rate, filtering out frequencies above the new Nyquist frequency.
+
+    :param np.ndarray samples:
+        Mono samples
+    :param int source_rate:
+        Sample rate of the samples in Hz
+    :param int target_rate:
+        Sample rate to resample to in Hz
+    :return np.ndarray:
+        Resampled samples, or the samples unchanged if they are not above the target rate
+    """
+    if source_rate <= target_rate or len(samples) == 0:
+        return samples
+
+    cutoff = target_rate / source_rate / 2
+    offsets = np.arange(RESAMPLE_FILTER_TAPS) - (RESAMPLE_FILTER_TAPS - 1) / 2
+    taps = np.sinc(2 * cutoff * offsets) * np.hamming(RESAMPLE_FILTER_TAPS)
+    # Taking the centre of the full convolution keeps one output per sample even for clips shorter than the filter
+    start = (RESAMPLE_FILTER_TAPS - 1) // 2
+    filtered = np.convolve(samples, taps / taps.sum(), mode="full")[start : start + len(samples)]
+
+    positions = np.arange(len(samples) * target_rate // source_rate) * (source_rate / target_rate)
+    resampled: np.ndarray = np.interp(positions, np.arange(len(samples)), filtered)
+    return resampled
+
+
+@STAGE_DURATION.time(stage="preprocess_audio")
+def preprocess_wav(
+    audio: bytes, sample_rate: int = 16000, silence_threshold_db: float = -40.0, silence_padding_ms: int = 200
+) -> bytes:
+    """Shrink a PCM WAV voice clip by trimming its silence, mixing it to mono and resampling it.
+
+    :param bytes audio:
+        WAV audio data
+    :param int sample_rate:
+        Sample rate to resample down to in Hz
+    :param float silence_threshold_db:
+        Level in dBFS below which a frame is treated as silence
+    :param int silence_padding_ms:
+        Silence kept before and after the speech in milliseconds
+    :return bytes:
+        16-bit mono WAV audio data, or the original audio if it cannot be read or would not be smaller
+    """
+    try:
+        with wave.open(BytesIO(audio), "rb") as reader:
+            source_rate = reader.getframerate()
+            samples = _read_pcm_samples(reader)
+    except (wave.Error, EOFError) as e:
+        logger.warning("Sending WAV clip unprocessed: %s", e)
+        return audio
+
+    samples = trim_silence(samples, source_rate, silence_threshold_db, silence_padding_ms)
+    samples = resample(samples, source_rate, sample_rate)
+
+    output = BytesIO()
+    with wave.open(output, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(min(source_rate, sample_rate))
+        writer.writeframes((np.clip(samples, -1, 1) * np.iinfo(np.int16).max).astype("<i2").tobytes())
+    processed = output.getvalue()
+
+    bytes_saved = max(0, len(audio) - len(processed))
+    AUDIO_BYTES_SAVED.observe(bytes_saved)
+    logger.info("Preprocessed WAV clip from %d to %d bytes.", len(audio), len(audio) - bytes_saved)
+    return processed if bytes_saved else audio
+
+
+class TTSCache:
+    """Cache of synthesised audio with an in-memory LRU tier and a size-capped on-disk tier.
+
+    Entries are keyed by a hash of the engine, voice and preprocessed text so a change of voice never returns stale
+    audio. The on-disk tier keeps the audio across restarts.
+    """
+
+    def __init__(self, max_entries: int = 128, directory: Path | None = None, max_bytes: int = 50_000_000) -> None:
+        """Initialise the text-to-speech cache.
+
+        :param int max_entries:
+            Number of entries kept in memory
+        :param Path | None directory:
+            Directory of the on-disk tier, or None to only cache in memory
+        :param int max_bytes:
+            Maximum total size of the files in the on-disk tier
+        """
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+
+    def _path(self, key: str) -> Path | None:
+        """Get the path of an entry in the on-disk tier.
+
+        :param str key:
+            Cache key
+        :return Path | None:
+            Path of the entry, or None if there is no on-disk tier
+        """
+        return self.directory / key if self.directory else None
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        """Store an entry in memory, evicting the least recently used entries beyond the limit.
+
+        :param str key:
+            Cache key
+        :param bytes audio:
+            Audio data
+        """
+        with self._lock:
+            self._entries[key] = audio
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> bytes | None:
+        """Get cached audio, promoting an entry found on disk into memory.
+
+        :param str key:
+            Cache key
+        :return bytes | None:
+            Audio data, or None if the audio is not cached
+        """
+        with self._lock:
+            if (audio := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+                return audio
+
+        if (path := self._path(key)) is None:
+            return None
+        try:
+            audio = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Cache synthesised audio in memory and on disk.
+
+        :param str key:
+            Cache key
+        :param bytes audio:
+            Audio data
+        """
+        self._remember(key, audio)
+        if (path := self._path(key)) is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(audio)
+                self._prune_disk()
+            except OSError:
+                logger.exception("Failed to write text-to-speech cache entry: %s", path)
+
+    def _prune_disk(self) -> None:
+        """Remove the least recently used files beyond the on-disk size limit."""
+        if self.directory is None:
+            return
+        files = sorted(
+            ((path.stat(), path) for path in self.directory.iterdir() if path.is_file()),
+            key=lambda item: item[0].st_mtime,
+        )
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, path in files:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+
+
+def _replace_inline_markup(match: re.Match[str]) -> str:
+    """Get the spoken replacement of a match of the inline markup pattern.
+
+    :param re.Match[str] match:
+        Match of SPEECH_INLINE_PATTERN
+    :return str:
+        Text to speak in place of the match
+    """
+    if match.lastgroup:
+        return match[match.lastgroup]
+    match match[0]:
+        case "." | "-\n":
+            return ""
+        case "|":
+            return " "
+        case mark if mark in symbols.TONE_MARKS:
+            return f"{mark} "
+        case substitution:
+            return SPEECH_SUBSTITUTIONS[substitution.lower()]
+
+
+def normalise_speech_text(text: str) -> str:
+    """Remove the markdown, emojis and other characters which are not spoken from text.
+
+    Code blocks, horizontal rules, headers, list and quote markers and link targets are removed, and the gTTS
+    abbreviation, word substitution, end-of-line hyphen and tone mark pre-processors are applied. The patterns are
+    compiled once, so each reply takes three regex passes.
 
     :param str text:
-        Input text
+        Text to clean
     :return str:
-        Text with asterisks removed
+        Text to synthesise
+    """
+    text = SPEECH_LINE_PATTERN.sub("", text)
+    text = SPEECH_INLINE_PATTERN.sub(_replace_inline_markup, text)
+    return SPEECH_UNSPOKEN_PATTERN.sub("", text).strip()
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split text into sentences at sentence-ending punctuation and line breaks.
+
+    :param str text:
+        Text to split
+    :return list[str]:
+        Sentences in order, without the fragments which have no word to speak
     """
-    return text.replace("*", "")
+    sentences = (sentence.strip() for sentence in SENTENCE_BOUNDARY_PATTERN.split(text))
+    return [sentence for sentence in sentences if SPOKEN_TEXT_PATTERN.search(sentence)]
+
+
+def synthesise_sentence(sentence: str, engine: TTSEngine, cache: TTSCache | None = None) -> bytes:
+    """Convert a sentence to audio, using the cache if one is given.
+
+    :param str sentence:
+        Preprocessed sentence to convert to speech
+    :param TTSEngine engine:
+        Text-to-speech engine
+    :param TTSCache | None cache:
+        Cache to return previously synthesised audio from and store new audio in, or None to always synthesise
+    :return bytes:
+        Audio data
+    :raise TTSError:
+        If the speech could not be synthesised
+    """
+    if cache is None:
+        with TTS_DURATION.time(engine=engine.NAME):
+            return engine.synthesise(sentence)
+
+    key = engine.cache_key(sentence)
+    if (audio := cache.get(key)) is not None:
+        TTS_CACHE_REQUESTS.inc(engine=engine.NAME, result="hit")
+        return audio
+
+    TTS_CACHE_REQUESTS.inc(engine=engine.NAME, result="miss")
+    with TTS_DURATION.time(engine=engine.NAME):
+        audio = engine.synthesise(sentence)
+    cache.put(key, audio)
+    return audio
 
 
-def preprocess_remove_emojis(text: str) -> str:
-    """Remove emoji characters from text.
+def iter_audio_from_text(
+    text: str, engine: TTSEngine | None = None, cache: TTSCache | None = None, max_workers: int = 4
+) -> Iterator[bytes]:
+    """Convert text to audio, synthesising its sentences concurrently and yielding their audio in order.
+
+    Engines which cannot be streamed yield the joined audio of the whole text once every sentence is synthesised.
+    Text with nothing to speak yields no audio.
 
     :param str text:
-        Input text
+        Text to convert to speech
+    :param TTSEngine | None engine:
+        Text-to-speech engine, or None to use gTTS with the default configuration
+    :param TTSCache | None cache:
+        Cache of sentence audio, or None to always synthesise
+    :param int max_workers:
+        Maximum number of sentences synthesised at the same time
+    :return Iterator[bytes]:
+        Audio chunks in order
+    :raise TTSError:
+        If any sentence could not be synthesised
+    """
+    engine = engine or GTTSEngine(TTSConfig())
+    if not (sentences := split_sentences(engine.preprocess(text))):
+        return
+    unique_sentences = list(dict.fromkeys(sentences))
+
+    if (workers := min(max_workers, len(unique_sentences))) <= 1:
+        audio = {sentence: synthesise_sentence(sentence, engine, cache) for sentence in unique_sentences}
+        chunks = [audio[sentence] for sentence in sentences]
+        yield from chunks if engine.STREAMABLE else [engine.join(chunks)]
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+    try:
+        futures = {
+            sentence: executor.submit(synthesise_sentence, sentence, engine, cache) for sentence in unique_sentences
+        }
+        if not engine.STREAMABLE:
+            yield engine.join([futures[sentence].result() for sentence in sentences])
+            return
+        for sentence in sentences:
+            yield futures[sentence].result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SpeechPipeline:
+    """Synthesise text into speech one sentence at a time while the text is still being generated.
+
+    Text is added as it arrives and each sentence is submitted to a worker pool as soon as it ends. Iterating the
+    pipeline yields the audio of the sentences in order until the pipeline is closed or cancelled.
+    """
+
+    def __init__(self, engine: TTSEngine, cache: TTSCache | None = None, max_workers: int = 4) -> None:
+        """Initialise the speech pipeline.
+
+        :param TTSEngine engine:
+            Text-to-speech engine
+        :param TTSCache | None cache:
+            Cache of sentence audio, or None to always synthesise
+        :param int max_workers:
+            Maximum number of sentences synthesised at the same time, which can be changed until the first sentence
+            is submitted
+        """
+        self.engine = engine
+        self.cache = cache
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._buffer = ""
+        self._in_code_block = False
+        self._closed = False
+        self._futures: dict[str, Future[bytes]] = {}
+        self._chunks: queue.Queue[Future[bytes] | None] = queue.Queue()
+
+    def _submit(self, sentence: str) -> None:
+        """Queue a sentence for synthesis, reusing the audio of an identical earlier sentence.
+
+        :param str sentence:
+            Sentence to convert to speech
+        """
+        # Sentences are split as they arrive, so code blocks spanning several of them are tracked across calls
+        parts = sentence.split(CODE_FENCE)
+        sentence = "".join(part for index, part in enumerate(parts) if index % 2 == self._in_code_block)
+        self._in_code_block ^= len(parts) % 2 == 0
+        if not SPOKEN_TEXT_PATTERN.search(sentence := self.engine.preprocess(sentence)):
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tts")
+        if (future := self._futures.get(sentence)) is None:
+            future = self._executor.submit(synthesise_sentence, sentence, self.engine, self.cache)
+            self._futures[sentence] = future
+        self._chunks.put(future)
+
+    def add_text(self, text: str) -> None:
+        """Add generated text, synthesising every sentence it completes.
+
+        :param str text:
+            Next part of the text
+        """
+        with self._lock:
+            if self._closed:
+                return
+            *sentences, self._buffer = SENTENCE_BOUNDARY_PATTERN.split(self._buffer + text)
+            for sentence in sentences:
+                self._submit(sentence)
+
+    def close(self) -> None:
+        """Synthesise the remaining text and end the audio once every sentence has been yielded."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._submit(self._buffer)
+            self._buffer = ""
+            self._chunks.put(None)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def cancel(self) -> None:
+        """Stop synthesising and end the audio, discarding the text which has not been synthesised yet."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._buffer = ""
+                self._chunks.put(None)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Yield the audio of each sentence in order until the pipeline is closed or cancelled.
+
+        Engines which cannot be streamed yield the joined audio of every sentence once the pipeline is closed.
+
+        :return Iterator[bytes]:
+            Audio chunks in order
+        :raise TTSError:
+            If a sentence could not be synthesised, after the audio of the sentences before it
+        """
+        futures: list[Future[bytes]] = []
+        try:
+            while (future := self._chunks.get()) is not None:
+                if future.cancelled():
+                    return
+                if self.engine.STREAMABLE:
+                    yield future.result()
+                else:
+                    futures.append(future)
+            if futures and not any(future.cancelled() for future in futures):
+                yield self.engine.join([future.result() for future in futures])
+        except TTSError:
+            logger.exception("Text-to-speech failed while streaming.")
+            ERRORS.inc(stage="tts", error=TTSError.__name__)
+            raise
+
+
+@STAGE_DURATION.time(stage="tts")
+def get_audio_bytes_from_text(
+    text: str, engine: TTSEngine | None = None, cache: TTSCache | None = None, max_workers: int = 4
+) -> str:
+    """Convert text to audio bytes, synthesising its sentences concurrently.
+
+    :param str text:
+        Text to convert to speech
+    :param TTSEngine | None engine:
+        Text-to-speech engine, or None to use gTTS with the default configuration
+    :param TTSCache | None cache:
+        Cache of sentence audio, or None to always synthesise
+    :param int max_workers:
+        Maximum number of sentences synthesised at the same time
     :return str:
-        Text with emojis removed
+        Base64 encoded audio data
+    :raise TTSError:
+        If any sentence could not be synthesised
     """
-    return text.encode("ascii", "ignore").decode("ascii")
+    engine = engine or GTTSEngine(TTSConfig())
+    chunks = list(iter_audio_from_text(text, engine, cache, max_workers))
+    return base64.b64encode(engine.join(chunks)).decode("utf-8")
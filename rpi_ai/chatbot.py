@@ -1,29 +1,55 @@
 """Chatbot implementation for the RPi AI application."""
 
 import logging
-from collections.abc import Callable
+import math
+import os
+import threading
+from collections.abc import Callable, Iterator
 from datetime import datetime
+from functools import cached_property
+from io import BytesIO
 from pathlib import Path
-from typing import Any, ClassVar
+from typing import Any, BinaryIO, ClassVar
 
+import httpx
 import numpy as np
 from google.genai import Client
-from google.genai.errors import ServerError
+from google.genai.chats import Chat
+from google.genai.errors import APIError
 from google.genai.types import (
+    AutomaticFunctionCallingConfig,
+    Content,
     EmbedContentConfig,
+    File,
+    FunctionCall,
     GenerateContentConfig,
     GenerateContentResponse,
     GoogleSearch,
     HarmBlockThreshold,
     HarmCategory,
+    HttpOptions,
+    Part,
     SafetySetting,
     Tool,
+    UploadFileConfig,
 )
-from gtts import gTTSError
 from pydantic import ValidationError
 from python_template_server.models import BaseResponse
 
 from rpi_ai import audiobot
+from rpi_ai.function_calling.functions_list_base import compile_declarations
+from rpi_ai.function_calling.tool_executor import ToolExecutor
+from rpi_ai.function_calling.tool_results import ToolResultProcessor
+from rpi_ai.functions import get_function_lists
+from rpi_ai.load_governor import LOAD_GOVERNOR
+from rpi_ai.metrics import (
+    BLOCKED_MESSAGES,
+    ERRORS,
+    MEMORY_ENTRIES,
+    MEMORY_VECTOR_BYTES,
+    STAGE_DURATION,
+    record_usage,
+)
 from rpi_ai.models import (
     ChatbotConfig,
     ChatbotMessage,
@@ -31,7 +57,9 @@ from rpi_ai.models import (
     ChatbotSpeech,
     ChatMemoryList,
     EmbeddingConfig,
+    LoadGovernorConfig,
 )
+from rpi_ai.resilience import ModelCaller, ModelUnavailableError
 
 logger = logging.getLogger(__name__)
 
@@ -53,13 +81,17 @@ class Chatbot:
 
     CANDIDATE_COUNT: int = 1
 
+    WEB_SEARCH_DISABLED_REPLY: ClassVar[str] = "Web search is unavailable while the system is under heavy load."
+    SEND_AUDIO_FAILED_REPLY: ClassVar[str] = "Failed to send audio to chatbot!"
+    MODEL_OVERLOADED_REPLY: ClassVar[str] = "Model overloaded! Please try again."
+    CANNED_AUDIO_REPLIES: ClassVar[list[str]] = [SEND_AUDIO_FAILED_REPLY, MODEL_OVERLOADED_REPLY]
+
     def __init__(
         self,
         api_key: str,
         config_dir: Path,
         config: ChatbotConfig,
         embedding_config: EmbeddingConfig,
-        functions: list[Callable[..., Any]],
         memories: ChatMemoryList | None = None,
     ) -> None:
         """Initialise the chatbot with API key, configuration, and functions.
@@ -70,8 +102,6 @@ class Chatbot:
             Chatbot configuration
         :param EmbeddingConfig embedding_config:
             Embedding configuration
-        :param list[Callable[..., Any]] functions:
-            List of available functions
         :param ChatMemoryList | None memories:
             Optional pre-loaded chat memories
         """
@@ -79,52 +109,121 @@ class Chatbot:
         self._config_dir = config_dir
         self._config = config
         self._embedding_config = embedding_config
-        self._functions: list[Tool | Callable[..., Any]] = [
-            *functions,
+        self._tool_results = ToolResultProcessor(
+            token_budget=config.tool_config.token_budget,
+            token_budgets=config.tool_config.token_budgets,
+            max_results=config.tool_config.max_stored_results,
+        )
+        self._chatbot_tools: list[Callable[..., Any]] = [
             self.create_memory,
             self.retrieve_memories,
             self.clear_memories,
             self.web_search,
+            self._tool_results.get_tool_output,
         ]
+        self._chatbot_declarations = compile_declarations(self._chatbot_tools)
+        self._degraded: LoadGovernorConfig | None = None
+        self._load_tools()
+        self._tool_executor = self._create_tool_executor()
+        self._tts_engine = audiobot.create_tts_engine(config.tts_config)
+        self._tts_cache = self._create_tts_cache()
 
         self._history: list[ChatbotMessage] = []
+        self._model_caller = ModelCaller(self._config.retry_config)
+        self._chat: Chat
+        self._chat_model = self._config.model
 
+        # Memory tools can run concurrently within one turn, so changes and saves are made one at a time
+        self._memory_lock = threading.Lock()
         self._memory = memories or ChatMemoryList.load_from_file(
             self._config_dir / self._embedding_config.memory_filepath
         )
         logger.info("Loaded %d memory entries.", len(self._memory.entries))
+        MEMORY_ENTRIES.set_function(lambda: len(self._memory.entries))
+        MEMORY_VECTOR_BYTES.set_function(
+            lambda: sum(len(entry.vector) for entry in self._memory.entries) * np.dtype(np.float64).itemsize
+        )
         self.start_chat()
 
-    @property
+    @cached_property
     def _model_config(self) -> GenerateContentConfig:
-        """Get base model configuration."""
+        """Get base model configuration, built once per configuration change."""
         return GenerateContentConfig(
             system_instruction=f"{self._config.system_instruction}\n{ChatbotConfig.get_memory_guidelines()}",
-            max_output_tokens=self._config.max_output_tokens,
+            max_output_tokens=(
+                min(self._config.max_output_tokens, self._degraded.max_output_tokens)
+                if self._degraded
+                else self._config.max_output_tokens
+            ),
             temperature=self._config.temperature,
             safety_settings=self.SAFETY_SETTINGS,
             candidate_count=self.CANDIDATE_COUNT,
         )
 
-    @property
+    @cached_property
     def _chat_config(self) -> GenerateContentConfig:
-        """Get chat configuration with functions."""
-        _config = self._model_config
-        _config.tools = self._functions
-        return _config
+        """Get chat configuration with functions, which are executed by the chatbot rather than the SDK."""
+        return self._model_config.model_copy(
+            update={
+                "tools": [
+                    Tool(
+                        function_declarations=[
+                            declaration
+                            for declaration in self._declarations
+                            if not (self._web_search_disabled and declaration.name == "web_search")
+                        ]
+                    )
+                ],
+                "automatic_function_calling": AutomaticFunctionCallingConfig(disable=True),
+            }
+        )
 
-    @property
+    @cached_property
     def _web_search_config(self) -> GenerateContentConfig:
         """Get web search configuration."""
-        _config = self._model_config
-        _config.tools = [Tool(google_search=GoogleSearch())]
-        return _config
+        return self._model_config.model_copy(update={"tools": [Tool(google_search=GoogleSearch())]})
+
+    def _invalidate_generation_configs(self) -> None:
+        """Discard the derived generation configurations so they are rebuilt on next access."""
+        for name in ("_model_config", "_chat_config", "_web_search_config"):
+            self.__dict__.pop(name, None)
+
+    @property
+    def _web_search_disabled(self) -> bool:
+        """Check whether the web search tool is removed in the current degraded mode."""
+        return self._degraded is not None and self._degraded.disable_web_search
+
+    @property
+    def _tts_workers(self) -> int:
+        """Get the number of sentences synthesised at the same time, lowered in degraded mode."""
+        max_workers = self._config.tts_config.max_workers
+        return min(max_workers, self._degraded.tts_workers) if self._degraded else max_workers
+
+    @property
+    def text_only_audio(self) -> bool:
+        """Check whether audio messages are answered without speech in the mode of the current turn."""
+        return self._degraded is not None and self._degraded.text_only_audio
+
+    @property
+    def models(self) -> list[str]:
+        """Get the primary model followed by the fallback models."""
+        return [self._config.model, *self._config.fallback_models]
+
+    @property
+    def active_model(self) -> str:
+        """Get the model that answered the most recent message."""
+        return self._chat_model
 
     @property
     def chat_history(self) -> ChatbotMessageList:
         """Get chat history as ChatbotMessageList."""
         return ChatbotMessageList(messages=self._history)
 
+    @property
+    def audio_mime_type(self) -> str:
+        """Get the MIME type of the audio produced by the text-to-speech engine."""
+        return self._tts_engine.MIME_TYPE
+
     def _get_current_timestamp(self) -> int:
         """Get the current timestamp.
 
@@ -144,11 +243,12 @@ class Chatbot:
         :return np.ndarray:
             Embedding vector
         """
-        embedding_response = self._client.models.embed_content(
-            model=self._embedding_config.model,
-            contents=text,
-            config=EmbedContentConfig(task_type=task_type),
-        )
+        with STAGE_DURATION.time(stage="embed_text"):
+            embedding_response = self._client.models.embed_content(
+                model=self._embedding_config.model,
+                contents=text,
+                config=EmbedContentConfig(task_type=task_type),
+            )
         if not embedding_response.embeddings:
             msg = "No embeddings returned from embedding model."
             logger.error(msg)
@@ -164,9 +264,10 @@ class Chatbot:
             Confirmation message
         """
         vector = self._embed_text(text, task_type="SEMANTIC_SIMILARITY")
-        self._memory.add_entry(text=text, vector=vector.tolist(), max_memories=self._embedding_config.max_memories)
-        self._memory.save_to_file(self._config_dir / self._embedding_config.memory_filepath)
-        logger.info("Stored new memory (%d entries): %s", len(self._memory.entries), text)
+        with self._memory_lock:
+            self._memory.add_entry(text=text, vector=vector.tolist(), max_memories=self._embedding_config.max_memories)
+            self._memory.save_to_file(self._config_dir / self._embedding_config.memory_filepath)
+            logger.info("Stored new memory (%d entries): %s", len(self._memory.entries), text)
         return f"Memory stored successfully: {text}"
 
     def retrieve_memories(self, query: str) -> list[str]:
@@ -178,14 +279,16 @@ class Chatbot:
             List of relevant memory texts
         """
         query_vector = self._embed_text(query, task_type="SEMANTIC_SIMILARITY")
-        memories = self._memory.retrieve_memories(query_vector.tolist(), top_k=self._embedding_config.top_k)
+        with self._memory_lock:
+            memories = self._memory.retrieve_memories(query_vector.tolist(), top_k=self._embedding_config.top_k)
         logger.info("Retrieved %d relevant memories for query: %s", len(memories), query)
         return memories
 
     def clear_memories(self) -> None:
         """Clear all stored chat memories."""
-        self._memory.clear_entries()
-        self._memory.save_to_file(self._config_dir / self._embedding_config.memory_filepath)
+        with self._memory_lock:
+            self._memory.clear_entries()
+            self._memory.save_to_file(self._config_dir / self._embedding_config.memory_filepath)
         logger.info("Cleared all chat memories.")
 
     def web_search(self, query: str) -> str:
@@ -196,12 +299,21 @@ class Chatbot:
         :return str:
             The search results
         """
+        if self._web_search_disabled:
+            logger.warning("Web search refused in degraded mode: %s", query)
+            return self.WEB_SEARCH_DISABLED_REPLY
+
         logger.info("Performing web search for query: %s", query)
-        reply = self._client.models.generate_content(
-            contents=query,
-            model=self._config.model,
-            config=self._web_search_config,
-        )
+        with STAGE_DURATION.time(stage="web_search"):
+            reply, _ = self._model_caller.call(
+                self.models,
+                lambda model, timeout: self._client.models.generate_content(
+                    contents=query,
+                    model=model,
+                    config=self._with_timeout(self._web_search_config, timeout),
+                ),
+            )
+        record_usage(reply.usage_metadata)
         return reply.text or ""
 
     def _extract_blocked_categories(self, response: GenerateContentResponse) -> list[str]:
@@ -229,6 +341,9 @@ class Chatbot:
         :return str:
             Error message response
         """
+        for category in blocked_categories:
+            BLOCKED_MESSAGES.inc(category=category)
+
         blocked_categories_str = ", ".join(blocked_categories)
         response = self._chat.send_message(
             f"The previous message was blocked because it violates the following categories: {blocked_categories_str}."
@@ -245,22 +360,267 @@ class Chatbot:
         """
         return self._config
 
+    def _load_tools(self) -> None:
+        """Combine the functions and declarations of the enabled tool sets with the chatbot's own tools."""
+        function_lists = get_function_lists(self._config.tool_sets)
+        self._tools = [
+            *(function for function_list in function_lists for function in function_list),
+            *self._chatbot_tools,
+        ]
+        self._declarations = [
+            *(declaration for function_list in function_lists for declaration in function_list.declarations),
+            *self._chatbot_declarations,
+        ]
+
+    def _create_tool_executor(self) -> ToolExecutor:
+        """Create a tool executor using the current tool configuration.
+
+        :return ToolExecutor:
+            Tool executor for the chatbot functions
+        """
+        return ToolExecutor(
+            functions=self._tools,
+            max_workers=(
+                min(self._config.tool_config.max_workers, self._degraded.tool_workers)
+                if self._degraded
+                else self._config.tool_config.max_workers
+            ),
+            timeout=self._config.tool_config.timeout,
+            timeouts=self._config.tool_config.timeouts,
+            result_limit=self._config.tool_config.result_limit,
+            result_limits=self._config.tool_config.result_limits,
+            result_processor=self._tool_results,
+        )
+
+    def _create_tts_cache(self) -> audiobot.TTSCache:
+        """Create a text-to-speech cache using the current text-to-speech configuration.
+
+        :return TTSCache:
+            Cache of synthesised replies
+        """
+        tts_config = self._config.tts_config
+        return audiobot.TTSCache(
+            max_entries=tts_config.cache_entries,
+            directory=self._config_dir / tts_config.cache_dirpath,
+            max_bytes=tts_config.cache_max_bytes,
+        )
+
+    def _get_audio(self, text: str) -> str:
+        """Convert text to speech with the configured engine and cache.
+
+        :param str text:
+            Text to convert to speech
+        :return str:
+            Base64 encoded audio data
+        """
+        return audiobot.get_audio_bytes_from_text(
+            text, self._tts_engine, self._tts_cache, max_workers=self._tts_workers
+        )
+
+    def prerender_replies(self) -> None:
+        """Synthesise the canned audio replies into the cache so error responses do not wait for the engine."""
+        for reply in self.CANNED_AUDIO_REPLIES:
+            try:
+                self._get_audio(reply)
+            except audiobot.TTSError:
+                logger.warning("Failed to pre-render reply: %s", reply)
+        logger.info("Pre-rendered %d canned replies.", len(self.CANNED_AUDIO_REPLIES))
+
     def update_config(self, config: ChatbotConfig) -> None:
         """Update chatbot configuration.
 
+        The conversation carries over into a new chat using the updated configuration from the next turn.
+
         :param ChatbotConfig config:
             New configuration
         """
+        if config == self._config:
+            return
+
+        if config.tool_config != self._config.tool_config or config.tool_sets != self._config.tool_sets:
+            self._tool_executor.shutdown()
+            self._config = config
+            self._tool_results.update_config(
+                config.tool_config.token_budget, config.tool_config.token_budgets, config.tool_config.max_stored_results
+            )
+            self._load_tools()
+            self._tool_executor = self._create_tool_executor()
+
+        if config.tts_config != self._config.tts_config:
+            self._config = config
+            self._tts_engine = audiobot.create_tts_engine(config.tts_config)
+            self._tts_cache = self._create_tts_cache()
+
         self._config = config
+        self._model_caller.update_config(config.retry_config)
+        self._invalidate_generation_configs()
+
+        self._chat_model = self._config.model
+        self._chat = self._continue_chat()
+
+    def _apply_load_mode(self) -> None:
+        """Switch between the normal and degraded modes if the load governor has changed state since the last turn.
+
+        The conversation carries over into a new chat using the generation configuration of the new mode.
+        """
+        if (degraded := LOAD_GOVERNOR.degraded_config) == self._degraded:
+            return
+
+        logger.info("Switching chatbot to %s mode.", "degraded" if degraded else "normal")
+        self._degraded = degraded
+        self._tool_executor.shutdown()
+        self._tool_executor = self._create_tool_executor()
+        self._invalidate_generation_configs()
+        self._chat = self._continue_chat()
 
     def start_chat(self) -> None:
         """Start a new chat session."""
         self._history = [ChatbotMessage.new_chat_message(self._get_current_timestamp())]
+        self._chat_model = self._config.model
         self._chat = self._client.chats.create(
-            model=self._config.model,
+            model=self._chat_model,
+            config=self._chat_config,
+        )
+
+    def _continue_chat(self, model: str | None = None, history: list[Content] | None = None) -> Chat:
+        """Create a chat using the current chat configuration which continues the conversation.
+
+        :param str | None model:
+            Model to continue on, or None to keep the model of the current chat
+        :param list[Content] | None history:
+            History to continue from, or None to keep the history of the current chat
+        :return Chat:
+            New chat
+        """
+        return self._client.chats.create(
+            model=model or self._chat_model,
             config=self._chat_config,
+            history=list(self._chat.get_history() if history is None else history),
         )
 
+    def _chat_for_model(self, model: str) -> Chat:
+        """Get the chat to send the next message with, continuing the conversation on another model if needed.
+
+        :param str model:
+            Model to send the message to
+        :return Chat:
+            Current chat, or a new chat on the model with the existing history
+        """
+        if model == self._chat_model:
+            return self._chat
+        return self._continue_chat(model)
+
+    @staticmethod
+    def _with_timeout(config: GenerateContentConfig, timeout: float) -> GenerateContentConfig:
+        """Copy a generation configuration, limiting its request to the time left before the deadline.
+
+        :param GenerateContentConfig config:
+            Generation configuration
+        :param float timeout:
+            Seconds the request may take
+        :return GenerateContentConfig:
+            Generation configuration with the request timeout
+        """
+        return config.model_copy(update={"http_options": HttpOptions(timeout=max(1, math.ceil(timeout * 1000)))})
+
+    def _send_chat_message(self, message: str | list[str | Part]) -> GenerateContentResponse:
+        """Send a message to the chat, retrying and falling back to other models on server errors.
+
+        When a fallback model answers, the chat continues on that model with the existing history.
+
+        :param str | list[str | Part] message:
+            Message to send
+        :return GenerateContentResponse:
+            Response from the model that answered
+        """
+
+        def _send(model: str, timeout: float) -> tuple[Chat, GenerateContentResponse]:
+            chat = self._chat_for_model(model)
+            return chat, chat.send_message(message, config=self._with_timeout(self._chat_config, timeout))
+
+        (self._chat, response), self._chat_model = self._model_caller.call(self.models, _send)
+        record_usage(response.usage_metadata)
+        if self._chat_model != self._config.model:
+            logger.info("Response generated by fallback model: %s", self._chat_model)
+        return response
+
+    def _send_turn(self, message: str | list[str | Part]) -> GenerateContentResponse:
+        """Send a message and run the tool calls requested by the model until it replies.
+
+        Function calls requested in the same model turn are executed concurrently.
+
+        :param str | list[str | Part] message:
+            Message to send
+        :return GenerateContentResponse:
+            Final response from the model
+        """
+        response = self._send_chat_message(message)
+        for _ in range(self._config.tool_config.max_remote_calls):
+            if not (function_calls := list(response.function_calls or [])):
+                break
+            logger.info("Executing tool calls: %s", ", ".join(str(call.name) for call in function_calls))
+            response = self._send_chat_message([*self._tool_executor.execute(function_calls)])
+        return response
+
+    def _stream_chat_message(self, message: str | list[str | Part]) -> Iterator[GenerateContentResponse]:
+        """Send a message to the chat and yield the response in chunks as it is generated.
+
+        Server errors are retried and fall back to other models until the first chunk arrives.
+
+        :param str | list[str | Part] message:
+            Message to send
+        :return Iterator[GenerateContentResponse]:
+            Response chunks from the model that answered
+        """
+
+        def _open(
+            model: str, timeout: float
+        ) -> tuple[Chat, Iterator[GenerateContentResponse], GenerateContentResponse | None]:
+            chat = self._chat_for_model(model)
+            stream = chat.send_message_stream(message, config=self._with_timeout(self._chat_config, timeout))
+            return chat, stream, next(stream, None)
+
+        (self._chat, stream, first_chunk), self._chat_model = self._model_caller.call(self.models, _open)
+        if self._chat_model != self._config.model:
+            logger.info("Response generated by fallback model: %s", self._chat_model)
+        if first_chunk is None:
+            return
+
+        usage_metadata = first_chunk.usage_metadata
+        yield first_chunk
+        for chunk in stream:
+            usage_metadata = chunk.usage_metadata or usage_metadata
+            yield chunk
+        record_usage(usage_metadata)
+
+    def _stream_turn(
+        self, message: str | list[str | Part], on_text: Callable[[str], None]
+    ) -> tuple[GenerateContentResponse, str]:
+        """Send a message and run the tool calls requested by the model, passing on its text as it is generated.
+
+        :param str | list[str | Part] message:
+            Message to send
+        :param Callable[[str], None] on_text:
+            Called with each part of the reply text as it arrives
+        :return tuple[GenerateContentResponse, str]:
+            Last response chunk from the model and the complete reply text
+        """
+        response = GenerateContentResponse()
+        text_parts: list[str] = []
+        for remaining_calls in range(self._config.tool_config.max_remote_calls, -1, -1):
+            function_calls: list[FunctionCall] = []
+            for response in self._stream_chat_message(message):
+                function_calls.extend(response.function_calls or [])
+                if text := response.text:
+                    text_parts.append(text)
+                    on_text(text)
+            if not function_calls or not remaining_calls:
+                break
+            logger.info("Executing tool calls: %s", ", ".join(str(call.name) for call in function_calls))
+            message = [*self._tool_executor.execute(function_calls)]
+        return response, "".join(text_parts)
+
+    @STAGE_DURATION.time(stage="send_message")
     def send_message(self, text: str) -> ChatbotMessage:
         """Send a text message to the chatbot.
 
@@ -269,23 +629,27 @@ class Chatbot:
         :return ChatbotMessage:
             Chatbot response message
         """
+        self._apply_load_mode()
         try:
             user_message = ChatbotMessage.user_message(text, self._get_current_timestamp())
 
-            response = self._chat.send_message(text)
+            response = self._send_turn(text)
 
             if not (response_text := response.text):
                 msg = "No response text received from chatbot."
                 logger.error(msg)
                 raise AttributeError(msg)  # noqa: TRY301
 
-            model_message = ChatbotMessage.model_message(response_text, self._get_current_timestamp())
+            model_message = ChatbotMessage.model_message(
+                response_text, self._get_current_timestamp(), model=self._chat_model
+            )
 
             self._history.append(user_message)
             self._history.append(model_message)
         except (AttributeError, ValidationError) as e:
             msg = f"Failed to send message to chatbot: {e}"
             logger.exception(msg)
+            ERRORS.inc(stage="send_message", error=type(e).__name__)
 
             if blocked_categories := self._extract_blocked_categories(response):
                 self._history.append(user_message)
@@ -294,59 +658,245 @@ class Chatbot:
                 reply = "Failed to send message to chatbot!"
 
             return ChatbotMessage(message=reply, timestamp=self._get_current_timestamp())
-        except ServerError:
+        except ModelUnavailableError:
             logger.exception("Model overloaded.")
+            ERRORS.inc(stage="send_message", error=ModelUnavailableError.__name__)
             return ChatbotMessage(
                 message="Model overloaded! Please try again.", timestamp=self._get_current_timestamp()
             )
         else:
             return model_message
 
-    def send_audio(self, audio_data: bytes) -> ChatbotSpeech:
-        """Send audio data to the chatbot and get speech response.
+    def _prepare_audio(self, audio_data: bytes | BinaryIO) -> bytes | File:
+        """Get audio ready to send, shrinking WAV clips and uploading clips too large to send inline with the Files API.
 
-        :param bytes audio_data:
-            Audio data to send
-        :return ChatbotSpeech:
-            Speech response with audio and text
+        :param bytes | BinaryIO audio_data:
+            Audio data, or a file containing it
+        :return bytes | File:
+            Audio data to send inline, or the uploaded file
         """
+        upload_config = self._config.audio_upload_config
+        audio_file = BytesIO(audio_data) if isinstance(audio_data, bytes) else audio_data
+        size = audio_file.seek(0, os.SEEK_END)
+        audio_file.seek(0)
+        mime_type = audiobot.sniff_audio_mime_type(audio_file.read(audiobot.AUDIO_HEADER_BYTES))
+        audio_file.seek(0)
+
+        # Preprocessing holds the whole clip in memory as floating point samples, so large clips are sent unchanged
+        if upload_config.preprocess and mime_type == "audio/wav" and size <= upload_config.preprocess_max_bytes:
+            audio_file = BytesIO(
+                audiobot.preprocess_wav(
+                    audio_file.read(),
+                    sample_rate=upload_config.sample_rate,
+                    silence_threshold_db=upload_config.silence_threshold_db,
+                    silence_padding_ms=upload_config.silence_padding_ms,
+                )
+            )
+            size = len(audio_file.getbuffer())
+
+        if size <= upload_config.inline_max_bytes:
+            return audio_file.read()
+
+        logger.info("Uploading %d byte audio clip (%s).", size, mime_type)
+        return self._client.files.upload(
+            file=audio_file,  # type: ignore[arg-type]
+            config=UploadFileConfig(mime_type=mime_type),
+        )
+
+    def _drop_audio_from_chat(self) -> None:
+        """Remove the audio of the last voice message from the chat once the model has transcribed it.
+
+        The transcript at the start of the model's reply stays in the history, so later turns keep the context of the
+        voice message without sending its audio again.
+        """
+        history = self._chat.get_history()
+        for index in range(len(history) - 1, -1, -1):
+            parts = history[index].parts or []
+            if history[index].role == "user" and any(part.inline_data or part.file_data for part in parts):
+                break
+        else:
+            return
+
+        content = history[index].model_copy(
+            update={"parts": [part for part in parts if not (part.inline_data or part.file_data)]}
+        )
+        self._chat = self._continue_chat(history=[*history[:index], content, *history[index + 1 :]])
+
+    def _reply_to_audio(
+        self, audio_data: bytes | BinaryIO, on_text: Callable[[str], None] | None = None
+    ) -> ChatbotMessage:
+        """Send audio data to the chatbot and get the text of its reply, falling back to a canned reply on failure.
+
+        The model is asked to start its reply with a transcript of the audio, which is recorded as the user message.
+        The load mode of the turn must already be applied, so the caller can decide how to speak the reply with it.
+
+        :param bytes | BinaryIO audio_data:
+            Audio data to send, or a file containing it
+        :param Callable[[str], None] | None on_text:
+            Called with each part of the reply text as it is generated, or None to wait for the whole reply
+        :return ChatbotMessage:
+            Reply to speak, with no model if it is a fallback reply
+        """
+        audio: bytes | File | None = None
         try:
-            audio_request = audiobot.get_audio_request(audio_data)
+            audio = self._prepare_audio(audio_data)
+            audio_request = audiobot.get_audio_request(audio)
             user_message = ChatbotMessage.user_message(str(audio_request[0]), self._get_current_timestamp())
 
-            response = self._chat.send_message(audio_request)
-            if not (response_text := response.text):
+            if on_text is None:
+                response = self._send_turn(audio_request)
+                response_text = response.text
+            else:
+                transcript_filter = audiobot.TranscriptFilter(on_text)
+                response, response_text = self._stream_turn(audio_request, transcript_filter.add_text)
+                transcript_filter.close()
+            if not response_text:
                 msg = "No response text received from chatbot."
                 logger.error(msg)
                 raise AttributeError(msg)  # noqa: TRY301
 
-            model_message = ChatbotMessage.model_message(response_text, self._get_current_timestamp())
-
-            audio = audiobot.get_audio_bytes_from_text(response_text)
-            speech_response = ChatbotSpeech(bytes=audio, message=response_text, timestamp=self._get_current_timestamp())
-
+            model_message = ChatbotMessage.model_message(
+                response_text, self._get_current_timestamp(), model=self._chat_model
+            )
+            transcript, model_message.message = audiobot.split_transcript(model_message.message)
+            if transcript:
+                user_message = user_message.model_copy(update={"message": transcript})
+                self._drop_audio_from_chat()
             self._history.append(user_message)
             self._history.append(model_message)
         except (AttributeError, ValidationError) as e:
             msg = f"Failed to send audio to chatbot: {e}"
             logger.exception(msg)
+            ERRORS.inc(stage="send_audio", error=type(e).__name__)
 
             if blocked_categories := self._extract_blocked_categories(response):
                 self._history.append(user_message)
                 reply = self._handle_blocked_message(blocked_categories)
             else:
-                reply = "Failed to send audio to chatbot!"
-
-            audio = audiobot.get_audio_bytes_from_text(reply)
-            return ChatbotSpeech(bytes=audio, message=reply, timestamp=self._get_current_timestamp())
-        except ServerError:
-            reply = "Model overloaded! Please try again."
-            audio = audiobot.get_audio_bytes_from_text(reply)
+                reply = self.SEND_AUDIO_FAILED_REPLY
+            return ChatbotMessage(message=reply, timestamp=self._get_current_timestamp())
+        except ModelUnavailableError:
             logger.exception("Model overloaded.")
-            return ChatbotSpeech(bytes=audio, message=reply, timestamp=self._get_current_timestamp())
-        except gTTSError as e:
-            msg = f"A gTTSError occurred: {e}"
+            ERRORS.inc(stage="send_audio", error=ModelUnavailableError.__name__)
+            return ChatbotMessage(message=self.MODEL_OVERLOADED_REPLY, timestamp=self._get_current_timestamp())
+        except (APIError, httpx.TimeoutException) as e:
+            # Retries only cover opening a stream, so an error or timeout after the first chunk ends the reply here
+            logger.exception("Model request failed.")
+            ERRORS.inc(stage="send_audio", error=type(e).__name__)
+            return ChatbotMessage(message=self.SEND_AUDIO_FAILED_REPLY, timestamp=self._get_current_timestamp())
+        else:
+            return model_message
+        finally:
+            if isinstance(audio, File):
+                self._delete_uploaded_audio(audio)
+
+    def _delete_uploaded_audio(self, file: File) -> None:
+        """Delete an audio clip uploaded with the Files API once its turn is over.
+
+        The audio is removed from the chat first if it is still there, so later turns do not refer to a deleted file.
+
+        :param File file:
+            Uploaded audio clip
+        """
+        history = self._chat.get_history()
+        if any(
+            part.file_data and part.file_data.file_uri == file.uri
+            for content in history
+            for part in content.parts or []
+        ):
+            self._drop_audio_from_chat()
+        try:
+            self._client.files.delete(name=file.name or "")
+        except APIError:
+            logger.exception("Failed to delete uploaded audio clip: %s", file.name)
+
+    @STAGE_DURATION.time(stage="send_audio")
+    def send_audio(self, audio_data: bytes | BinaryIO) -> ChatbotSpeech:
+        """Send audio data to the chatbot and get speech response.
+
+        :param bytes | BinaryIO audio_data:
+            Audio data to send, or a file containing it
+        :return ChatbotSpeech:
+            Speech response with audio and text, without audio while the system is under heavy load
+        """
+        self._apply_load_mode()
+        reply = self._reply_to_audio(audio_data)
+        if self.text_only_audio:
+            return ChatbotSpeech(bytes="", message=reply.message, timestamp=reply.timestamp, model=reply.model)
+        try:
+            audio = self._get_audio(reply.message)
+        except audiobot.TTSError as e:
+            msg = f"Text-to-speech failed: {e}"
             logger.exception(msg)
+            ERRORS.inc(stage="tts", error=type(e).__name__)
             return ChatbotSpeech(bytes="", message=str(e), timestamp=self._get_current_timestamp())
-        else:
-            return speech_response
+        return ChatbotSpeech(bytes=audio, message=reply.message, timestamp=reply.timestamp, model=reply.model)
+
+    @STAGE_DURATION.time(stage="send_audio")
+    def send_audio_stream(self, audio_data: bytes | BinaryIO) -> tuple[ChatbotMessage, Iterator[bytes]]:
+        """Send audio data to the chatbot and get its reply with the speech as a stream of audio chunks.
+
+        :param bytes | BinaryIO audio_data:
+            Audio data to send, or a file containing it
+        :return tuple[ChatbotMessage, Iterator[bytes]]:
+            Reply text and the audio of each sentence in order as it is synthesised, with no audio while the system is
+            under heavy load. Iterating the audio raises a TTSError if synthesis fails.
+        """
+        self._apply_load_mode()
+        reply = self._reply_to_audio(audio_data)
+        return reply, iter(()) if self.text_only_audio else self._stream_audio(reply.message)
+
+    def create_speech_pipeline(self) -> audiobot.SpeechPipeline:
+        """Create a speech pipeline using the configured text-to-speech engine and cache.
+
+        :return SpeechPipeline:
+            Pipeline to synthesise a reply as it is generated
+        """
+        return audiobot.SpeechPipeline(self._tts_engine, self._tts_cache, self._tts_workers)
+
+    @STAGE_DURATION.time(stage="send_audio")
+    def send_audio_pipelined(self, audio_data: bytes | BinaryIO, pipeline: audiobot.SpeechPipeline) -> ChatbotMessage:
+        """Send audio data to the chatbot, feeding each sentence of the reply to a speech pipeline as it is generated.
+
+        The pipeline is closed once the reply is complete, with no audio while the system is under heavy load. The
+        pipeline is created before the turn is queued, so its number of workers is set here for the mode of the turn.
+
+        :param bytes | BinaryIO audio_data:
+            Audio data to send, or a file containing it
+        :param SpeechPipeline pipeline:
+            Pipeline to synthesise the reply with
+        :return ChatbotMessage:
+            Reply text
+        """
+        try:
+            self._apply_load_mode()
+            if self.text_only_audio:
+                return self._reply_to_audio(audio_data)
+
+            pipeline.max_workers = self._tts_workers
+            reply = self._reply_to_audio(audio_data, pipeline.add_text)
+            # Fallback replies are not generated by the model so have not been passed to the pipeline yet
+            if reply.model is None:
+                pipeline.add_text(reply.message)
+            return reply
+        finally:
+            pipeline.close()
+
+    def _stream_audio(self, text: str) -> Iterator[bytes]:
+        """Convert text to speech as a stream, recording the error if synthesis fails.
+
+        :param str text:
+            Text to convert to speech
+        :return Iterator[bytes]:
+            Audio chunks in order
+        :raise TTSError:
+            If any sentence could not be synthesised, after the audio of the sentences before it
+        """
+        try:
+            yield from audiobot.iter_audio_from_text(
+                text, self._tts_engine, self._tts_cache, max_workers=self._tts_workers
+            )
+        except audiobot.TTSError:
+            logger.exception("Text-to-speech failed while streaming.")
+            ERRORS.inc(stage="tts", error=audiobot.TTSError.__name__)
+            raise
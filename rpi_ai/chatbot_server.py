@@ -1,29 +1,50 @@
 """RPi AI server application module."""
 
+import asyncio
 import json
 import logging
 import os
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Generator, Iterable
+from http import HTTPStatus
+from typing import BinaryIO, NoReturn
 
-from fastapi import HTTPException, Request
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 from python_template_server.constants import CONFIG_DIR
 from python_template_server.models import ResponseCode
 from python_template_server.template_server import TemplateServer
+from starlette.concurrency import iterate_in_threadpool
+from starlette.datastructures import UploadFile
 
+from rpi_ai.audiobot import SpeechPipeline, TTSError
 from rpi_ai.chatbot import Chatbot
-from rpi_ai.functions import FUNCTIONS
+from rpi_ai.function_calling.job_manager import JOBS
+from rpi_ai.function_calling.package_updates import PACKAGE_UPDATES
+from rpi_ai.function_calling.telemetry import TELEMETRY, TelemetryHistory
+from rpi_ai.load_governor import LOAD_GOVERNOR
+from rpi_ai.metrics import CHAT_QUEUE_DEPTH, CONTENT_TYPE, REGISTRY, REQUEST_DURATION
 from rpi_ai.models import (
     ChatbotConfig,
+    ChatbotMessage,
     ChatbotServerConfig,
     GetChatHistoryResponse,
     GetConfigResponse,
+    GetJobResponse,
+    GetJobsResponse,
+    GetLoadResponse,
     PostAudioResponse,
     PostMessageResponse,
 )
+from rpi_ai.request_queue import QueueFullError, RequestQueue
 
 logger = logging.getLogger(__name__)
 
 API_KEY_ENV_VAR = "GEMINI_API_KEY"
+JSON_MEDIA_TYPE = "application/json"
 
 
 class ChatbotServer(TemplateServer):
@@ -48,9 +69,40 @@ class ChatbotServer(TemplateServer):
             config_dir=CONFIG_DIR,
             config=self.config.chatbot_config,
             embedding_config=self.config.embedding_config,
-            functions=FUNCTIONS,
         )
         logger.info("Successfully initialised Chatbot!")
+        self.chat_queue = RequestQueue(max_depth=self.config.request_queue_config.max_depth)
+        CHAT_QUEUE_DEPTH.set_function(lambda: self.chat_queue.depth)
+        JOBS.update_config(self.config.job_config)
+        self.app.middleware("http")(self._record_request_metrics)
+
+    def run(self) -> None:
+        """Start the background telemetry, load and package update checks, serve the application, then stop them."""
+        telemetry_config = self.config.telemetry_config
+        TELEMETRY.start(
+            interval=telemetry_config.interval,
+            buffer_size=telemetry_config.buffer_size,
+            history=TelemetryHistory(CONFIG_DIR / telemetry_config.history_filepath, telemetry_config.history_capacity),
+            history_interval=telemetry_config.history_interval,
+            process_interval=telemetry_config.process_interval,
+        )
+        LOAD_GOVERNOR.start(self.config.load_governor_config)
+        PACKAGE_UPDATES.start(
+            interval=self.config.package_update_config.interval,
+            low_priority=self.config.package_update_config.low_priority,
+        )
+        self._start_prerender()
+        try:
+            super().run()
+        finally:
+            PACKAGE_UPDATES.stop()
+            LOAD_GOVERNOR.stop()
+            TELEMETRY.stop()
+            JOBS.shutdown()
+
+    def _start_prerender(self) -> None:
+        """Pre-render the chatbot's canned audio replies in a background thread."""
+        threading.Thread(target=self.chatbot.prerender_replies, name="tts-prerender", daemon=True).start()
 
     def validate_config(self, config_data: dict) -> ChatbotServerConfig:
         """Validate and parse the configuration data into a ChatbotServerConfig.
@@ -66,6 +118,13 @@ class ChatbotServer(TemplateServer):
 
     def setup_routes(self) -> None:
         """Set up API routes."""
+        self.add_authenticated_route(
+            endpoint="/metrics",
+            handler_function=self.get_metrics,
+            response_model=None,
+            methods=["GET"],
+            limited=False,
+        )
         self.add_authenticated_route(
             endpoint="/config",
             handler_function=self.get_config,
@@ -94,6 +153,34 @@ class ChatbotServer(TemplateServer):
             methods=["POST"],
             limited=True,
         )
+        self.add_authenticated_route(
+            endpoint="/jobs",
+            handler_function=self.get_jobs,
+            response_model=GetJobsResponse,
+            methods=["GET"],
+            limited=True,
+        )
+        self.add_authenticated_route(
+            endpoint="/jobs/{job_id}",
+            handler_function=self.get_job,
+            response_model=GetJobResponse,
+            methods=["GET"],
+            limited=True,
+        )
+        self.add_authenticated_route(
+            endpoint="/jobs/{job_id}/cancel",
+            handler_function=self.post_cancel_job,
+            response_model=GetJobResponse,
+            methods=["POST"],
+            limited=True,
+        )
+        self.add_authenticated_route(
+            endpoint="/system/load",
+            handler_function=self.get_load,
+            response_model=GetLoadResponse,
+            methods=["GET"],
+            limited=True,
+        )
         self.add_authenticated_route(
             endpoint="/chat/message",
             handler_function=self.post_message_text,
@@ -108,6 +195,98 @@ class ChatbotServer(TemplateServer):
             methods=["POST"],
             limited=True,
         )
+        self.add_authenticated_route(
+            endpoint="/chat/audio/stream",
+            handler_function=self.post_message_audio_stream,
+            response_model=None,
+            methods=["POST"],
+            limited=True,
+        )
+        self.add_authenticated_route(
+            endpoint="/chat/audio/pipeline",
+            handler_function=self.post_message_audio_pipeline,
+            response_model=None,
+            methods=["POST"],
+            limited=True,
+        )
+
+    async def _record_request_metrics(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        """Record the duration of each HTTP request by route template.
+
+        :param Request request:
+            Incoming request
+        :param Callable[[Request], Awaitable[Response]] call_next:
+            Next handler in the middleware chain
+        :return Response:
+            Response from the next handler
+        """
+        start = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(response.status_code),
+        )
+        return response
+
+    @staticmethod
+    def _queue_full_exception(error: QueueFullError) -> HTTPException:
+        """Create the response for a chat request rejected because the queue is full.
+
+        :param QueueFullError error:
+            Error raised by the chat request queue
+        :return HTTPException:
+            Too many requests error with the suggested retry delay
+        """
+        error_msg = "Too many pending chat requests"
+        logger.warning(error_msg)
+        return HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail=error_msg,
+            headers={"Retry-After": str(error.retry_after)},
+        )
+
+    def _enqueue_chat_request[T](self, func: Callable[..., T], *args: object) -> asyncio.Future[T]:
+        """Queue a chat request after the requests already queued for the conversation without waiting for it.
+
+        :param Callable[..., T] func:
+            Chatbot method to run
+        :param object args:
+            Positional arguments for the method
+        :return asyncio.Future[T]:
+            Future resolved with the result of the chatbot method
+        :raise HTTPException:
+            If the chat request queue is full
+        """
+        try:
+            return self.chat_queue.enqueue(func, *args)
+        except QueueFullError as e:
+            raise self._queue_full_exception(e) from e
+
+    async def _submit_chat_request[T](self, func: Callable[..., T], *args: object) -> T:
+        """Run a chat request after the requests already queued for the conversation.
+
+        :param Callable[..., T] func:
+            Chatbot method to run
+        :param object args:
+            Positional arguments for the method
+        :return T:
+            Result of the chatbot method
+        :raise HTTPException:
+            If the chat request queue is full
+        """
+        try:
+            return await self.chat_queue.submit(func, *args)
+        except QueueFullError as e:
+            raise self._queue_full_exception(e) from e
+
+    async def get_metrics(self, request: Request) -> Response:
+        """Get application metrics in the Prometheus text format."""
+        return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
     async def get_config(self, request: Request) -> GetConfigResponse:
         """Get current chatbot configuration."""
@@ -121,12 +300,16 @@ class ChatbotServer(TemplateServer):
     async def post_config(self, request: Request) -> None:
         """Update chatbot configuration."""
         logger.info("Updating chatbot configuration...")
-        self.config.chatbot_config = ChatbotConfig.model_validate(await request.json())
-        self.chatbot.update_config(self.config.chatbot_config)
+        config_update = await request.json()
+        config = ChatbotConfig.model_validate({**self.config.chatbot_config.model_dump(), **config_update})
+        # Only record the new configuration once the chatbot has applied it, so a rejected update is never saved
+        await self._submit_chat_request(self.chatbot.update_config, config)
+        tts_changed = config.tts_config != self.config.chatbot_config.tts_config
+        self.config.chatbot_config = config
+        if tts_changed:
+            self._start_prerender()
         logger.info("Saving updated configuration to file: %s", self.config_filepath)
         self.config.save_to_file(self.config_filepath)
-        logger.info("Restarting chatbot with updated configuration...")
-        self.chatbot.start_chat()
 
     async def get_chat_history(self, request: Request) -> GetChatHistoryResponse:
         """Get current chatbot conversation history."""
@@ -142,7 +325,53 @@ class ChatbotServer(TemplateServer):
     async def post_restart_chat(self, request: Request) -> None:
         """Restart chat session."""
         logger.info("Restarting chatbot session...")
-        self.chatbot.start_chat()
+        await self._submit_chat_request(self.chatbot.start_chat)
+
+    async def get_jobs(self, request: Request) -> GetJobsResponse:
+        """Get all background jobs."""
+        jobs = JOBS.list_jobs()
+        logger.info("Retrieved %d background jobs.", len(jobs))
+        return GetJobsResponse(
+            message="Successfully retrieved background jobs.",
+            timestamp=GetJobsResponse.current_timestamp(),
+            jobs=jobs,
+        )
+
+    async def get_job(self, request: Request) -> GetJobResponse:
+        """Get the status and output of a background job."""
+        job_id = request.path_params["job_id"]
+        if (job := JOBS.get(job_id)) is None:
+            error_msg = f"No job found with ID {job_id}"
+            logger.error(error_msg)
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=error_msg)
+        return GetJobResponse(
+            message="Successfully retrieved background job.",
+            timestamp=GetJobResponse.current_timestamp(),
+            job=job,
+        )
+
+    async def post_cancel_job(self, request: Request) -> GetJobResponse:
+        """Cancel a background job."""
+        job_id = request.path_params["job_id"]
+        if (job := JOBS.cancel(job_id)) is None:
+            error_msg = f"No job found with ID {job_id}"
+            logger.error(error_msg)
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=error_msg)
+        return GetJobResponse(
+            message="Successfully cancelled background job.",
+            timestamp=GetJobResponse.current_timestamp(),
+            job=job,
+        )
+
+    async def get_load(self, request: Request) -> GetLoadResponse:
+        """Get the state of the load governor."""
+        load = LOAD_GOVERNOR.status
+        logger.info("Retrieved load governor state: %s", "degraded" if load.degraded else "normal")
+        return GetLoadResponse(
+            message="Successfully retrieved load governor state.",
+            timestamp=GetLoadResponse.current_timestamp(),
+            load=load,
+        )
 
     async def post_message_text(self, request: Request) -> PostMessageResponse:
         """Send a text chat message."""
@@ -161,7 +390,7 @@ class ChatbotServer(TemplateServer):
             raise HTTPException(status_code=ResponseCode.BAD_REQUEST, detail=error_msg)
 
         logger.info("Message: %s", user_message)
-        reply = self.chatbot.send_message(user_message)
+        reply = await self._submit_chat_request(self.chatbot.send_message, user_message)
         logger.info("Reply: %s", reply.message)
         return PostMessageResponse(
             message="Message sent successfully",
@@ -169,8 +398,29 @@ class ChatbotServer(TemplateServer):
             reply=reply,
         )
 
-    async def post_message_audio(self, request: Request) -> PostAudioResponse:
-        """Send an audio chat message."""
+    async def _read_audio(self, request: Request) -> BinaryIO:
+        """Receive the audio file of an audio chat message.
+
+        The form parser spools large files to disk, so the upload is handed on as a file rather than read into memory.
+
+        :param Request request:
+            Request with the audio file in its form data
+        :return BinaryIO:
+            File containing the audio data
+        :raise HTTPException:
+            If the request has no content length, or the form data cannot be parsed, has no audio file or the audio file
+            is too large
+        """
+        max_bytes = self.config.chatbot_config.audio_upload_config.max_bytes
+        # The server stops reading the body at its declared length, so requiring one bounds what is spooled to disk
+        content_length = request.headers.get("content-length", "")
+        if not content_length.isdigit():
+            error_msg = "Content-Length header is required for audio uploads"
+            logger.error(error_msg)
+            raise HTTPException(status_code=HTTPStatus.LENGTH_REQUIRED, detail=error_msg)
+        if int(content_length) > max_bytes:
+            self._raise_audio_too_large(max_bytes)
+
         try:
             logger.info("Receiving audio message...")
             form = await request.form()
@@ -180,23 +430,162 @@ class ChatbotServer(TemplateServer):
             raise HTTPException(status_code=ResponseCode.BAD_REQUEST, detail=error_msg) from e
 
         audio_file = form.get("audio")
-        if not isinstance(audio_file, bytes) and not hasattr(audio_file, "read"):
+        if not isinstance(audio_file, UploadFile):
             error_msg = "No audio file provided in request body"
             logger.error(error_msg)
             raise HTTPException(status_code=ResponseCode.BAD_REQUEST, detail=error_msg)
 
-        try:
-            audio_data = await audio_file.read()  # type: ignore[union-attr]
-        except Exception as e:
-            error_msg = "Failed to read audio file"
-            logger.exception(error_msg)
-            raise HTTPException(status_code=ResponseCode.BAD_REQUEST, detail=error_msg) from e
+        if audio_file.size is not None and audio_file.size > max_bytes:
+            self._raise_audio_too_large(max_bytes)
+
+        logger.info("Received %s bytes of audio data...", audio_file.size)
+        return audio_file.file
+
+    @staticmethod
+    def _raise_audio_too_large(max_bytes: int) -> NoReturn:
+        """Reject an audio file larger than the configured maximum.
 
-        logger.info("Received audio data...")
-        reply = self.chatbot.send_audio(audio_data)
+        :param int max_bytes:
+            Maximum size of an audio file in bytes
+        :raise HTTPException:
+            Always, with the content too large status
+        """
+        error_msg = f"Audio file exceeds the maximum size of {max_bytes} bytes"
+        logger.error(error_msg)
+        raise HTTPException(status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE, detail=error_msg)
+
+    async def post_message_audio(self, request: Request) -> PostAudioResponse:
+        """Send an audio chat message."""
+        audio_data = await self._read_audio(request)
+        reply = await self._submit_chat_request(self.chatbot.send_audio, audio_data)
         logger.info("Audio response: %s", reply.message)
         return PostAudioResponse(
             message="Audio processed successfully",
             timestamp=PostAudioResponse.current_timestamp(),
             reply=reply,
         )
+
+    @staticmethod
+    def _multipart_header(boundary: str, media_type: str) -> bytes:
+        """Get the delimiter and headers starting a part of a multipart reply.
+
+        :param str boundary:
+            Boundary separating the parts
+        :param str media_type:
+            Media type of the part
+        :return bytes:
+            Delimiter and headers of the part
+        """
+        return f"\r\n--{boundary}\r\nContent-Type: {media_type}\r\n\r\n".encode()
+
+    async def _iter_multipart_reply(
+        self, boundary: str, reply: ChatbotMessage | asyncio.Future[ChatbotMessage], audio: Iterable[bytes]
+    ) -> AsyncIterator[bytes]:
+        """Yield a spoken reply as a JSON part with the reply and an audio part, then a JSON part for each error.
+
+        A reply which is already known is sent before the audio, otherwise it is sent once the audio ends.
+
+        :param str boundary:
+            Boundary separating the parts
+        :param ChatbotMessage | asyncio.Future[ChatbotMessage] reply:
+            Reply, or the future of the chat request generating it
+        :param Iterable[bytes] audio:
+            Audio chunks of the reply, synthesised in a worker thread
+        :return AsyncIterator[bytes]:
+            Body of the multipart reply
+        """
+        errors: list[str] = []
+        if isinstance(reply, ChatbotMessage):
+            yield self._multipart_header(boundary, JSON_MEDIA_TYPE) + reply.model_dump_json().encode()
+
+        yield self._multipart_header(boundary, self.chatbot.audio_mime_type)
+        try:
+            async for chunk in iterate_in_threadpool(iter(audio)):
+                yield chunk
+        except TTSError as e:
+            errors.append(f"Text-to-speech failed: {e}")
+
+        if isinstance(reply, asyncio.Future):
+            try:
+                message = await reply
+            except Exception as e:
+                errors.append(f"Failed to send audio to chatbot: {e}")
+            else:
+                yield self._multipart_header(boundary, JSON_MEDIA_TYPE) + message.model_dump_json().encode()
+
+        for error in errors:
+            yield self._multipart_header(boundary, JSON_MEDIA_TYPE) + json.dumps({"error": error}).encode()
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    def _multipart_response(
+        self, reply: ChatbotMessage | asyncio.Future[ChatbotMessage], audio: Iterable[bytes]
+    ) -> StreamingResponse:
+        """Create a streaming `multipart/mixed` response with a spoken reply.
+
+        :param ChatbotMessage | asyncio.Future[ChatbotMessage] reply:
+            Reply, or the future of the chat request generating it
+        :param Iterable[bytes] audio:
+            Audio chunks of the reply
+        :return StreamingResponse:
+            Response streaming the reply
+        """
+        boundary = uuid.uuid4().hex
+        return StreamingResponse(
+            self._iter_multipart_reply(boundary, reply, audio), media_type=f"multipart/mixed; boundary={boundary}"
+        )
+
+    async def post_message_audio_stream(self, request: Request) -> StreamingResponse:
+        """Send an audio chat message and stream the spoken reply as it is synthesised.
+
+        The body is `multipart/mixed`: the reply as JSON so the client can show it before the audio finishes, then the
+        audio, then a JSON part with an `error` if synthesis fails part way through.
+        """
+        audio_data = await self._read_audio(request)
+        reply, audio = await self._submit_chat_request(self.chatbot.send_audio_stream, audio_data)
+        logger.info("Streaming audio response: %s", reply.message)
+        return self._multipart_response(reply, audio)
+
+    async def post_message_audio_pipeline(self, request: Request) -> StreamingResponse:
+        """Send an audio chat message and stream the spoken reply while the model is still generating it.
+
+        Each sentence is spoken as soon as the model finishes it. The body is `multipart/mixed` as for the streaming
+        endpoint, but the JSON part with the reply follows the audio, so fallback replies which are not recorded in the
+        chat history reach the client too. Synthesis stops if the client disconnects. While the system is under heavy
+        load the audio part is empty, as decided by the load mode of the turn once it runs.
+        """
+        audio_data = await self._read_audio(request)
+        pipeline = self.chatbot.create_speech_pipeline()
+        reply = self._enqueue_chat_request(self.chatbot.send_audio_pipelined, audio_data, pipeline)
+        reply.add_done_callback(lambda future: self._on_pipelined_reply(future, pipeline))
+        return self._multipart_response(reply, self._iter_pipeline(pipeline))
+
+    @staticmethod
+    def _iter_pipeline(pipeline: SpeechPipeline) -> Generator[bytes]:
+        """Yield the audio of a speech pipeline, cancelling it if the response is closed before the audio ends.
+
+        :param SpeechPipeline pipeline:
+            Pipeline streaming the audio of the reply
+        :return Generator[bytes]:
+            Audio chunks in order
+        """
+        try:
+            yield from pipeline
+        finally:
+            pipeline.cancel()
+
+    @staticmethod
+    def _on_pipelined_reply(future: asyncio.Future[ChatbotMessage], pipeline: SpeechPipeline) -> None:
+        """End the audio of a pipelined reply, including when the request failed or was cancelled before it ran.
+
+        :param asyncio.Future[ChatbotMessage] future:
+            Future of the chat request
+        :param SpeechPipeline pipeline:
+            Pipeline streaming the audio of the reply
+        """
+        pipeline.close()
+        if future.cancelled():
+            return
+        if error := future.exception():
+            logger.error("Pipelined audio request failed: %s", error)
+        else:
+            logger.info("Pipelined audio response: %s", future.result().message)
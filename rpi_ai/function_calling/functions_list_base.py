@@ -1,16 +1,54 @@
 """Base class for function lists in the RPi AI application."""
 
+import threading
+import time
 from abc import ABC, abstractmethod
-from collections.abc import Callable, Iterator
+from collections.abc import Callable, Hashable, Iterator
+from functools import wraps
+from typing import Any, ClassVar
+
+from google.genai.types import FunctionDeclaration
+
+from rpi_ai.metrics import TOOL_CACHE_REQUESTS
+
+
+def compile_declarations(functions: list[Callable]) -> list[FunctionDeclaration]:
+    """Build the function declarations sent to the model from the signatures and docstrings of functions.
+
+    :param list[Callable] functions:
+        Functions the model may call
+    :return list[FunctionDeclaration]:
+        Function declaration for each function
+    """
+    return [
+        FunctionDeclaration.from_callable_with_api_option(callable=function, use_json_schema=True)
+        for function in functions
+    ]
 
 
 class FunctionsListBase(ABC):
-    """Abstract base class for function lists."""
+    """Abstract base class for function lists.
+
+    Results of the functions named in `CACHE_TTLS` are cached for the given number of seconds. Use `math.inf` for
+    values which never change at runtime. The function declarations are compiled once, so starting a chat does not
+    introspect the functions again.
+    """
+
+    CACHE_TTLS: ClassVar[dict[str, float]] = {}
 
     def __init__(self) -> None:
         """Initialise the function list."""
         self.functions: list[Callable] = []
+        self._cache: dict[Hashable, tuple[float, Any]] = {}
+        self._cache_lock = threading.Lock()
         self.setup_functions()
+        self.functions = [
+            self._cached(function, self.CACHE_TTLS[function.__name__])
+            if function.__name__ in self.CACHE_TTLS
+            else function
+            for function in self.functions
+        ]
+        self.declarations = compile_declarations(self.functions)
 
     def __iter__(self) -> Iterator[Callable]:
         """Make the class iterable so list() returns the functions attribute.
@@ -24,3 +62,47 @@ class FunctionsListBase(ABC):
     def setup_functions(self) -> None:
         """Set up the functions list."""
         pass
+
+    def clear_cache(self) -> None:
+        """Remove all cached function results."""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _cached(self, function: Callable, ttl: float) -> Callable:
+        """Wrap a function so its results are cached for a number of seconds.
+
+        :param Callable function:
+            Function to wrap
+        :param float ttl:
+            Seconds a result stays valid, or `math.inf` to cache it forever
+        :return Callable:
+            Wrapped function with the same name, signature and docstring
+        """
+        name = function.__name__
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return function(*args, **kwargs)
+
+            now = time.monotonic()
+            with self._cache_lock:
+                entry = self._cache.get(key)
+                if entry is not None and now >= entry[0]:
+                    del self._cache[key]
+                    entry = None
+
+            if entry is not None:
+                TOOL_CACHE_REQUESTS.inc(tool=name, result="hit")
+                return entry[1]
+
+            TOOL_CACHE_REQUESTS.inc(tool=name, result="miss")
+            result = function(*args, **kwargs)
+            with self._cache_lock:
+                self._cache[key] = (time.monotonic() + ttl, result)
+            return result
+
+        return wrapper
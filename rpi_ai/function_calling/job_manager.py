@@ -0,0 +1,401 @@
+"""Background job management for long-running tool commands in the RPi AI application."""
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, wait
+from typing import Any
+
+from rpi_ai.models import JobConfig, JobInfo, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Seconds a stopped command is given to exit after SIGTERM before its process group is killed
+STOP_GRACE_SECONDS = 5.0
+
+
+class Job:
+    """State of a background job running a sequence of commands."""
+
+    def __init__(
+        self, name: str, commands: list[list[str]], timeout: float, max_output_lines: int, *, exclusive: bool = False
+    ) -> None:
+        """Initialise the job.
+
+        :param str name:
+            Job name
+        :param list[list[str]] commands:
+            Commands run in order, stopping at the first failure
+        :param float timeout:
+            Seconds before the job is stopped
+        :param int max_output_lines:
+            Number of output lines kept for each stream
+        :param bool exclusive:
+            Whether the job waits for other exclusive jobs to finish before it runs
+        """
+        self.job_id = uuid.uuid4().hex[:8]
+        self.name = name
+        self.commands = commands
+        self.timeout = timeout
+        self.exclusive = exclusive
+        self.status = JobStatus.PENDING
+        self.created_at = int(time.time())
+        self.finished_at: int | None = None
+        self.return_code: int | None = None
+        self.stdout: deque[str] = deque(maxlen=max_output_lines)
+        self.stderr: deque[str] = deque(maxlen=max_output_lines)
+        self.truncated = False
+        self.future: Future[None] | None = None
+        self.task: asyncio.Task[None] | None = None
+        self.cancel_requested = False
+
+    @property
+    def is_finished(self) -> bool:
+        """Check whether the job has finished."""
+        return self.status not in (JobStatus.PENDING, JobStatus.RUNNING)
+
+    def finish(self, status: JobStatus) -> None:
+        """Mark the job as finished.
+
+        :param JobStatus status:
+            Final job status
+        """
+        self.status = status
+        self.finished_at = int(time.time())
+
+    def info(self) -> JobInfo:
+        """Get a snapshot of the job.
+
+        :return JobInfo:
+            Job information including the captured output
+        """
+        return JobInfo(
+            job_id=self.job_id,
+            name=self.name,
+            status=self.status,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            return_code=self.return_code,
+            stdout="\n".join(list(self.stdout)),
+            stderr="\n".join(list(self.stderr)),
+            truncated=self.truncated,
+        )
+
+
+class JobManager:
+    """Run commands as background jobs on a dedicated event loop thread.
+
+    Exclusive jobs, such as package manager commands which would otherwise fight over the dpkg lock, run one at a time
+    in the order they were submitted.
+    """
+
+    def __init__(self, config: JobConfig | None = None) -> None:
+        """Initialise the job manager.
+
+        :param JobConfig | None config:
+            Job configuration, or None to use the defaults
+        """
+        self.config = config or JobConfig()
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._tasks: set[asyncio.Task[Any]] = set()
+        self._exclusive_lock: asyncio.Lock | None = None
+
+    def update_config(self, config: JobConfig) -> None:
+        """Update the job configuration used for new jobs.
+
+        :param JobConfig config:
+            New job configuration
+        """
+        self.config = config
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the event loop running the jobs, starting it if needed.
+
+        :return asyncio.AbstractEventLoop:
+            Running event loop
+        """
+        with self._lock:
+            if self._loop is None or self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._exclusive_lock = asyncio.Lock()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="jobs", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _prune(self) -> None:
+        """Remove the oldest finished jobs beyond the configured limit."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[: max(0, len(finished) - self.config.max_jobs)]:
+            del self._jobs[job_id]
+
+    def submit(
+        self,
+        name: str,
+        commands: list[list[str]],
+        timeout: float | None = None,
+        max_output_lines: int | None = None,
+        *,
+        exclusive: bool = False,
+    ) -> JobInfo:
+        """Start a background job.
+
+        :param str name:
+            Job name
+        :param list[list[str]] commands:
+            Commands run in order, stopping at the first failure
+        :param float | None timeout:
+            Seconds before the job is stopped, or None to use the configured timeout
+        :param int | None max_output_lines:
+            Number of output lines kept for each stream, or None to use the configured limit
+        :param bool exclusive:
+            Whether to wait for other exclusive jobs to finish before running, the timeout starts once the job runs
+        :return JobInfo:
+            Information about the started job
+        """
+        job = Job(
+            name,
+            commands,
+            timeout or self.config.timeout,
+            max_output_lines or self.config.max_output_lines,
+            exclusive=exclusive,
+        )
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        job.future = asyncio.run_coroutine_threadsafe(self._run(job), self._ensure_loop())
+        job.future.add_done_callback(lambda future: self._on_done(job, future))
+        logger.info("Started job %s (%s).", job.job_id, name)
+        return job.info()
+
+    def get(self, job_id: str) -> JobInfo | None:
+        """Get a background job.
+
+        :param str job_id:
+            Job ID
+        :return JobInfo | None:
+            Job information, or None if the job does not exist
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.info() if job else None
+
+    def list_jobs(self) -> list[JobInfo]:
+        """Get all background jobs, oldest first.
+
+        :return list[JobInfo]:
+            Job information for each job
+        """
+        with self._lock:
+            return [job.info() for job in self._jobs.values()]
+
+    def wait(self, job_id: str, timeout: float | None = None) -> JobInfo | None:
+        """Wait for a background job to finish.
+
+        :param str job_id:
+            Job ID
+        :param float | None timeout:
+            Maximum number of seconds to wait, or None to wait until the job finishes
+        :return JobInfo | None:
+            Job information, or None if the job does not exist
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job.future:
+            wait([job.future], timeout=timeout)
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> JobInfo | None:
+        """Cancel a background job, stopping its running command.
+
+        The job is reported as cancelled once its command has exited.
+
+        :param str job_id:
+            Job ID
+        :return JobInfo | None:
+            Job information, or None if the job does not exist
+        """
+        with self._lock:
+            job, loop = self._jobs.get(job_id), self._loop
+        if job is None:
+            return None
+        if loop is not None and not job.is_finished:
+            loop.call_soon_threadsafe(self._cancel, job)
+            logger.info("Cancelling job %s.", job_id)
+        return self.get(job_id)
+
+    @staticmethod
+    def _cancel(job: Job) -> None:
+        """Cancel the task running a job on the event loop, or stop the job from starting if it has no task yet.
+
+        Cancelling the task rather than its future leaves the future pending until the command has been stopped.
+
+        :param Job job:
+            Job to cancel
+        """
+        if job.task is None:
+            job.cancel_requested = True
+        elif not job.task.cancelling():
+            job.task.cancel()
+
+    def shutdown(self) -> None:
+        """Cancel all running jobs and stop the event loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or thread is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(self._cancel_all(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    async def _cancel_all(self) -> None:
+        """Cancel the running jobs and wait for their commands to be stopped."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            if not task.cancelling():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _on_done(job: Job, future: Future[None]) -> None:
+        """Mark a job as cancelled if it was cancelled before it started running.
+
+        :param Job job:
+            Job which has completed
+        :param Future[None] future:
+            Future of the job
+        """
+        if future.cancelled() and not job.is_finished:
+            job.finish(JobStatus.CANCELLED)
+
+    async def _stream(self, job: Job, reader: asyncio.StreamReader | None, lines: deque[str]) -> None:
+        """Capture the lines of an output stream as they are written.
+
+        :param Job job:
+            Job the stream belongs to
+        :param asyncio.StreamReader | None reader:
+            Output stream of the process
+        :param deque[str] lines:
+            Bounded buffer to capture the lines into
+        """
+        if reader is None:
+            return
+        async for line in reader:
+            with self._lock:
+                if len(lines) == lines.maxlen:
+                    job.truncated = True
+                lines.append(line.decode(errors="replace").rstrip())
+
+    @staticmethod
+    async def _stop_process(process: asyncio.subprocess.Process) -> None:
+        """Stop the process group of a command, including any children it started, and wait for it to exit.
+
+        The group is sent SIGTERM first, which sudo relays to the command it runs as root, then SIGKILL if it has not
+        exited within the grace period.
+
+        :param asyncio.subprocess.Process process:
+            Process leading the process group
+        """
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            with contextlib.suppress(ProcessLookupError, PermissionError):
+                os.killpg(process.pid, sig)
+            with contextlib.suppress(TimeoutError):
+                async with asyncio.timeout(STOP_GRACE_SECONDS if sig == signal.SIGTERM else None):
+                    await process.communicate()
+                    return
+
+    async def _run_command(self, job: Job, command: list[str]) -> int:
+        """Run a command and capture its output.
+
+        :param Job job:
+            Job running the command
+        :param list[str] command:
+            Command and its arguments
+        :return int:
+            Return code of the command
+        """
+        # Shield process creation so a cancellation arriving mid-spawn still reaches the stop below. Each command
+        # leads its own process group so the commands it starts, such as apt under sudo, are stopped with it.
+        spawn = asyncio.ensure_future(
+            asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=True
+            )
+        )
+        try:
+            process = await asyncio.shield(spawn)
+        except asyncio.CancelledError:
+            await self._stop_process(await spawn)
+            raise
+
+        streams = [
+            asyncio.ensure_future(self._stream(job, process.stdout, job.stdout)),
+            asyncio.ensure_future(self._stream(job, process.stderr, job.stderr)),
+        ]
+        try:
+            await asyncio.gather(*streams)
+            return await process.wait()
+        finally:
+            # A failed stream does not stop the other, which must finish reading before the process is stopped
+            for stream in streams:
+                stream.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+            if process.returncode is None:
+                await self._stop_process(process)
+
+    async def _run(self, job: Job) -> None:
+        """Run the commands of a job until one fails, the job times out or it is cancelled.
+
+        :param Job job:
+            Job to run
+        """
+        task = asyncio.current_task()
+        if task:
+            self._tasks.add(task)
+            job.task = task
+        try:
+            if job.cancel_requested:
+                raise asyncio.CancelledError  # noqa: TRY301
+            exclusive = self._exclusive_lock if job.exclusive and self._exclusive_lock else contextlib.nullcontext()
+            async with exclusive:
+                job.status = JobStatus.RUNNING
+                async with asyncio.timeout(job.timeout):
+                    for command in job.commands:
+                        job.return_code = await self._run_command(job, command)
+                        if job.return_code != 0:
+                            break
+        except TimeoutError:
+            logger.warning("Job %s timed out after %s seconds.", job.job_id, job.timeout)
+            job.finish(JobStatus.TIMED_OUT)
+        except asyncio.CancelledError:
+            logger.info("Job %s cancelled.", job.job_id)
+            job.finish(JobStatus.CANCELLED)
+        except OSError as e:
+            logger.exception("Job %s failed to start.", job.job_id)
+            job.stderr.append(str(e))
+            job.finish(JobStatus.FAILED)
+        except ValueError as e:
+            # The stream reader raises ValueError for an output line longer than its buffer limit
+            logger.exception("Job %s output could not be read.", job.job_id)
+            job.stderr.append(str(e))
+            job.finish(JobStatus.FAILED)
+        else:
+            job.finish(JobStatus.SUCCEEDED if job.return_code == 0 else JobStatus.FAILED)
+        finally:
+            if task:
+                self._tasks.discard(task)
+
+
+JOBS = JobManager()
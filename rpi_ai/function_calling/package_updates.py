@@ -0,0 +1,177 @@
+"""Scheduled package update checks for the RPi AI application."""
+
+import logging
+import re
+import threading
+
+from rpi_ai.function_calling.job_manager import JOBS
+from rpi_ai.models import JobStatus, PackageUpdateStatus, UpgradablePackage
+
+logger = logging.getLogger(__name__)
+
+LOW_PRIORITY_PREFIX = ["/usr/bin/nice", "-n", "19", "/usr/bin/ionice", "-c", "3"]
+MAX_OUTPUT_LINES = 5000
+UPGRADABLE_PATTERN = re.compile(
+    r"^(?P<name>[^/\s]+)/(?P<source>\S+)\s+(?P<version>\S+)\s+(?P<architecture>\S+)\s+"
+    r"\[upgradable from: (?P<current_version>[^\]]+)\]"
+)
+
+
+class PackageUpdateScheduler:
+    """Refresh the package index and the list of upgradable packages periodically in a background thread.
+
+    Tools answer from the result of the last refresh instead of running `apt update` against the mirrors while the
+    user waits.
+    """
+
+    def __init__(self, interval: float = 21600.0, *, low_priority: bool = True) -> None:
+        """Initialise the package update scheduler.
+
+        :param float interval:
+            Seconds between refreshes
+        :param bool low_priority:
+            Whether to run the refresh commands with idle CPU and I/O priority
+        """
+        self.interval = interval
+        self.low_priority = low_priority
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._periodic = False
+        self._status = PackageUpdateStatus()
+
+    @property
+    def is_running(self) -> bool:
+        """Check whether the scheduler thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def is_scheduled(self) -> bool:
+        """Check whether the thread refreshing periodically is running, rather than a single requested refresh."""
+        return self._periodic and self.is_running
+
+    @property
+    def status(self) -> PackageUpdateStatus:
+        """Get a copy of the result of the last refresh."""
+        with self._lock:
+            return self._status.model_copy(deep=True)
+
+    @property
+    def commands(self) -> list[list[str]]:
+        """Get the commands which refresh the package index and list the upgradable packages."""
+        prefix = LOW_PRIORITY_PREFIX if self.low_priority else []
+        return [
+            [*prefix, "/usr/bin/sudo", "/usr/bin/apt", "update"],
+            [*prefix, "/usr/bin/sudo", "/usr/bin/apt", "list", "--upgradable"],
+        ]
+
+    @staticmethod
+    def parse_upgradable(output: str) -> list[UpgradablePackage]:
+        """Parse the output of `apt list --upgradable`.
+
+        :param str output:
+            Command output
+        :return list[UpgradablePackage]:
+            Packages with an available update
+        """
+        return [
+            UpgradablePackage(**match.groupdict())
+            for line in output.splitlines()
+            if (match := UPGRADABLE_PATTERN.match(line.strip()))
+        ]
+
+    def refresh(self) -> PackageUpdateStatus:
+        """Refresh the package index and the list of upgradable packages, waiting for the commands to finish.
+
+        :return PackageUpdateStatus:
+            Result of the refresh
+        """
+        with self._lock:
+            self._status.refreshing = True
+        try:
+            job = JOBS.submit(
+                "refresh_package_updates", self.commands, max_output_lines=MAX_OUTPUT_LINES, exclusive=True
+            )
+            with self._lock:
+                self._status.job_id = job.job_id
+
+            job = JOBS.wait(job.job_id) or job
+            with self._lock:
+                if job.status == JobStatus.SUCCEEDED:
+                    self._status = PackageUpdateStatus(
+                        checked_at=job.finished_at, packages=self.parse_upgradable(job.stdout), job_id=job.job_id
+                    )
+                    logger.info("Found %d upgradable packages.", len(self._status.packages))
+                else:
+                    error_lines = job.stderr.splitlines()
+                    self._status.error = f"Package update check {job.status}" + (
+                        f": {error_lines[-1]}" if error_lines else "."
+                    )
+                    logger.warning(self._status.error)
+        finally:
+            with self._lock:
+                self._status.refreshing = False
+        return self.status
+
+    def request_refresh(self) -> None:
+        """Start a refresh now unless one is already in progress or the thread of the last one is still finishing."""
+        with self._lock:
+            if self._status.refreshing:
+                return
+            if self.is_scheduled:
+                self._status.refreshing = True
+                self._refresh_event.set()
+                return
+            if self.is_running:
+                return
+            self._status.refreshing = True
+            self._thread = threading.Thread(target=self.refresh, name="package-updates", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Refresh the package update status periodically until the scheduler is stopped."""
+        while not self._stop_event.is_set():
+            self._refresh_event.clear()
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Failed to check for package updates.")
+            self._refresh_event.wait(self.interval)
+
+    def start(self, interval: float | None = None, *, low_priority: bool | None = None) -> None:
+        """Start refreshing in a background thread, beginning with an immediate refresh.
+
+        :param float | None interval:
+            Seconds between refreshes, or None to keep the current interval
+        :param bool | None low_priority:
+            Whether to run the refresh commands with idle CPU and I/O priority, or None to keep the current setting
+        """
+        self.stop()
+        self.interval = interval or self.interval
+        self.low_priority = self.low_priority if low_priority is None else low_priority
+        self._stop_event.clear()
+        with self._lock:
+            self._periodic = True
+            self._thread = threading.Thread(target=self._run, name="package-updates", daemon=True)
+            self._thread.start()
+        logger.info("Started package update checks every %s seconds.", self.interval)
+
+    def stop(self) -> None:
+        """Stop the scheduler thread, cancelling a refresh in progress."""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        self._stop_event.set()
+        self._refresh_event.set()
+        status = self.status
+        if status.refreshing and status.job_id:
+            JOBS.cancel(status.job_id)
+        thread.join()
+        with self._lock:
+            self._periodic = False
+            self._thread = None
+
+
+PACKAGE_UPDATES = PackageUpdateScheduler()
@@ -1,27 +1,62 @@
 """System information functions for the RPi AI application."""
 
 import logging
+import math
 import platform
 import socket
-import subprocess
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Any, ClassVar
 
+import numpy as np
 import psutil
 
 from rpi_ai.function_calling.functions_list_base import FunctionsListBase
+from rpi_ai.function_calling.job_manager import JOBS
+from rpi_ai.function_calling.package_updates import PACKAGE_UPDATES
+from rpi_ai.function_calling.telemetry import (
+    DISK_IO_FIELDS,
+    HISTORY_FIELDS,
+    MEMORY_FIELDS,
+    NET_IO_FIELDS,
+    PROCESS_FIELDS,
+    TELEMETRY,
+)
 
 logger = logging.getLogger(__name__)
 
+HISTORY_METRICS = HISTORY_FIELDS[1:]
+PROCESS_SORT_KEYS = ("cpu_percent", "memory_percent")
+MAX_PROCESSES = 50
+SNAPSHOT_FUNCTIONS = {
+    "cpu_percent": "get_cpu_percent",
+    "memory": "get_memory_usage",
+    "disk": "get_disk_usage",
+    "temperature": "get_temperature",
+    "uptime": "get_uptime",
+    "io_throughput": "get_io_throughput",
+}
+SNAPSHOT_EXECUTOR = ThreadPoolExecutor(max_workers=len(SNAPSHOT_FUNCTIONS), thread_name_prefix="snapshot")
+
 
 class SystemInfo(FunctionsListBase):
     """System information functions for monitoring system state."""
 
+    CACHE_TTLS: ClassVar[dict[str, float]] = {
+        "get_os_info": math.inf,
+        "get_hostname": math.inf,
+        "get_disk_usage": 30.0,
+    }
+
     def setup_functions(self) -> None:
         """Set up system information functions."""
         self.functions = [
             SystemInfo.update_and_check_packages,
             SystemInfo.upgrade_packages,
             SystemInfo.auto_remove_packages,
+            SystemInfo.get_job_status,
+            SystemInfo.cancel_job,
             SystemInfo.get_os_info,
             SystemInfo.get_hostname,
             SystemInfo.get_uptime,
@@ -30,66 +65,80 @@ class SystemInfo(FunctionsListBase):
             SystemInfo.get_cpu_percent,
             SystemInfo.get_memory_usage,
             SystemInfo.get_disk_usage,
+            SystemInfo.get_io_throughput,
             SystemInfo.get_temperature,
+            self.get_system_snapshot,
+            SystemInfo.get_metric_history,
+            SystemInfo.get_metric_summary,
         ]
 
     @staticmethod
-    def update_and_check_packages() -> dict:
-        """Update the list of installed packages and check for updated packages.
+    def update_and_check_packages(*, refresh: bool = False) -> dict:
+        """Get the packages with available updates from the last scheduled check.
 
-        `sudo apt update` and `sudo apt list --upgradable`
+        The package list is refreshed periodically in the background with `sudo apt update` and
+        `sudo apt list --upgradable`.
 
+        :param bool refresh:
+            Whether to start a new check now, only when the user explicitly asks for the latest package list
         :return dict:
-            The output of the package check command
+            The time of the last check, the upgradable packages and whether a check is in progress
         """
-        try:
-            subprocess.run(["/usr/bin/sudo", "/usr/bin/apt", "update"], capture_output=True, text=True, check=True)
-            result = subprocess.run(
-                ["/usr/bin/sudo", "/usr/bin/apt", "list", "--upgradable"], capture_output=True, text=True, check=True
-            )
-        except subprocess.CalledProcessError as e:
-            logger.exception("Failed to update packages list: %s", e.stderr)
-            return {"stdout": e.output, "stderr": e.stderr}
-        else:
-            return {"stdout": result.stdout, "stderr": result.stderr}
+        if refresh:
+            PACKAGE_UPDATES.request_refresh()
+        return PACKAGE_UPDATES.status.model_dump(mode="json")
 
     @staticmethod
     def upgrade_packages() -> dict:
-        """Upgrade all packages.
+        """Start a background job which upgrades all packages.
 
         `sudo apt upgrade -y`
 
         :return dict:
-            The output of the package upgrade command
+            The started job, use get_job_status with its job_id to get the output once it has finished
         """
-        try:
-            result = subprocess.run(
-                ["/usr/bin/sudo", "/usr/bin/apt", "upgrade", "-y"], capture_output=True, text=True, check=True
-            )
-        except subprocess.CalledProcessError as e:
-            logger.exception("Failed to upgrade packages: %s", e.stderr)
-            return {"stdout": e.output, "stderr": e.stderr}
-        else:
-            return {"stdout": result.stdout, "stderr": result.stderr}
+        return JOBS.submit(
+            "upgrade_packages", [["/usr/bin/sudo", "/usr/bin/apt", "upgrade", "-y"]], exclusive=True
+        ).model_dump(mode="json")
 
     @staticmethod
     def auto_remove_packages() -> dict:
-        """Remove unused packages.
+        """Start a background job which removes unused packages.
 
         `sudo apt autoremove -y`
 
         :return dict:
-            The output of the package autoremove command
+            The started job, use get_job_status with its job_id to get the output once it has finished
         """
-        try:
-            result = subprocess.run(
-                ["/usr/bin/sudo", "/usr/bin/apt", "autoremove", "-y"], capture_output=True, text=True, check=True
-            )
-        except subprocess.CalledProcessError as e:
-            logger.exception("Failed to remove unused packages: %s", e.stderr)
-            return {"stdout": e.output, "stderr": e.stderr}
-        else:
-            return {"stdout": result.stdout, "stderr": result.stderr}
+        return JOBS.submit(
+            "auto_remove_packages", [["/usr/bin/sudo", "/usr/bin/apt", "autoremove", "-y"]], exclusive=True
+        ).model_dump(mode="json")
+
+    @staticmethod
+    def get_job_status(job_id: str) -> dict:
+        """Get the status and output of a background job.
+
+        :param str job_id:
+            The job ID
+        :return dict:
+            The job status, return code and the most recent output lines
+        """
+        if (job := JOBS.get(job_id)) is None:
+            return {"error": f"No job found with ID {job_id}."}
+        return job.model_dump(mode="json")
+
+    @staticmethod
+    def cancel_job(job_id: str) -> dict:
+        """Cancel a running background job.
+
+        :param str job_id:
+            The job ID
+        :return dict:
+            The job status after cancelling it
+        """
+        if (job := JOBS.cancel(job_id)) is None:
+            return {"error": f"No job found with ID {job_id}."}
+        return job.model_dump(mode="json")
 
     @staticmethod
     def get_os_info() -> dict:
@@ -127,13 +176,50 @@ class SystemInfo(FunctionsListBase):
         return str(datetime.now() - boot_time)
 
     @staticmethod
-    def get_running_processes() -> dict:
-        """Get the running processes.
-
+    def get_running_processes(
+        name: str = "", username: str = "", sort_by: str = "cpu_percent", limit: int = 10, offset: int = 0
+    ) -> dict:
+        """Get the running processes using the most CPU or memory, optionally filtered by name or user.
+
+        :param str name:
+            Only include processes whose name contains this text, ignoring case
+        :param str username:
+            Only include processes run by this user
+        :param str sort_by:
+            The usage to sort by, highest first: cpu_percent or memory_percent
+        :param int limit:
+            The maximum number of processes to return, up to 50
+        :param int offset:
+            The number of matching processes to skip, to get the next page
         :return dict:
-            A dictionary of running processes with PID as keys
+            A dictionary containing the number of matching processes and the requested page of processes
         """
-        return {p.pid: p.info for p in psutil.process_iter(["pid", "name", "username"])}
+        if sort_by not in PROCESS_SORT_KEYS:
+            return {"error": f"Unknown sort key {sort_by}, expected one of: {', '.join(PROCESS_SORT_KEYS)}."}
+
+        if (processes := TELEMETRY.processes()) is None:
+            processes = [process.info for process in psutil.process_iter(PROCESS_FIELDS)]
+
+        matches = [
+            process
+            for process in processes
+            if name.lower() in (process["name"] or "").lower() and (not username or process["username"] == username)
+        ]
+        matches.sort(key=lambda process: process[sort_by] or 0.0, reverse=True)
+        offset = max(0, int(offset))
+        page = matches[offset : offset + max(1, min(int(limit), MAX_PROCESSES))]
+        return {
+            "total": len(matches),
+            "offset": offset,
+            "processes": [
+                {
+                    **process,
+                    "cpu_percent": round(process["cpu_percent"] or 0.0, 1),
+                    "memory_percent": round(process["memory_percent"] or 0.0, 1),
+                }
+                for process in page
+            ],
+        }
 
     @staticmethod
     def get_process_name_by_pid(pid: int) -> str:
@@ -159,6 +245,8 @@ class SystemInfo(FunctionsListBase):
         :return float:
             The CPU usage percentage
         """
+        if (cpu_percent := TELEMETRY.latest("cpu_percent")) is not None:
+            return float(cpu_percent.mean())
         return float(psutil.cpu_percent(interval=1))
 
     @staticmethod
@@ -168,6 +256,12 @@ class SystemInfo(FunctionsListBase):
         :return dict:
             A dictionary containing memory usage information
         """
+        if (memory := TELEMETRY.latest("memory")) is not None:
+            return {
+                field: float(value) if field == "percent" else int(value)
+                for field, value in zip(MEMORY_FIELDS, memory, strict=True)
+            }
+
         virtual_memory = psutil.virtual_memory()
         return {
             "total": virtual_memory.total,
@@ -191,6 +285,24 @@ class SystemInfo(FunctionsListBase):
             "percent": disk_usage.percent,
         }
 
+    @staticmethod
+    def get_io_throughput() -> dict:
+        """Get the disk and network throughput in bytes per second.
+
+        :return dict:
+            A dictionary containing disk and network throughput, or an error if no samples are available
+        """
+        disk_rates = TELEMETRY.rates("disk_io")
+        net_rates = TELEMETRY.rates("net_io")
+        if disk_rates is None or net_rates is None:
+            return {"error": "System telemetry is not available yet."}
+        return {
+            **{f"disk_{field}_per_second": float(rate) for field, rate in zip(DISK_IO_FIELDS, disk_rates, strict=True)},
+            **{
+                f"network_{field}_per_second": float(rate) for field, rate in zip(NET_IO_FIELDS, net_rates, strict=True)
+            },
+        }
+
     @staticmethod
     def get_temperature() -> float | None:
         """Get the CPU temperature in degrees Celsius.
@@ -198,8 +310,91 @@ class SystemInfo(FunctionsListBase):
         :return float | None:
             The CPU temperature in degrees Celsius or None if unavailable
         """
+        if (temperature := TELEMETRY.latest("temperature")) is not None and not np.isnan(temperature[0]):
+            return float(temperature[0])
+
         try:
             return float(psutil.sensors_temperatures()["cpu_thermal"][0].current)
         except (TypeError, KeyError, IndexError, AttributeError):
             logger.exception("Failed to get CPU temperature.")
             return None
+
+    def get_system_snapshot(self, fields: list[str] | None = None) -> dict:
+        """Get the CPU, memory, disk, temperature, uptime and I/O throughput of the system in one call.
+
+        :param list[str] | None fields:
+            The fields to include: cpu_percent, memory, disk, temperature, uptime or io_throughput, or None for all
+        :return dict:
+            A dictionary containing the value of each requested field
+        """
+        fields = list(fields or SNAPSHOT_FUNCTIONS)
+        if unknown := [field for field in fields if field not in SNAPSHOT_FUNCTIONS]:
+            return {"error": f"Unknown fields {', '.join(unknown)}, expected any of: {', '.join(SNAPSHOT_FUNCTIONS)}."}
+
+        # Gather through the listed functions so fields with a cache TTL are answered from the cache
+        functions: dict[str, Callable[[], Any]] = {function.__name__: function for function in self.functions}
+        futures = {field: SNAPSHOT_EXECUTOR.submit(functions[SNAPSHOT_FUNCTIONS[field]]) for field in fields}
+
+        snapshot: dict[str, Any] = {}
+        for field, future in futures.items():
+            try:
+                snapshot[field] = future.result()
+            except Exception as e:
+                logger.exception("Failed to get system snapshot field %s.", field)
+                snapshot[field] = {"error": str(e)}
+        return snapshot
+
+    @staticmethod
+    def get_metric_history(metric: str, hours: float = 24.0, points: int = 24) -> dict:
+        """Get the history of a system metric as a downsampled time series.
+
+        :param str metric:
+            The metric name: cpu_percent, memory_percent, temperature or disk_percent
+        :param float hours:
+            The number of hours to look back
+        :param int points:
+            The maximum number of points in the time series
+        :return dict:
+            A dictionary containing the average value of the metric for each time period
+        """
+        if metric not in HISTORY_METRICS:
+            return {"error": f"Unknown metric {metric}, expected one of: {', '.join(HISTORY_METRICS)}."}
+        if (history := TELEMETRY.history) is None:
+            return {"error": "System metrics history is not available."}
+
+        end = datetime.now().timestamp()
+        series = history.series(metric, end - float(hours) * 3600, end, max(1, int(points)))
+        return {
+            "metric": metric,
+            "series": [
+                {"time": datetime.fromtimestamp(timestamp).isoformat(timespec="minutes"), "value": round(value, 2)}
+                for timestamp, value in series
+            ],
+        }
+
+    @staticmethod
+    def get_metric_summary(metric: str, hours: float = 1.0) -> dict:
+        """Get the minimum, maximum, mean and 95th percentile of a system metric over a time window.
+
+        :param str metric:
+            The metric name: cpu_percent, memory_percent, temperature or disk_percent
+        :param float hours:
+            The number of hours to look back
+        :return dict:
+            A dictionary containing the aggregated values of the metric
+        """
+        if metric not in HISTORY_METRICS:
+            return {"error": f"Unknown metric {metric}, expected one of: {', '.join(HISTORY_METRICS)}."}
+        if (history := TELEMETRY.history) is None:
+            return {"error": "System metrics history is not available."}
+
+        end = datetime.now().timestamp()
+        start = end - float(hours) * 3600
+        if (summary := history.summary(metric, start, end)) is None:
+            return {"error": f"No {metric} history recorded in the last {hours} hours."}
+        return {
+            "metric": metric,
+            "start": datetime.fromtimestamp(start).isoformat(timespec="minutes"),
+            "end": datetime.fromtimestamp(end).isoformat(timespec="minutes"),
+            **summary,
+        }
@@ -0,0 +1,418 @@
+"""Background system telemetry sampling for the RPi AI application."""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import psutil
+
+logger = logging.getLogger(__name__)
+
+MEMORY_FIELDS = ("total", "available", "used", "percent")
+DISK_IO_FIELDS = ("read_bytes", "write_bytes")
+NET_IO_FIELDS = ("bytes_sent", "bytes_recv")
+HISTORY_FIELDS = ("timestamp", "cpu_percent", "memory_percent", "temperature", "disk_percent")
+PROCESS_FIELDS = ("pid", "name", "username", "cpu_percent", "memory_percent")
+
+
+class RingBuffer:
+    """Fixed-size ring buffer of float samples."""
+
+    def __init__(self, size: int, width: int) -> None:
+        """Initialise the ring buffer.
+
+        :param int size:
+            Maximum number of samples kept
+        :param int width:
+            Number of values in each sample
+        """
+        self._data = np.full((size, width), np.nan)
+        self._index = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Get the number of samples in the buffer."""
+        return self._count
+
+    def append(self, values: list[float]) -> None:
+        """Append a sample, overwriting the oldest one when the buffer is full.
+
+        :param list[float] values:
+            Sample values
+        """
+        self._data[self._index] = values
+        self._index = (self._index + 1) % len(self._data)
+        self._count = min(self._count + 1, len(self._data))
+
+    def last(self, n: int = 1) -> np.ndarray:
+        """Get the most recent samples, oldest first.
+
+        :param int n:
+            Number of samples
+        :return np.ndarray:
+            Copy of up to n samples with shape (samples, width)
+        """
+        n = min(n, self._count)
+        indices = (self._index - n + np.arange(n)) % len(self._data)
+        return self._data[indices].copy()
+
+
+class TelemetryHistory:
+    """Circular store of telemetry history in a memory-mapped file which survives restarts.
+
+    Each row holds a wall-clock timestamp followed by the values in `HISTORY_FIELDS`. The file has a fixed number of
+    rows so its size is capped, and the oldest rows are overwritten once it is full.
+    """
+
+    def __init__(self, filepath: Path, capacity: int) -> None:
+        """Open the history file, creating it if needed.
+
+        :param Path filepath:
+            Path to the history file
+        :param int capacity:
+            Maximum number of rows kept
+        """
+        self.filepath = filepath
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._data = self._open()
+        timestamps = self._data[:, 0]
+        self._index = 0 if np.isnan(timestamps).all() else (int(np.nanargmax(timestamps)) + 1) % capacity
+
+    def _open(self) -> np.memmap:
+        """Open the memory-mapped history file, keeping the newest rows if its capacity changed.
+
+        :return np.memmap:
+            Memory-mapped history rows
+        """
+        existing: np.ndarray | None = None
+        if self.filepath.exists():
+            try:
+                data: np.memmap = np.load(self.filepath, mmap_mode="r+")
+                if data.shape == (self.capacity, len(HISTORY_FIELDS)):
+                    return data
+                existing = np.array(data)
+                logger.info("Resizing telemetry history from %d to %d rows.", len(data), self.capacity)
+            except (OSError, ValueError):
+                logger.exception("Failed to load telemetry history, starting a new one.")
+
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        data = np.lib.format.open_memmap(
+            self.filepath, mode="w+", dtype=np.float64, shape=(self.capacity, len(HISTORY_FIELDS))
+        )
+        data[:] = np.nan
+        if existing is not None and existing.ndim == 2 and existing.shape[1] == len(HISTORY_FIELDS):  # noqa: PLR2004
+            rows = existing[~np.isnan(existing[:, 0])]
+            rows = rows[np.argsort(rows[:, 0])][-self.capacity :]
+            data[: len(rows)] = rows
+        data.flush()
+        return data
+
+    def append(self, values: list[float]) -> None:
+        """Append a row, overwriting the oldest one when the store is full.
+
+        :param list[float] values:
+            Timestamp followed by the values in `HISTORY_FIELDS`
+        """
+        with self._lock:
+            self._data[self._index] = values
+            self._data.flush()
+            self._index = (self._index + 1) % self.capacity
+
+    def window(self, field: str, start: float, end: float) -> tuple[np.ndarray, np.ndarray]:
+        """Get the recorded values of a field between two times.
+
+        :param str field:
+            Name of a field in `HISTORY_FIELDS`
+        :param float start:
+            Start of the window as a Unix timestamp
+        :param float end:
+            End of the window as a Unix timestamp
+        :return tuple[np.ndarray, np.ndarray]:
+            Timestamps and values in time order, excluding missing values
+        """
+        column = HISTORY_FIELDS.index(field)
+        with self._lock:
+            rows = np.array(self._data[:, [0, column]])
+        timestamps, values = rows[:, 0], rows[:, 1]
+        mask = (timestamps >= start) & (timestamps <= end) & ~np.isnan(values)
+        order = np.argsort(timestamps[mask])
+        return timestamps[mask][order], values[mask][order]
+
+    def series(self, field: str, start: float, end: float, points: int) -> list[tuple[float, float]]:
+        """Downsample the values of a field into evenly spaced time buckets.
+
+        :param str field:
+            Name of a field in `HISTORY_FIELDS`
+        :param float start:
+            Start of the window as a Unix timestamp
+        :param float end:
+            End of the window as a Unix timestamp
+        :param int points:
+            Number of time buckets
+        :return list[tuple[float, float]]:
+            Start time and mean value of each bucket which has data
+        """
+        timestamps, values = self.window(field, start, end)
+        edges = np.linspace(start, end, points + 1)
+        buckets = np.clip(np.searchsorted(edges, timestamps, side="right") - 1, 0, points - 1)
+        counts = np.bincount(buckets, minlength=points)
+        sums = np.bincount(buckets, weights=values, minlength=points)
+        filled = np.flatnonzero(counts)
+        return [(float(edges[i]), float(sums[i] / counts[i])) for i in filled]
+
+    def summary(self, field: str, start: float, end: float) -> dict[str, float] | None:
+        """Aggregate the values of a field between two times.
+
+        :param str field:
+            Name of a field in `HISTORY_FIELDS`
+        :param float start:
+            Start of the window as a Unix timestamp
+        :param float end:
+            End of the window as a Unix timestamp
+        :return dict[str, float] | None:
+            Minimum, maximum, mean and 95th percentile, or None if there is no data in the window
+        """
+        _, values = self.window(field, start, end)
+        if not len(values):
+            return None
+        return {
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "mean": float(values.mean()),
+            "p95": float(np.percentile(values, 95)),
+            "samples": len(values),
+        }
+
+
+class TelemetrySampler:
+    """Sample system telemetry periodically in a background thread.
+
+    Tools read the latest sample instead of querying the system themselves, so blocking measurements such as CPU
+    usage do not delay replies. Processes are sampled less often, and `psutil` keeps each process between samples so
+    their CPU usage is measured over the interval since the previous sample.
+    """
+
+    def __init__(self, interval: float = 1.0, buffer_size: int = 60) -> None:
+        """Initialise the telemetry sampler.
+
+        :param float interval:
+            Seconds between samples
+        :param int buffer_size:
+            Number of samples kept for each measurement
+        """
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.history: TelemetryHistory | None = None
+        self.history_interval = 60.0
+        self._last_history_time = 0.0
+        self.process_interval = 5.0
+        self._last_process_time = 0.0
+        self._processes: list[dict[str, Any]] | None = None
+        self._allocate(buffer_size)
+
+    @property
+    def is_running(self) -> bool:
+        """Check whether the sampler thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _allocate(self, buffer_size: int) -> None:
+        """Allocate empty ring buffers.
+
+        :param int buffer_size:
+            Number of samples kept for each measurement
+        """
+        self.buffer_size = buffer_size
+        self._buffers = {
+            "timestamp": RingBuffer(buffer_size, 1),
+            "cpu_percent": RingBuffer(buffer_size, psutil.cpu_count() or 1),
+            "memory": RingBuffer(buffer_size, len(MEMORY_FIELDS)),
+            "disk_io": RingBuffer(buffer_size, len(DISK_IO_FIELDS)),
+            "net_io": RingBuffer(buffer_size, len(NET_IO_FIELDS)),
+            "temperature": RingBuffer(buffer_size, 1),
+        }
+
+    @staticmethod
+    def _read_temperature() -> float:
+        """Read the CPU temperature in degrees Celsius.
+
+        :return float:
+            CPU temperature, or NaN if unavailable
+        """
+        try:
+            return float(psutil.sensors_temperatures()["cpu_thermal"][0].current)
+        except (TypeError, KeyError, IndexError, AttributeError):
+            return float("nan")
+
+    def sample(self) -> None:
+        """Take one sample of every measurement."""
+        memory = psutil.virtual_memory()
+        disk_io = psutil.disk_io_counters()
+        net_io = psutil.net_io_counters()
+        values = {
+            "timestamp": [time.monotonic()],
+            "cpu_percent": psutil.cpu_percent(interval=None, percpu=True),
+            "memory": [getattr(memory, field) for field in MEMORY_FIELDS],
+            "disk_io": [getattr(disk_io, field) if disk_io else np.nan for field in DISK_IO_FIELDS],
+            "net_io": [getattr(net_io, field) for field in NET_IO_FIELDS],
+            "temperature": [self._read_temperature()],
+        }
+        with self._lock:
+            for name, buffer in self._buffers.items():
+                buffer.append(values[name])
+
+    def record_history(self) -> None:
+        """Append the averages of the samples since the last history row to the history store."""
+        if self.history is None:
+            return
+
+        now = time.monotonic()
+        samples = max(1, min(self.buffer_size, round((now - self._last_history_time) / self.interval)))
+        with self._lock:
+            cpu_percent = self._buffers["cpu_percent"].last(samples)
+            memory = self._buffers["memory"].last(samples)
+            temperature = self._buffers["temperature"].last(samples)
+        if not len(cpu_percent):
+            return
+
+        self._last_history_time = now
+        temperatures = temperature[~np.isnan(temperature)]
+        self.history.append(
+            [
+                time.time(),
+                float(cpu_percent.mean()),
+                float(memory[:, MEMORY_FIELDS.index("percent")].mean()),
+                float(temperatures.mean()) if len(temperatures) else np.nan,
+                float(psutil.disk_usage("/").percent),
+            ]
+        )
+
+    def sample_processes(self) -> None:
+        """Take one sample of the name, user, CPU and memory usage of every process."""
+        self._last_process_time = time.monotonic()
+        processes = [process.info for process in psutil.process_iter(PROCESS_FIELDS)]
+        with self._lock:
+            self._processes = processes
+
+    def _run(self) -> None:
+        """Sample telemetry until the sampler is stopped."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sample()
+                if time.monotonic() - self._last_process_time >= self.process_interval:
+                    self.sample_processes()
+                if time.monotonic() - self._last_history_time >= self.history_interval:
+                    self.record_history()
+            except Exception:
+                logger.exception("Failed to sample system telemetry.")
+
+    def start(
+        self,
+        interval: float | None = None,
+        buffer_size: int | None = None,
+        history: TelemetryHistory | None = None,
+        history_interval: float | None = None,
+        process_interval: float | None = None,
+    ) -> None:
+        """Start sampling in a background thread, taking the first sample after one interval.
+
+        :param float | None interval:
+            Seconds between samples, or None to keep the current interval
+        :param int | None buffer_size:
+            Number of samples kept for each measurement, or None to keep the current size
+        :param TelemetryHistory | None history:
+            Store to record averaged samples to, or None to keep no history
+        :param float | None history_interval:
+            Seconds between history rows, or None to keep the current interval
+        :param float | None process_interval:
+            Seconds between process samples, or None to keep the current interval
+        """
+        self.stop()
+        self.interval = interval or self.interval
+        self.history = history
+        self.history_interval = history_interval or self.history_interval
+        self.process_interval = process_interval or self.process_interval
+        self._last_history_time = time.monotonic()
+        with self._lock:
+            self._allocate(buffer_size or self.buffer_size)
+
+        # Prime the CPU counters and leave the first samples to the thread, as usage measured right after priming
+        # covers no time and reads as zero. process_iter() caches each process, so the next sample reuses its counter.
+        psutil.cpu_percent(interval=None, percpu=True)
+        list(psutil.process_iter(["cpu_percent"]))
+        self._last_process_time = 0.0
+        with self._lock:
+            self._processes = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+        logger.info("Started telemetry sampler with a %s second interval.", self.interval)
+
+    def stop(self) -> None:
+        """Stop the sampler thread."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def latest(self, name: str) -> np.ndarray | None:
+        """Get the latest sample of a measurement.
+
+        :param str name:
+            Measurement name
+        :return np.ndarray | None:
+            Latest sample values, or None if no sample has been taken
+        """
+        with self._lock:
+            buffer = self._buffers[name]
+            return buffer.last()[0] if len(buffer) else None
+
+    def mean(self, name: str, seconds: float) -> float | None:
+        """Get the mean of every value of a measurement over its most recent samples, ignoring missing values.
+
+        :param str name:
+            Measurement name
+        :param float seconds:
+            Length of the window of samples to average
+        :return float | None:
+            Mean value, or None if no value was measured in the window
+        """
+        samples = max(1, round(seconds / self.interval))
+        with self._lock:
+            values = self._buffers[name].last(samples)
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if len(values) else None
+
+    def processes(self) -> list[dict[str, Any]] | None:
+        """Get the latest sample of every process.
+
+        :return list[dict[str, Any]] | None:
+            PID, name, user, CPU and memory usage of each process, or None if no sample has been taken
+        """
+        with self._lock:
+            return None if self._processes is None else list(self._processes)
+
+    def rates(self, name: str) -> np.ndarray | None:
+        """Get the per-second rates of a cumulative counter measurement between the last two samples.
+
+        :param str name:
+            Measurement name
+        :return np.ndarray | None:
+            Rates per second, or None if fewer than two samples have been taken
+        """
+        with self._lock:
+            values = self._buffers[name].last(2)
+            timestamps = self._buffers["timestamp"].last(2)
+        if len(values) < 2:  # noqa: PLR2004
+            return None
+        elapsed = float(timestamps[1, 0] - timestamps[0, 0])
+        return (values[1] - values[0]) / elapsed if elapsed > 0 else None
+
+
+TELEMETRY = TelemetrySampler()
@@ -0,0 +1,223 @@
+"""Concurrent tool execution for the RPi AI application."""
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from google.genai.types import FunctionCall, Part
+
+from rpi_ai.function_calling.tool_results import ToolResultProcessor
+from rpi_ai.metrics import ERRORS, TOOL_DURATION, TOOL_STUCK_WORKERS
+
+logger = logging.getLogger(__name__)
+
+MAX_STUCK_WORKERS = 8
+
+# Abandoned calls are tracked for the whole process, so they are still counted after the executor is recreated
+_stuck: set[Future[Any]] = set()
+_stuck_lock = threading.Lock()
+
+
+def count_stuck_workers() -> int:
+    """Count the abandoned tool calls which are still running.
+
+    :return int:
+        Number of stuck workers
+    """
+    with _stuck_lock:
+        _stuck.difference_update({future for future in _stuck if future.done()})
+        return len(_stuck)
+
+
+TOOL_STUCK_WORKERS.set_function(count_stuck_workers)
+
+
+class ToolExecutor:
+    """Execute the function calls of a model turn concurrently in a thread pool.
+
+    Threads cannot be killed, so a call which times out while running is abandoned and the pool is replaced. New calls
+    get a full set of workers while the stuck thread finishes in the background. Once `max_stuck_workers` calls are
+    stuck the pool is kept, so a tool which keeps hanging cannot pile up threads.
+    """
+
+    def __init__(
+        self,
+        functions: list[Callable[..., Any]],
+        max_workers: int,
+        timeout: float,
+        *,
+        timeouts: dict[str, float] | None = None,
+        result_limit: int = 100000,
+        result_limits: dict[str, int] | None = None,
+        result_processor: ToolResultProcessor | None = None,
+        max_stuck_workers: int = MAX_STUCK_WORKERS,
+    ) -> None:
+        """Initialise the tool executor.
+
+        :param list[Callable[..., Any]] functions:
+            Functions the model may call
+        :param int max_workers:
+            Maximum number of tools running at the same time
+        :param float timeout:
+            Default wall-clock timeout in seconds for a tool call
+        :param dict[str, float] | None timeouts:
+            Timeouts in seconds overriding the default for specific tools
+        :param int result_limit:
+            Default maximum number of characters in a serialised tool result, once shortened by the result processor
+        :param dict[str, int] | None result_limits:
+            Result size limits overriding the default for specific tools
+        :param ToolResultProcessor | None result_processor:
+            Processor fitting tool results into their token budgets, or None to return results unchanged
+        :param int max_stuck_workers:
+            Number of abandoned tool calls after which the thread pool is no longer replaced
+        """
+        self._functions = {function.__name__: function for function in functions}
+        self._timeout = timeout
+        self._timeouts = timeouts or {}
+        self._result_limit = result_limit
+        self._result_limits = result_limits or {}
+        self._result_processor = result_processor
+        self._max_workers = max_workers
+        self._max_stuck_workers = max_stuck_workers
+        self._lock = threading.Lock()
+        self._executor = self._create_pool()
+
+    def _create_pool(self) -> ThreadPoolExecutor:
+        """Create the thread pool which runs tool calls.
+
+        :return ThreadPoolExecutor:
+            New thread pool
+        """
+        return ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="tool")
+
+    def _replace_pool(self, future: Future[Any]) -> None:
+        """Abandon the worker running a timed out call and replace the thread pool, unless too many workers are stuck.
+
+        :param Future[Any] future:
+            Future of the timed out call
+        """
+        with _stuck_lock:
+            _stuck.difference_update({stuck for stuck in _stuck if stuck.done()})
+            stuck_workers = len(_stuck)
+            if stuck_workers < self._max_stuck_workers:
+                _stuck.add(future)
+        if stuck_workers >= self._max_stuck_workers:
+            logger.error("Not replacing tool worker pool, %d workers are already stuck.", stuck_workers)
+            return
+
+        with self._lock:
+            pool, self._executor = self._executor, self._create_pool()
+        pool.shutdown(wait=False)
+        logger.warning("Replaced tool worker pool, %d stuck workers.", stuck_workers + 1)
+
+    def get_timeout(self, name: str) -> float:
+        """Get the timeout for a tool.
+
+        :param str name:
+            Tool name
+        :return float:
+            Timeout in seconds
+        """
+        return self._timeouts.get(name, self._timeout)
+
+    def get_result_limit(self, name: str) -> int:
+        """Get the result size limit for a tool.
+
+        :param str name:
+            Tool name
+        :return int:
+            Maximum number of characters in the serialised result
+        """
+        return self._result_limits.get(name, self._result_limit)
+
+    def _call(self, name: str, args: dict[str, Any]) -> Any:  # noqa: ANN401
+        """Call a tool and record its duration.
+
+        :param str name:
+            Tool name
+        :param dict[str, Any] args:
+            Keyword arguments for the tool
+        :return Any:
+            Tool result
+        """
+        with TOOL_DURATION.time(tool=name):
+            return self._functions[name](**args)
+
+    def _submit(self, function_call: FunctionCall) -> Future[Any] | None:
+        """Submit a function call to the thread pool.
+
+        :param FunctionCall function_call:
+            Function call requested by the model
+        :return Future[Any] | None:
+            Future for the tool result, or None if the tool is unknown
+        """
+        if function_call.name not in self._functions:
+            return None
+        with self._lock:
+            executor = self._executor
+        return executor.submit(self._call, function_call.name, function_call.args or {})
+
+    def _collect(self, name: str, future: Future[Any] | None, start: float) -> dict[str, Any]:
+        """Wait for a tool result within the tool's timeout.
+
+        :param str name:
+            Tool name
+        :param Future[Any] | None future:
+            Future for the tool result, or None if the tool is unknown
+        :param float start:
+            Monotonic time at which the tool calls were submitted
+        :return dict[str, Any]:
+            Function response containing either the result or an error
+        """
+        if future is None:
+            logger.error("Model requested unknown tool: %s", name)
+            return {"error": f"Unknown tool: {name}"}
+
+        timeout = self.get_timeout(name)
+        try:
+            result = future.result(timeout=max(0.0, timeout - (time.monotonic() - start)))
+        except TimeoutError:
+            if not future.cancel():
+                self._replace_pool(future)
+            logger.error("Tool %s timed out after %s seconds.", name, timeout)  # noqa: TRY400
+            ERRORS.inc(stage="tool", error=TimeoutError.__name__)
+            return {"error": f"Tool {name} timed out after {timeout} seconds."}
+        except Exception as e:
+            logger.exception("Tool %s failed.", name)
+            ERRORS.inc(stage="tool", error=type(e).__name__)
+            return {"error": str(e)}
+        else:
+            # Shorten the result first so large outputs stay retrievable, the limit guards against what cannot shrink
+            if self._result_processor:
+                result = self._result_processor.process(name, result)
+            size = len(json.dumps(result, default=str))
+            if size > (limit := self.get_result_limit(name)):
+                logger.error("Tool %s returned %d characters, over the limit of %d.", name, size, limit)
+                ERRORS.inc(stage="tool", error="ResultTooLarge")
+                return {"error": f"Tool {name} returned {size} characters, over the limit of {limit}."}
+            return {"result": result}
+
+    def shutdown(self) -> None:
+        """Stop accepting tool calls without waiting for running tools to finish."""
+        with self._lock:
+            executor = self._executor
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def execute(self, function_calls: list[FunctionCall]) -> list[Part]:
+        """Execute function calls concurrently and collect their responses in order.
+
+        :param list[FunctionCall] function_calls:
+            Function calls requested by the model in one turn
+        :return list[Part]:
+            Function response parts in the same order as the calls
+        """
+        start = time.monotonic()
+        futures = [(function_call.name or "", self._submit(function_call)) for function_call in function_calls]
+        return [
+            Part.from_function_response(name=name, response=self._collect(name, future, start))
+            for name, future in futures
+        ]
@@ -0,0 +1,272 @@
+"""Post-processing of tool results for the RPi AI application."""
+
+import json
+import logging
+import math
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from rpi_ai.function_calling.package_updates import UPGRADABLE_PATTERN
+from rpi_ai.metrics import TOOL_RESULTS_SHORTENED
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+SMALL_VALUE_CHARS = 200
+MAX_ERROR_LINES = 5
+MAX_LINE_CHARS = 200
+MAX_PACKAGE_NAMES = 30
+ERROR_LINE_PATTERN = re.compile(r"^(?:E:|W:|Err:)|\b(?:error|failed|fatal)\b", re.IGNORECASE)
+APT_PACKAGE_PATTERN = re.compile(r"^(?:Setting up|Unpacking|Removing) ([^\s:]+)")
+APT_SUMMARY_PATTERN = re.compile(
+    r"(?P<upgraded>\d+) upgraded, (?P<newly_installed>\d+) newly installed, "
+    r"(?P<to_remove>\d+) to remove and (?P<not_upgraded>\d+) not upgraded"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text.
+
+    :param str text:
+        Text to estimate
+    :return int:
+        Approximate number of tokens
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _size(value: Any) -> int:  # noqa: ANN401
+    """Get the length of a value once serialised for the model.
+
+    :param Any value:
+        Value to measure
+    :return int:
+        Number of characters
+    """
+    return len(json.dumps(value, default=str))
+
+
+def _to_text(result: Any) -> str:  # noqa: ANN401
+    """Convert a tool result to readable text, keeping multi-line strings as they are.
+
+    :param Any result:
+        Tool result
+    :return str:
+        Readable text of the result
+    """
+    if isinstance(result, str):
+        return result
+    if isinstance(result, dict):
+        return "\n".join(
+            f"{key}:\n{value}"
+            if isinstance(value, str) and "\n" in value
+            else f"{key}: {json.dumps(value, default=str)}"
+            for key, value in result.items()
+        )
+    return json.dumps(result, default=str)
+
+
+def extract_essentials(text: str) -> dict[str, Any]:
+    """Extract the error lines, package names and apt summary from command output.
+
+    :param str text:
+        Command output
+    :return dict[str, Any]:
+        Essentials which were found in the output
+    """
+    error_lines: list[str] = []
+    packages: dict[str, None] = {}
+    apt_summary: dict[str, int] | None = None
+    for line in text.splitlines():
+        line = line.strip()  # noqa: PLW2901
+        if ERROR_LINE_PATTERN.search(line) and line[:MAX_LINE_CHARS] not in error_lines:
+            error_lines.append(line[:MAX_LINE_CHARS])
+        if match := APT_PACKAGE_PATTERN.match(line) or UPGRADABLE_PATTERN.match(line):
+            packages[match.group(1)] = None
+        if match := APT_SUMMARY_PATTERN.search(line):
+            apt_summary = {field: int(value) for field, value in match.groupdict().items()}
+
+    essentials: dict[str, Any] = {}
+    if error_lines:
+        essentials["error_lines"] = error_lines[:MAX_ERROR_LINES]
+    if packages:
+        essentials["package_count"] = len(packages)
+        essentials["package_names"] = list(packages)[:MAX_PACKAGE_NAMES]
+    if apt_summary:
+        essentials["apt_summary"] = apt_summary
+    return essentials
+
+
+def _tail(text: str, max_chars: int) -> str:
+    """Get the last lines of a text which fit in a number of serialised characters.
+
+    :param str text:
+        Text to shorten
+    :param int max_chars:
+        Maximum number of characters
+    :return str:
+        Last whole lines of the text
+    """
+    lines: list[str] = []
+    size = 0
+    for line in reversed(text.splitlines()):
+        size += _size(line)
+        if size > max_chars:
+            break
+        lines.append(line)
+    return "\n".join(reversed(lines))
+
+
+def _head(items: list[Any], max_chars: int) -> list[Any]:
+    """Get the first items of a list which fit in a number of serialised characters.
+
+    :param list[Any] items:
+        Items to shorten
+    :param int max_chars:
+        Maximum number of characters
+    :return list[Any]:
+        First items of the list
+    """
+    size = 0
+    for index, item in enumerate(items):
+        size += _size(item) + 1
+        if size > max_chars:
+            return items[:index]
+    return items
+
+
+class ToolResultProcessor:
+    """Fit tool results into a per-tool token budget before they are sent to the model.
+
+    Results over budget keep their small fields, the essentials extracted from their output and as much of the
+    output as fits. The full output is stored so the model can read it in pages with `get_tool_output`.
+    """
+
+    def __init__(self, token_budget: int, token_budgets: dict[str, int] | None = None, max_results: int = 20) -> None:
+        """Initialise the tool result processor.
+
+        :param int token_budget:
+            Default maximum number of tokens in a tool result
+        :param dict[str, int] | None token_budgets:
+            Token budgets overriding the default for specific tools
+        :param int max_results:
+            Number of full outputs kept for retrieval
+        """
+        self._lock = threading.Lock()
+        self._outputs: OrderedDict[str, str] = OrderedDict()
+        self.update_config(token_budget, token_budgets, max_results)
+
+    def update_config(self, token_budget: int, token_budgets: dict[str, int] | None, max_results: int) -> None:
+        """Update the token budgets and the number of full outputs kept.
+
+        :param int token_budget:
+            Default maximum number of tokens in a tool result
+        :param dict[str, int] | None token_budgets:
+            Token budgets overriding the default for specific tools
+        :param int max_results:
+            Number of full outputs kept for retrieval
+        """
+        self.token_budget = token_budget
+        self.token_budgets = token_budgets or {}
+        self.max_results = max_results
+        with self._lock:
+            self._evict()
+
+    def get_budget(self, name: str) -> int:
+        """Get the token budget for a tool.
+
+        :param str name:
+            Tool name
+        :return int:
+            Maximum number of tokens
+        """
+        return self.token_budgets.get(name, self.token_budget)
+
+    def _evict(self) -> None:
+        """Remove the oldest full outputs beyond the configured limit."""
+        while len(self._outputs) > self.max_results:
+            self._outputs.popitem(last=False)
+
+    def _store(self, text: str) -> str:
+        """Store the full output of a tool result.
+
+        :param str text:
+            Full output
+        :return str:
+            Result ID to retrieve the output with
+        """
+        result_id = uuid.uuid4().hex[:8]
+        with self._lock:
+            self._outputs[result_id] = text
+            self._evict()
+        return result_id
+
+    def process(self, name: str, result: Any) -> Any:  # noqa: ANN401
+        """Shorten a tool result which is over the token budget of its tool.
+
+        :param str name:
+            Tool name
+        :param Any result:
+            Tool result
+        :return Any:
+            The result unchanged if it fits, otherwise a shortened result with a reference to the full output
+        """
+        budget = self.get_budget(name)
+        original_tokens = estimate_tokens(json.dumps(result, default=str))
+        if name == "get_tool_output" or original_tokens <= budget:
+            return result
+
+        fields = result if isinstance(result, dict) else {"output": result}
+        small = {key: value for key, value in fields.items() if _size(value) <= SMALL_VALUE_CHARS}
+        large = {key: value for key, value in fields.items() if key not in small}
+        text = _to_text(result)
+        compact: dict[str, Any] = {
+            **small,
+            **extract_essentials("\n".join(value for value in large.values() if isinstance(value, str))),
+            "truncated": True,
+            "result_id": self._store(text),
+            "original_tokens": original_tokens,
+        }
+
+        share = max(0, (budget * CHARS_PER_TOKEN - _size(compact)) // max(1, len(large)))
+        for key, value in large.items():
+            if isinstance(value, str):
+                compact[key] = _tail(value, share)
+            elif isinstance(value, list):
+                compact[f"{key}_count"] = len(value)
+                compact[key] = _head(value, share)
+            else:
+                compact.setdefault("omitted", []).append(key)
+
+        TOOL_RESULTS_SHORTENED.inc(tool=name)
+        logger.info("Shortened %s result from %d tokens to a %d token budget.", name, original_tokens, budget)
+        return compact
+
+    def get_tool_output(self, result_id: str, offset: int = 0) -> dict:
+        """Get part of the full output of a tool result which was shortened.
+
+        :param str result_id:
+            The result_id of the shortened tool result
+        :param int offset:
+            The character offset to start reading from, use next_offset from the previous call to read on
+        :return dict:
+            A dictionary containing the requested part of the output and the offset of the next part
+        """
+        with self._lock:
+            text = self._outputs.get(result_id)
+        if text is None:
+            return {"error": f"No tool output found with ID {result_id}."}
+
+        offset = max(0, int(offset))
+        chunk = text[offset : offset + self.get_budget("get_tool_output") * CHARS_PER_TOKEN]
+        next_offset = offset + len(chunk)
+        return {
+            "result_id": result_id,
+            "total_chars": len(text),
+            "offset": offset,
+            "next_offset": next_offset if next_offset < len(text) else None,
+            "text": chunk,
+        }
@@ -1,9 +1,85 @@
-"""Function registry for the RPi AI application."""
+"""Function registry for the RPi AI application.
 
+Function lists are registered by name and created on first use. Lists which are not built in are discovered from the
+`rpi_ai.function_lists` entry point group, so plugins can add tools without changing this module.
+"""
+
+import logging
+import threading
+from importlib.metadata import entry_points
+
+from rpi_ai.function_calling.functions_list_base import FunctionsListBase
 from rpi_ai.function_calling.system_info import SystemInfo
 
-system_info = SystemInfo()
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "rpi_ai.function_lists"
+
+FUNCTION_LISTS: dict[str, type[FunctionsListBase]] = {
+    "system_info": SystemInfo,
+}
+
+_instances: dict[str, FunctionsListBase] = {}
+_lock = threading.Lock()
+
+
+def register_function_list(name: str, function_list: type[FunctionsListBase]) -> None:
+    """Register a function list under a name.
+
+    :param str name:
+        Name used to enable the function list
+    :param type[FunctionsListBase] function_list:
+        Function list class
+    """
+    FUNCTION_LISTS[name] = function_list
+
+
+def _discover(name: str) -> type[FunctionsListBase] | None:
+    """Find a function list plugin by name.
+
+    :param str name:
+        Name of the entry point
+    :return type[FunctionsListBase] | None:
+        Function list class, or None if no plugin provides it
+    """
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP, name=name):
+        function_list = entry_point.load()
+        if isinstance(function_list, type) and issubclass(function_list, FunctionsListBase):
+            register_function_list(name, function_list)
+            return function_list
+        logger.error("Entry point %s is not a function list.", entry_point.value)
+    return None
+
+
+def get_function_list(name: str) -> FunctionsListBase | None:
+    """Get a function list by name, creating it on first use.
+
+    :param str name:
+        Name of the function list
+    :return FunctionsListBase | None:
+        Function list, or None if no function list is registered or discovered under the name
+    """
+    with _lock:
+        if name not in _instances:
+            if (function_list := FUNCTION_LISTS.get(name) or _discover(name)) is None:
+                return None
+            _instances[name] = function_list()
+            logger.info("Loaded %d functions from %s.", len(_instances[name].functions), name)
+        return _instances[name]
+
+
+def get_function_lists(names: list[str]) -> list[FunctionsListBase]:
+    """Get the function lists for a list of names, skipping unknown names.
 
-FUNCTIONS = [
-    *system_info,
-]
+    :param list[str] names:
+        Names of the function lists
+    :return list[FunctionsListBase]:
+        Function lists in the same order as the names
+    """
+    function_lists = []
+    for name in names:
+        if (function_list := get_function_list(name)) is None:
+            logger.error("Unknown function list: %s", name)
+            continue
+        function_lists.append(function_list)
+    return function_lists
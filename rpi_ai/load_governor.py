@@ -0,0 +1,150 @@
+"""Load-based degradation for the RPi AI application."""
+
+import logging
+import threading
+import time
+
+from rpi_ai.function_calling.telemetry import TELEMETRY
+from rpi_ai.metrics import LOAD_DEGRADED
+from rpi_ai.models import LoadGovernorConfig, LoadStatus
+
+logger = logging.getLogger(__name__)
+
+
+class LoadGovernor:
+    """Decide whether the chatbot should run in a cheaper mode, checking the system load in a background thread.
+
+    The degraded mode starts once the averaged CPU temperature or usage reaches its high threshold, and ends once both
+    have fallen below their low thresholds, so a board hovering around a threshold does not switch modes every check.
+    """
+
+    def __init__(self, config: LoadGovernorConfig | None = None) -> None:
+        """Initialise the load governor.
+
+        :param LoadGovernorConfig | None config:
+            Load governor configuration, or None to use the defaults
+        """
+        self.config = config or LoadGovernorConfig()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._status = LoadStatus()
+
+    @property
+    def is_running(self) -> bool:
+        """Check whether the governor thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def status(self) -> LoadStatus:
+        """Get a copy of the result of the last load check."""
+        with self._lock:
+            return self._status.model_copy(deep=True)
+
+    @property
+    def degraded_config(self) -> LoadGovernorConfig | None:
+        """Get the configuration of the degraded mode while it is active, or None while running normally."""
+        with self._lock:
+            return self.config if self._status.degraded else None
+
+    @staticmethod
+    def _pressure(
+        temperature: float | None, cpu_percent: float | None, temperature_limit: float, cpu_limit: float
+    ) -> list[str]:
+        """Describe the measurements which are at or above their limits.
+
+        :param float | None temperature:
+            Averaged CPU temperature in degrees Celsius, or None if it was not measured
+        :param float | None cpu_percent:
+            Averaged CPU usage percentage, or None if it was not measured
+        :param float temperature_limit:
+            CPU temperature limit in degrees Celsius
+        :param float cpu_limit:
+            CPU usage percentage limit
+        :return list[str]:
+            Reason for each measurement at or above its limit
+        """
+        reasons = []
+        if temperature is not None and temperature >= temperature_limit:
+            reasons.append(f"CPU temperature {temperature:.1f} C >= {temperature_limit:.1f} C")
+        if cpu_percent is not None and cpu_percent >= cpu_limit:
+            reasons.append(f"CPU usage {cpu_percent:.1f}% >= {cpu_limit:.1f}%")
+        return reasons
+
+    def check(self) -> LoadStatus:
+        """Update the mode from the telemetry samples in the configured window.
+
+        :return LoadStatus:
+            Result of the check
+        """
+        temperature = TELEMETRY.mean("temperature", self.config.window)
+        cpu_percent = TELEMETRY.mean("cpu_percent", self.config.window)
+        with self._lock:
+            if self._status.degraded:
+                reasons = self._pressure(temperature, cpu_percent, self.config.temperature_low, self.config.cpu_low)
+            else:
+                reasons = self._pressure(temperature, cpu_percent, self.config.temperature_high, self.config.cpu_high)
+
+            now = int(time.time())
+            changed = bool(reasons) != self._status.degraded
+            self._status = LoadStatus(
+                degraded=bool(reasons),
+                reasons=reasons,
+                temperature=temperature,
+                cpu_percent=cpu_percent,
+                checked_at=now,
+                changed_at=now if changed else self._status.changed_at,
+            )
+
+        if changed:
+            LOAD_DEGRADED.set(int(bool(reasons)))
+            if reasons:
+                logger.warning("Switching to degraded mode: %s", "; ".join(reasons))
+            else:
+                logger.info("Load has recovered, switching back to normal mode.")
+        return self.status
+
+    def _reset(self) -> None:
+        """Return to the normal mode."""
+        with self._lock:
+            if self._status.degraded:
+                logger.info("Load governor disabled, switching back to normal mode.")
+            self._status = LoadStatus()
+        LOAD_DEGRADED.set(0)
+
+    def _run(self) -> None:
+        """Check the load periodically until the governor is stopped."""
+        while not self._stop_event.wait(self.config.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Failed to check the system load.")
+
+    def start(self, config: LoadGovernorConfig | None = None) -> None:
+        """Start checking the load in a background thread, unless the governor is disabled.
+
+        :param LoadGovernorConfig | None config:
+            Load governor configuration, or None to keep the current configuration
+        """
+        self.stop()
+        self.config = config or self.config
+        if not self.config.enabled:
+            self._reset()
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="load-governor", daemon=True)
+        self._thread.start()
+        logger.info("Started load governor with a %s second interval.", self.config.interval)
+
+    def stop(self) -> None:
+        """Stop the governor thread and return to the normal mode."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._reset()
+
+
+LOAD_GOVERNOR = LoadGovernor()
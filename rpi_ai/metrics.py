@@ -0,0 +1,400 @@
+"""Prometheus metrics for the RPi AI application."""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from google.genai.types import GenerateContentResponseUsageMetadata
+
+type LabelValues = tuple[str, ...]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format.
+
+    :param str value:
+        Label value
+    :return str:
+        Escaped label value
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    """Format label names and values in the Prometheus text format.
+
+    :param tuple[str, ...] names:
+        Label names
+    :param LabelValues values:
+        Label values
+    :param str extra:
+        Additional pre-formatted label
+    :return str:
+        Formatted labels, or an empty string if there are none
+    """
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value in the Prometheus text format.
+
+    :param float value:
+        Sample value
+    :return str:
+        Formatted value
+    """
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Abstract base class for labelled metrics."""
+
+    TYPE: str = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        """Initialise the metric.
+
+        :param str name:
+            Metric name
+        :param str documentation:
+            Help text for the metric
+        :param tuple[str, ...] labelnames:
+            Names of the metric labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        """Get the label values in label name order.
+
+        :param dict[str, str] labels:
+            Label values keyed by label name
+        :return LabelValues:
+            Ordered label values
+        """
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        """Get the metric samples in the Prometheus text format."""
+
+    def render(self) -> str:
+        """Render the metric in the Prometheus text format.
+
+        :return str:
+            Metric help, type and samples
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}", *self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        """Initialise the counter.
+
+        :param str name:
+            Metric name
+        :param str documentation:
+            Help text for the metric
+        :param tuple[str, ...] labelnames:
+            Names of the metric labels
+        """
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increment the counter.
+
+        :param float amount:
+            Amount to increment by
+        :param str labels:
+            Label values keyed by label name
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Get the current counter value.
+
+        :param str labels:
+            Label values keyed by label name
+        :return float:
+            Counter value
+        """
+        return self._values.get(self._label_values(labels), 0)
+
+    def samples(self) -> list[str]:
+        """Get the counter samples in the Prometheus text format."""
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values.items()
+        ]
+
+
+class Gauge(Metric):
+    """Gauge which is either set directly or read from a callback at scrape time."""
+
+    TYPE = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        """Initialise the gauge.
+
+        :param str name:
+            Metric name
+        :param str documentation:
+            Help text for the metric
+        :param tuple[str, ...] labelnames:
+            Names of the metric labels
+        """
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float | Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge value.
+
+        :param float value:
+            New gauge value
+        :param str labels:
+            Label values keyed by label name
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        """Read the gauge value from a callback when metrics are collected.
+
+        :param Callable[[], float] function:
+            Callback returning the current value
+        :param str labels:
+            Label values keyed by label name
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = function
+
+    def value(self, **labels: str) -> float:
+        """Get the current gauge value.
+
+        :param str labels:
+            Label values keyed by label name
+        :return float:
+            Gauge value
+        """
+        value = self._values.get(self._label_values(labels), 0)
+        return value() if callable(value) else value
+
+    def samples(self) -> list[str]:
+        """Get the gauge samples in the Prometheus text format."""
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value() if callable(value) else value)}"
+            for key, value in values.items()
+        ]
+
+
+class Histogram(Metric):
+    """Histogram of observed values in fixed buckets."""
+
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialise the histogram.
+
+        :param str name:
+            Metric name
+        :param str documentation:
+            Help text for the metric
+        :param tuple[str, ...] labelnames:
+            Names of the metric labels
+        :param tuple[float, ...] buckets:
+            Sorted upper bounds of the histogram buckets
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation.
+
+        :param float value:
+            Observed value
+        :param str labels:
+            Label values keyed by label name
+        """
+        key = self._label_values(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if key not in self._counts:
+                self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            self._counts[key][index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the enclosed block in seconds.
+
+        :param str labels:
+            Label values keyed by label name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Get the number of observations.
+
+        :param str labels:
+            Label values keyed by label name
+        :return int:
+            Number of observations
+        """
+        return sum(self._counts.get(self._label_values(labels), []))
+
+    def samples(self) -> list[str]:
+        """Get the histogram samples in the Prometheus text format."""
+        with self._lock:
+            counts = {key: list(value) for key, value in self._counts.items()}
+            sums = dict(self._sums)
+
+        lines = []
+        for key, bucket_counts in counts.items():
+            cumulative = 0
+            for upper_bound, bucket_count in zip([*self.buckets, float("inf")], bucket_counts, strict=True):
+                cumulative += bucket_count
+                bucket_label = f'le="{_format_value(upper_bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(sums[key])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registry of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        """Initialise the registry."""
+        self._metrics: dict[str, Metric] = {}
+
+    def register[M: Metric](self, metric: M) -> M:
+        """Register a metric.
+
+        :param M metric:
+            Metric to register
+        :return M:
+            Registered metric
+        """
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all registered metrics.
+
+        :return str:
+            Metrics in the Prometheus text format
+        """
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.register(
+    Histogram("rpi_ai_stage_duration_seconds", "Duration of chatbot processing stages in seconds.", ("stage",))
+)
+TOOL_DURATION = REGISTRY.register(
+    Histogram("rpi_ai_tool_duration_seconds", "Duration of tool calls in seconds.", ("tool",))
+)
+TOOL_CACHE_REQUESTS = REGISTRY.register(
+    Counter("rpi_ai_tool_cache_requests_total", "Cached tool calls by result (hit or miss).", ("tool", "result"))
+)
+TOOL_RESULTS_SHORTENED = REGISTRY.register(
+    Counter("rpi_ai_tool_results_shortened_total", "Tool results shortened to fit their token budget.", ("tool",))
+)
+TOOL_STUCK_WORKERS = REGISTRY.register(
+    Gauge("rpi_ai_tool_stuck_workers", "Tool calls abandoned after timing out which are still running.")
+)
+TTS_DURATION = REGISTRY.register(
+    Histogram("rpi_ai_tts_duration_seconds", "Duration of text-to-speech synthesis in seconds.", ("engine",))
+)
+TTS_CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "rpi_ai_tts_cache_requests_total", "Text-to-speech cache lookups by result (hit or miss).", ("engine", "result")
+    )
+)
+AUDIO_BYTES_SAVED = REGISTRY.register(
+    Histogram(
+        "rpi_ai_audio_bytes_saved",
+        "Bytes removed from uploaded voice clips by trimming silence, down-mixing and resampling.",
+        buckets=(1_000, 10_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000),
+    )
+)
+REQUEST_DURATION = REGISTRY.register(
+    Histogram("rpi_ai_request_duration_seconds", "Duration of HTTP requests in seconds.", ("method", "route", "status"))
+)
+TOKENS = REGISTRY.register(Counter("rpi_ai_tokens_total", "Tokens used by model responses.", ("type",)))
+ERRORS = REGISTRY.register(
+    Counter("rpi_ai_errors_total", "Errors raised while processing messages.", ("stage", "error"))
+)
+BLOCKED_MESSAGES = REGISTRY.register(
+    Counter("rpi_ai_blocked_messages_total", "Messages blocked by safety filters.", ("category",))
+)
+MEMORY_ENTRIES = REGISTRY.register(Gauge("rpi_ai_memory_entries", "Number of entries in the chat memory store."))
+MEMORY_VECTOR_BYTES = REGISTRY.register(
+    Gauge("rpi_ai_memory_vector_bytes", "Approximate size of the chat memory embedding vectors in bytes.")
+)
+CHAT_QUEUE_DEPTH = REGISTRY.register(Gauge("rpi_ai_chat_queue_depth", "Number of chat requests waiting in the queue."))
+LOAD_DEGRADED = REGISTRY.register(
+    Gauge("rpi_ai_load_degraded", "Whether the chatbot runs in its degraded mode under thermal or CPU pressure.")
+)
+
+
+def record_usage(usage_metadata: GenerateContentResponseUsageMetadata | None) -> None:
+    """Record the token counts from a model response.
+
+    :param GenerateContentResponseUsageMetadata | None usage_metadata:
+        Usage metadata of the response
+    """
+    if usage_metadata is None:
+        return
+
+    for token_type, count in (
+        ("prompt", usage_metadata.prompt_token_count),
+        ("candidates", usage_metadata.candidates_token_count),
+        ("thoughts", usage_metadata.thoughts_token_count),
+        ("tool_use_prompt", usage_metadata.tool_use_prompt_token_count),
+        ("cached", usage_metadata.cached_content_token_count),
+        ("total", usage_metadata.total_token_count),
+    ):
+        if isinstance(count, int):
+            TOKENS.inc(count, type=token_type)
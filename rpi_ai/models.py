@@ -4,11 +4,13 @@ from __future__ import annotations
 
 import json
 from datetime import datetime
+from enum import StrEnum
 from pathlib import Path
+from typing import Literal
 
 import numpy as np
 from google.genai.types import Content, Part
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from python_template_server.models import BaseResponse, TemplateServerConfig
 
 
@@ -19,6 +21,7 @@ class ChatbotMessage(BaseModel):
     message: str
     timestamp: int
     is_user_message: bool = False
+    model: str | None = None
 
     @classmethod
     def user_message(cls, message: str, timestamp: int) -> ChatbotMessage:
@@ -38,13 +41,15 @@ class ChatbotMessage(BaseModel):
         )
 
     @classmethod
-    def model_message(cls, message: str, timestamp: int) -> ChatbotMessage:
+    def model_message(cls, message: str, timestamp: int, model: str | None = None) -> ChatbotMessage:
         """Create a model message.
 
         :param str message:
             ChatbotMessage content
         :param int timestamp:
             ChatbotMessage timestamp
+        :param str | None model:
+            Name of the LLM that generated the message
         :return ChatbotMessage:
             Model message instance
         """
@@ -52,6 +57,7 @@ class ChatbotMessage(BaseModel):
             message=message,
             timestamp=timestamp,
             is_user_message=False,
+            model=model,
         )
 
     @classmethod
@@ -124,6 +130,7 @@ class ChatbotSpeech(BaseModel):
     bytes: str
     message: str
     timestamp: int
+    model: str | None = None
 
 
 # Memory Models
@@ -174,13 +181,15 @@ class ChatMemoryList(BaseModel):
         self.entries.clear()
 
     def save_to_file(self, filepath: Path) -> None:
-        """Save chat memory entries to a JSON file.
+        """Save chat memory entries to a JSON file, replacing the file only once the entries are written.
 
         :param Path filepath:
             Filepath to save the chat memory entries
         """
-        with filepath.open("w") as f:
+        temp_filepath = filepath.with_name(f"{filepath.name}.tmp")
+        with temp_filepath.open("w") as f:
             json.dump(self.model_dump(), f, indent=2)
+        temp_filepath.replace(filepath)
 
     @classmethod
     def load_from_file(cls, filepath: Path) -> ChatMemoryList:
@@ -197,11 +206,148 @@ class ChatMemoryList(BaseModel):
             return cls(entries=[])
 
 
+# Job Models
+class JobStatus(StrEnum):
+    """Status of a background job."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    TIMED_OUT = "timed_out"
+    CANCELLED = "cancelled"
+
+
+class JobInfo(BaseModel):
+    """Background job data type."""
+
+    job_id: str
+    name: str
+    status: JobStatus
+    created_at: int
+    finished_at: int | None = None
+    return_code: int | None = None
+    stdout: str = ""
+    stderr: str = ""
+    truncated: bool = False
+
+
+# Package Update Models
+class UpgradablePackage(BaseModel):
+    """Package with an available update data type."""
+
+    name: str
+    source: str
+    version: str
+    architecture: str
+    current_version: str
+
+
+class PackageUpdateStatus(BaseModel):
+    """Result of the last package update check."""
+
+    checked_at: int | None = None
+    packages: list[UpgradablePackage] = Field(default_factory=list)
+    refreshing: bool = False
+    job_id: str | None = None
+    error: str | None = None
+
+
+# Load Governor Models
+class LoadStatus(BaseModel):
+    """State of the load governor data type."""
+
+    degraded: bool = False
+    reasons: list[str] = Field(default_factory=list)
+    temperature: float | None = None
+    cpu_percent: float | None = None
+    checked_at: int | None = None
+    changed_at: int | None = None
+
+
 # Chatbot Server Configuration Models
+class RetryConfig(BaseModel):
+    """Retry and circuit breaker configuration model."""
+
+    max_retries: int = Field(default=3, description="Maximum number of retries per model on server errors")
+    base_delay: float = Field(default=0.5, description="Base delay in seconds for exponential backoff")
+    max_delay: float = Field(default=8.0, description="Maximum delay in seconds between retries")
+    deadline: float = Field(default=30.0, description="Deadline in seconds for a request across all models")
+    failure_threshold: int = Field(default=3, description="Consecutive failures before a model is routed around")
+    reset_timeout: float = Field(default=60.0, description="Seconds before a failing model is tried again")
+
+
+class ToolConfig(BaseModel):
+    """Tool execution configuration model."""
+
+    max_workers: int = Field(default=4, description="Maximum number of tool calls running at the same time")
+    timeout: float = Field(default=30.0, description="Default timeout in seconds for a tool call")
+    timeouts: dict[str, float] = Field(default_factory=dict, description="Timeouts in seconds for specific tools")
+    max_remote_calls: int = Field(default=10, description="Maximum number of tool call rounds in one turn")
+    result_limit: int = Field(
+        default=100000, ge=1, description="Default maximum number of characters in a serialised tool result"
+    )
+    result_limits: dict[str, int] = Field(
+        default_factory=dict, description="Maximum number of characters in the results of specific tools"
+    )
+    token_budget: int = Field(default=1000, ge=1, description="Default maximum number of tokens in a tool result")
+    token_budgets: dict[str, int] = Field(
+        default_factory=dict, description="Maximum number of tokens in the results of specific tools"
+    )
+    max_stored_results: int = Field(
+        default=20, ge=1, description="Number of full outputs of shortened tool results kept for retrieval"
+    )
+
+
+class TTSConfig(BaseModel):
+    """Text-to-speech configuration model."""
+
+    engine: Literal["gtts", "espeak"] = Field(
+        default="gtts", description="Text-to-speech engine: gtts (online) or espeak (offline)"
+    )
+    language: str = Field(default="en", description="Language of the gTTS voice")
+    gtts_tld: str = Field(default="co.uk", description="Google Translate domain which sets the gTTS accent")
+    espeak_executable: str = Field(default="espeak-ng", description="Path to the espeak-ng executable")
+    espeak_voice: str = Field(default="en-gb", description="espeak-ng voice name")
+    espeak_speed: int = Field(default=160, gt=0, description="espeak-ng speaking rate in words per minute")
+    timeout: float = Field(default=30.0, gt=0, description="Seconds before a local text-to-speech engine is stopped")
+    max_workers: int = Field(default=4, gt=0, description="Maximum number of sentences synthesised at the same time")
+    cache_entries: int = Field(default=128, ge=0, description="Number of synthesised sentences cached in memory")
+    cache_dirpath: str = Field(default="tts_cache", description="Directory of the on-disk text-to-speech cache")
+    cache_max_bytes: int = Field(
+        default=50_000_000, ge=0, description="Maximum total size of the on-disk text-to-speech cache in bytes"
+    )
+
+
+class AudioUploadConfig(BaseModel):
+    """Audio upload configuration model."""
+
+    max_bytes: int = Field(default=50_000_000, gt=0, description="Maximum size of an uploaded audio clip in bytes")
+    inline_max_bytes: int = Field(
+        default=10_000_000, ge=0, description="Largest clip sent inline, larger clips are uploaded with the Files API"
+    )
+    preprocess: bool = Field(
+        default=True, description="Whether to trim silence from WAV clips, mix them to mono and resample them"
+    )
+    preprocess_max_bytes: int = Field(
+        default=10_000_000, ge=0, description="Largest WAV clip preprocessed, larger clips are sent unchanged"
+    )
+    sample_rate: int = Field(default=16000, gt=0, description="Sample rate WAV clips are resampled down to in Hz")
+    silence_threshold_db: float = Field(
+        default=-40.0, le=0, description="Level in dBFS below which a frame of audio is treated as silence"
+    )
+    silence_padding_ms: int = Field(
+        default=200, ge=0, description="Silence kept before and after the speech when trimming in milliseconds"
+    )
+
+
 class ChatbotConfig(BaseModel):
     """Chatbot configuration model."""
 
     model: str = Field(default="gemini-2.0-flash", description="LLM to use for chatbot")
+    fallback_models: list[str] = Field(
+        default_factory=list, description="Ordered LLMs to fall back to when the primary model is unavailable"
+    )
     system_instruction: str = Field(
         default=(
             "You are a friendly AI assistant designed to help the user with daily tasks. "
@@ -211,6 +357,15 @@ class ChatbotConfig(BaseModel):
     )
     max_output_tokens: int = Field(default=1000, description="Maximum number of output tokens")
     temperature: float = Field(default=1.0, description="Sampling temperature for response generation")
+    retry_config: RetryConfig = Field(default_factory=RetryConfig, description="Retry and fallback configuration")
+    tool_config: ToolConfig = Field(default_factory=ToolConfig, description="Tool execution configuration")
+    tool_sets: list[str] = Field(
+        default_factory=lambda: ["system_info"], description="Names of the function lists available to the chatbot"
+    )
+    tts_config: TTSConfig = Field(default_factory=TTSConfig, description="Text-to-speech configuration")
+    audio_upload_config: AudioUploadConfig = Field(
+        default_factory=AudioUploadConfig, description="Audio upload configuration"
+    )
 
     @staticmethod
     def get_memory_guidelines() -> str:
@@ -238,6 +393,86 @@ class EmbeddingConfig(BaseModel):
     top_k: int = Field(default=5, description="Number of top similar memories to retrieve")
 
 
+class RequestQueueConfig(BaseModel):
+    """Chat request queue configuration model."""
+
+    max_depth: int = Field(default=4, ge=1, description="Maximum number of chat requests waiting to be processed")
+
+
+class TelemetryConfig(BaseModel):
+    """System telemetry sampler configuration model."""
+
+    interval: float = Field(default=1.0, gt=0, description="Seconds between telemetry samples")
+    buffer_size: int = Field(default=60, ge=2, description="Number of telemetry samples kept for each measurement")
+    history_filepath: str = Field(
+        default="telemetry_history.npy", description="Filepath to store the telemetry history"
+    )
+    history_interval: float = Field(default=60.0, gt=0, description="Seconds between telemetry history entries")
+    history_capacity: int = Field(
+        default=10080, ge=1, description="Maximum number of telemetry history entries kept on disk"
+    )
+    process_interval: float = Field(default=5.0, gt=0, description="Seconds between process usage samples")
+
+
+class JobConfig(BaseModel):
+    """Background job configuration model."""
+
+    timeout: float = Field(default=1800.0, gt=0, description="Seconds before a background job is stopped")
+    max_output_lines: int = Field(default=200, ge=1, description="Number of output lines kept for each job stream")
+    max_jobs: int = Field(default=20, ge=1, description="Number of finished jobs kept for status queries")
+
+
+class PackageUpdateConfig(BaseModel):
+    """Scheduled package update check configuration model."""
+
+    interval: float = Field(default=21600.0, gt=0, description="Seconds between package update checks")
+    low_priority: bool = Field(default=True, description="Run package update checks with idle CPU and I/O priority")
+
+
+class LoadGovernorConfig(BaseModel):
+    """Load governor configuration model."""
+
+    enabled: bool = Field(default=True, description="Whether to switch to cheaper modes under thermal or CPU pressure")
+    interval: float = Field(default=5.0, gt=0, description="Seconds between load checks")
+    window: float = Field(default=30.0, gt=0, description="Seconds of telemetry samples averaged for each load check")
+    temperature_high: float = Field(
+        default=75.0, description="CPU temperature in degrees Celsius at which the degraded mode starts"
+    )
+    temperature_low: float = Field(
+        default=65.0, description="CPU temperature in degrees Celsius below which the degraded mode may end"
+    )
+    cpu_high: float = Field(
+        default=90.0, ge=0, le=100, description="CPU usage percentage at which degraded mode starts"
+    )
+    cpu_low: float = Field(
+        default=60.0, ge=0, le=100, description="CPU usage percentage below which the degraded mode may end"
+    )
+    max_output_tokens: int = Field(default=300, gt=0, description="Maximum number of output tokens in degraded mode")
+    tool_workers: int = Field(default=1, gt=0, description="Maximum number of concurrent tool calls in degraded mode")
+    tts_workers: int = Field(
+        default=1, gt=0, description="Maximum number of sentences synthesised at the same time in degraded mode"
+    )
+    text_only_audio: bool = Field(default=True, description="Whether to reply to audio messages without speech")
+    disable_web_search: bool = Field(default=True, description="Whether to remove the web search tool")
+
+    @model_validator(mode="after")
+    def check_thresholds(self) -> LoadGovernorConfig:
+        """Check each low threshold is below its high threshold, so the degraded mode can end.
+
+        :return LoadGovernorConfig:
+            Validated configuration
+        :raise ValueError:
+            If a low threshold is not below its high threshold
+        """
+        if self.temperature_low >= self.temperature_high:
+            msg = f"temperature_low ({self.temperature_low}) must be below temperature_high ({self.temperature_high})"
+            raise ValueError(msg)
+        if self.cpu_low >= self.cpu_high:
+            msg = f"cpu_low ({self.cpu_low}) must be below cpu_high ({self.cpu_high})"
+            raise ValueError(msg)
+        return self
+
+
 class ChatbotServerConfig(TemplateServerConfig):
     """Chatbot server configuration model."""
 
@@ -245,6 +480,19 @@ class ChatbotServerConfig(TemplateServerConfig):
     embedding_config: EmbeddingConfig = Field(
         default_factory=EmbeddingConfig, description="Configuration for the embedding model"
     )
+    request_queue_config: RequestQueueConfig = Field(
+        default_factory=RequestQueueConfig, description="Configuration for the chat request queue"
+    )
+    telemetry_config: TelemetryConfig = Field(
+        default_factory=TelemetryConfig, description="Configuration for the system telemetry sampler"
+    )
+    job_config: JobConfig = Field(default_factory=JobConfig, description="Configuration for background jobs")
+    package_update_config: PackageUpdateConfig = Field(
+        default_factory=PackageUpdateConfig, description="Configuration for scheduled package update checks"
+    )
+    load_governor_config: LoadGovernorConfig = Field(
+        default_factory=LoadGovernorConfig, description="Configuration for degrading the chatbot under load"
+    )
 
 
 # Chatbot Server Response Models
@@ -270,3 +518,21 @@ class PostAudioResponse(BaseResponse):
     """Post audio response model."""
 
     reply: ChatbotSpeech
+
+
+class GetJobsResponse(BaseResponse):
+    """Get jobs response model."""
+
+    jobs: list[JobInfo]
+
+
+class GetJobResponse(BaseResponse):
+    """Get job response model."""
+
+    job: JobInfo
+
+
+class GetLoadResponse(BaseResponse):
+    """Get load governor state response model."""
+
+    load: LoadStatus
@@ -0,0 +1,127 @@
+"""Serialised request processing for the RPi AI application."""
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+type QueuedRequest = tuple[Callable[..., Any], tuple[Any, ...], asyncio.Future[Any]]
+
+
+class QueueFullError(Exception):
+    """Raised when a request queue cannot accept more work."""
+
+    def __init__(self, retry_after: int) -> None:
+        """Initialise the error with a suggested retry delay.
+
+        :param int retry_after:
+            Seconds the client should wait before retrying
+        """
+        super().__init__(f"Request queue is full, retry after {retry_after} seconds.")
+        self.retry_after = retry_after
+
+
+class RequestQueue:
+    """Bounded async queue which processes the requests of a conversation in order."""
+
+    DURATION_SMOOTHING: float = 0.2
+
+    def __init__(self, max_depth: int) -> None:
+        """Initialise the request queue.
+
+        :param int max_depth:
+            Maximum number of requests waiting behind the one being processed
+        """
+        self.max_depth = max_depth
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[QueuedRequest] | None = None
+        self._worker: asyncio.Task[None] | None = None
+        self._average_duration = 1.0
+
+    @property
+    def depth(self) -> int:
+        """Get the number of requests waiting to be processed."""
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def retry_after(self) -> int:
+        """Get the estimated number of seconds until the queue has room."""
+        return max(1, math.ceil(self._average_duration * (self.depth + 1)))
+
+    def _ensure_worker(self) -> asyncio.Queue[QueuedRequest]:
+        """Get the queue for the running event loop, starting its worker if needed.
+
+        :return asyncio.Queue:
+            Queue bound to the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_depth)
+            self._worker = loop.create_task(self._process(self._queue))
+        return self._queue
+
+    async def _process(self, queue: asyncio.Queue[QueuedRequest]) -> None:
+        """Process queued requests one at a time in a worker thread.
+
+        :param asyncio.Queue queue:
+            Queue to take requests from
+        """
+        while True:
+            func, args, future = await queue.get()
+            if future.cancelled():
+                queue.task_done()
+                continue
+
+            start = time.monotonic()
+            try:
+                result = await asyncio.to_thread(func, *args)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                duration = time.monotonic() - start
+                self._average_duration += self.DURATION_SMOOTHING * (duration - self._average_duration)
+                queue.task_done()
+
+    def enqueue[T](self, func: Callable[..., T], *args: object) -> asyncio.Future[T]:
+        """Queue a request without waiting for it to be processed.
+
+        :param Callable[..., T] func:
+            Blocking function to run
+        :param object args:
+            Positional arguments for the function
+        :return asyncio.Future[T]:
+            Future resolved with the result of the function
+        :raise QueueFullError:
+            If the queue is already at its maximum depth
+        """
+        queue = self._ensure_worker()
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait((func, args, future))
+        except asyncio.QueueFull as e:
+            logger.warning("Request queue full with %d pending requests.", self.depth)
+            raise QueueFullError(self.retry_after) from e
+        return future
+
+    async def submit[T](self, func: Callable[..., T], *args: object) -> T:
+        """Queue a request and wait for its result.
+
+        :param Callable[..., T] func:
+            Blocking function to run
+        :param object args:
+            Positional arguments for the function
+        :return T:
+            Result of the function
+        :raise QueueFullError:
+            If the queue is already at its maximum depth
+        """
+        return await self.enqueue(func, *args)
@@ -0,0 +1,170 @@
+"""Resilient model calls for the RPi AI application."""
+
+import logging
+import random
+import time
+from collections.abc import Callable
+
+import httpx
+from google.genai.errors import APIError, ServerError
+
+from rpi_ai.models import RetryConfig
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED_CODE = 429
+
+
+class ModelUnavailableError(Exception):
+    """Raised when no model was able to answer a request."""
+
+
+class CircuitBreaker:
+    """Circuit breaker tracking consecutive failures of a single model."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        """Initialise the circuit breaker.
+
+        :param int failure_threshold:
+            Consecutive failures before the circuit opens
+        :param float reset_timeout:
+            Seconds before an open circuit allows a trial request
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """Check whether requests should be routed around this model."""
+        if self._opened_at is None:
+            return False
+        return time.monotonic() - self._opened_at < self.reset_timeout
+
+    def record_success(self) -> None:
+        """Record a successful request and close the circuit."""
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit once the threshold is reached."""
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+class ModelCaller:
+    """Call models with jittered exponential backoff, a deadline and ordered fallback."""
+
+    def __init__(self, retry_config: RetryConfig) -> None:
+        """Initialise the model caller.
+
+        :param RetryConfig retry_config:
+            Retry and circuit breaker configuration
+        """
+        self._retry_config = retry_config
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def update_config(self, retry_config: RetryConfig) -> None:
+        """Update the retry configuration and reset all circuit breakers.
+
+        :param RetryConfig retry_config:
+            New retry configuration
+        """
+        self._retry_config = retry_config
+        self._breakers.clear()
+
+    def get_breaker(self, model: str) -> CircuitBreaker:
+        """Get the circuit breaker for a model, creating it if needed.
+
+        :param str model:
+            Model name
+        :return CircuitBreaker:
+            Circuit breaker for the model
+        """
+        if model not in self._breakers:
+            self._breakers[model] = CircuitBreaker(
+                failure_threshold=self._retry_config.failure_threshold,
+                reset_timeout=self._retry_config.reset_timeout,
+            )
+        return self._breakers[model]
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Get a full-jitter exponential backoff delay.
+
+        :param int attempt:
+            Zero-based attempt number
+        :return float:
+            Delay in seconds
+        """
+        ceiling = min(self._retry_config.max_delay, self._retry_config.base_delay * 2**attempt)
+        return random.uniform(0, ceiling)  # noqa: S311
+
+    @staticmethod
+    def _is_retryable(error: APIError) -> bool:
+        """Check whether an API error is transient.
+
+        :param APIError error:
+            Error raised by the API
+        :return bool:
+            Whether the request should be retried
+        """
+        return isinstance(error, ServerError) or error.code == RATE_LIMITED_CODE
+
+    def call[T](self, models: list[str], request: Callable[[str, float], T]) -> tuple[T, str]:
+        """Call the request with each model in order until one succeeds.
+
+        Each attempt is given the time left before the deadline as its timeout, so a slow request cannot run past it.
+
+        :param list[str] models:
+            Ordered list of models to try
+        :param Callable[[str, float], T] request:
+            Function sending the request to the given model, timing out after the given number of seconds
+        :return tuple[T, str]:
+            Request result and the model that answered
+        :raise ModelUnavailableError:
+            If every model failed or was skipped before the deadline, or a request timed out at the deadline
+        """
+        deadline = time.monotonic() + self._retry_config.deadline
+        last_error: APIError | None = None
+
+        for model in dict.fromkeys(models):
+            breaker = self.get_breaker(model)
+            if breaker.is_open:
+                logger.warning("Skipping model %s after repeated failures.", model)
+                continue
+
+            for attempt in range(self._retry_config.max_retries + 1):
+                try:
+                    result = request(model, max(0.0, deadline - time.monotonic()))
+                except httpx.TimeoutException as e:
+                    breaker.record_failure()
+                    logger.warning("Model %s did not answer before the request deadline.", model)
+                    msg = "No model answered the request before the deadline."
+                    raise ModelUnavailableError(msg) from e
+                except APIError as e:
+                    if not self._is_retryable(e):
+                        raise
+                    last_error = e
+                    breaker.record_failure()
+                    logger.warning("Model %s failed (attempt %d): %s", model, attempt + 1, e)
+
+                    delay = self._backoff_delay(attempt)
+                    if (
+                        breaker.is_open
+                        or attempt == self._retry_config.max_retries
+                        or time.monotonic() + delay >= deadline
+                    ):
+                        break
+                    time.sleep(delay)
+                else:
+                    breaker.record_success()
+                    return result, model
+
+            if time.monotonic() >= deadline:
+                logger.warning("Request deadline exceeded.")
+                break
+
+        msg = "No model available to answer the request."
+        raise ModelUnavailableError(msg) from last_error
@@ -17,6 +17,9 @@ from rpi_ai.models import (
     ChatMemoryEntry,
     ChatMemoryList,
     EmbeddingConfig,
+    JobInfo,
+    JobStatus,
+    RetryConfig,
 )
 
 
@@ -56,6 +59,13 @@ def mock_open_file() -> Generator[MagicMock]:
         yield mock_file
 
 
+@pytest.fixture(autouse=True)
+def mock_replace_file() -> Generator[MagicMock]:
+    """Mock the Path.replace() method."""
+    with patch("pathlib.Path.replace") as mock_replace:
+        yield mock_replace
+
+
 @pytest.fixture(autouse=True)
 def mock_env_vars() -> Generator[MagicMock]:
     """Mock environment variables for testing."""
@@ -74,6 +84,7 @@ def mock_chatbot_message_user_dict() -> dict:
         "message": "user message",
         "timestamp": 123,
         "is_user_message": True,
+        "model": None,
     }
 
 
@@ -84,6 +95,7 @@ def mock_chatbot_message_model_dict() -> dict:
         "message": "model message",
         "timestamp": 124,
         "is_user_message": False,
+        "model": None,
     }
 
 
@@ -108,6 +120,7 @@ def mock_chatbot_speech_dict() -> dict:
         "bytes": "audio_data",
         "message": "Hello, world!",
         "timestamp": 125,
+        "model": "test-model",
     }
 
 
@@ -157,15 +170,93 @@ def mock_chat_memory_list(mock_chat_memory_entry: ChatMemoryEntry) -> ChatMemory
     return ChatMemoryList(entries=[mock_chat_memory_entry])
 
 
+# Job Models
+@pytest.fixture
+def mock_job_info() -> JobInfo:
+    """Fixture to create a mock JobInfo instance."""
+    return JobInfo(
+        job_id="test-job",
+        name="test_job",
+        status=JobStatus.SUCCEEDED,
+        created_at=1234567890,
+        finished_at=1234567900,
+        return_code=0,
+        stdout="test_output",
+    )
+
+
 # Chatbot Server Configuration Models
 @pytest.fixture
-def mock_chatbot_config_dict() -> dict:
+def mock_retry_config_dict() -> dict:
+    """Fixture to provide a sample retry configuration dictionary."""
+    return {
+        "max_retries": 1,
+        "base_delay": 0.0,
+        "max_delay": 0.0,
+        "deadline": 5.0,
+        "failure_threshold": 3,
+        "reset_timeout": 60.0,
+    }
+
+
+@pytest.fixture
+def mock_tool_config_dict() -> dict:
+    """Fixture to provide a sample tool configuration dictionary."""
+    return {
+        "max_workers": 4,
+        "timeout": 5.0,
+        "timeouts": {},
+        "max_remote_calls": 3,
+        "result_limit": 10000,
+        "result_limits": {},
+        "token_budget": 100,
+        "token_budgets": {},
+        "max_stored_results": 5,
+    }
+
+
+@pytest.fixture
+def mock_tts_config_dict() -> dict:
+    """Fixture to provide a sample text-to-speech configuration dictionary."""
+    return {
+        "engine": "gtts",
+        "language": "en",
+        "gtts_tld": "co.uk",
+        "espeak_executable": "espeak-ng",
+        "espeak_voice": "en-gb",
+        "espeak_speed": 160,
+        "timeout": 10.0,
+        "max_workers": 2,
+        "cache_entries": 4,
+        "cache_dirpath": "tts_cache",
+        "cache_max_bytes": 1000,
+    }
+
+
+@pytest.fixture
+def mock_chatbot_config_dict(
+    mock_retry_config_dict: dict, mock_tool_config_dict: dict, mock_tts_config_dict: dict
+) -> dict:
     """Fixture to provide a sample configuration dictionary."""
     return {
         "model": "test-model",
+        "fallback_models": ["test-fallback-model"],
         "system_instruction": "test-instruction",
         "max_output_tokens": 50,
         "temperature": 0.7,
+        "retry_config": mock_retry_config_dict,
+        "tool_config": mock_tool_config_dict,
+        "tool_sets": [],
+        "tts_config": mock_tts_config_dict,
+        "audio_upload_config": {
+            "max_bytes": 1000,
+            "inline_max_bytes": 100,
+            "preprocess": True,
+            "preprocess_max_bytes": 500,
+            "sample_rate": 16000,
+            "silence_threshold_db": -40.0,
+            "silence_padding_ms": 200,
+        },
     }
 
 
@@ -180,6 +271,12 @@ def mock_embedding_config_dict() -> dict:
     }
 
 
+@pytest.fixture
+def mock_retry_config(mock_retry_config_dict: dict) -> RetryConfig:
+    """Fixture to create a mock RetryConfig instance."""
+    return RetryConfig.model_validate(mock_retry_config_dict)
+
+
 @pytest.fixture
 def mock_chatbot_config(mock_chatbot_config_dict: dict) -> ChatbotConfig:
     """Fixture to create a mock ChatbotConfig instance."""
@@ -233,7 +330,6 @@ def mock_chatbot(
         config_dir=Path("/mock/config/dir"),
         config=mock_chatbot_config,
         embedding_config=mock_embedding_config,
-        functions=[],
         memories=mock_chat_memory_list,
     )
 
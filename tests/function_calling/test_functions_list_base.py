@@ -0,0 +1,112 @@
+"""Unit tests for the rpi_ai.function_calling.functions_list_base module."""
+
+import inspect
+import math
+from collections.abc import Generator
+from typing import ClassVar
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from rpi_ai.function_calling.functions_list_base import FunctionsListBase
+from rpi_ai.metrics import TOOL_CACHE_REQUESTS
+
+mock_source = MagicMock()
+
+
+class MockFunctionsList(FunctionsListBase):
+    """Function list with cached functions for testing."""
+
+    CACHE_TTLS: ClassVar[dict[str, float]] = {"get_static": math.inf, "get_live": 5.0}
+
+    def setup_functions(self) -> None:
+        """Set up the test functions."""
+        self.functions = [MockFunctionsList.get_static, MockFunctionsList.get_live, MockFunctionsList.get_uncached]
+
+    @staticmethod
+    def get_static() -> str:
+        """Get a value which never changes."""
+        return str(mock_source.static())
+
+    @staticmethod
+    def get_live(key: str) -> str:
+        """Get a value which changes over time."""
+        return str(mock_source.live(key))
+
+    @staticmethod
+    def get_uncached() -> str:
+        """Get a value which is never cached."""
+        return str(mock_source.uncached())
+
+
+@pytest.fixture
+def mock_functions_list() -> MockFunctionsList:
+    """Fixture to create a MockFunctionsList instance with a fresh value source."""
+    mock_source.reset_mock()
+    return MockFunctionsList()
+
+
+@pytest.fixture
+def mock_monotonic() -> Generator[MagicMock]:
+    """Mock the time.monotonic method used for cache expiry."""
+    with patch("rpi_ai.function_calling.functions_list_base.time.monotonic") as mock:
+        mock.return_value = 0.0
+        yield mock
+
+
+class TestFunctionsListBase:
+    """Tests for the FunctionsListBase class."""
+
+    def test_wrapped_functions_keep_signature(self, mock_functions_list: MockFunctionsList) -> None:
+        """Test cached functions keep the name, docstring and signature used for function declarations."""
+        get_live = mock_functions_list.functions[1]
+        assert get_live.__name__ == "get_live"
+        assert get_live.__doc__ == MockFunctionsList.get_live.__doc__
+        assert inspect.signature(get_live) == inspect.signature(MockFunctionsList.get_live)
+        assert mock_functions_list.functions[2] is MockFunctionsList.get_uncached
+
+    def test_declarations(self, mock_functions_list: MockFunctionsList) -> None:
+        """Test a declaration is compiled for each function, including the cached ones."""
+        declarations = mock_functions_list.declarations
+        assert [declaration.name for declaration in declarations] == ["get_static", "get_live", "get_uncached"]
+        assert declarations[1].description == "Get a value which changes over time."
+        assert declarations[1].parameters_json_schema == {
+            "properties": {"key": {"type": "string"}},
+            "required": ["key"],
+            "type": "object",
+        }
+
+    def test_static_result_cached(self, mock_functions_list: MockFunctionsList, mock_monotonic: MagicMock) -> None:
+        """Test results with an infinite TTL are computed once."""
+        hits = TOOL_CACHE_REQUESTS.value(tool="get_static", result="hit")
+        get_static = mock_functions_list.functions[0]
+        get_static()
+        mock_monotonic.return_value = 1e9
+        get_static()
+        mock_source.static.assert_called_once()
+        assert TOOL_CACHE_REQUESTS.value(tool="get_static", result="hit") == hits + 1
+
+    def test_live_result_expires(self, mock_functions_list: MockFunctionsList, mock_monotonic: MagicMock) -> None:
+        """Test results are recomputed once their TTL has passed."""
+        get_live = mock_functions_list.functions[1]
+        get_live("a")
+        get_live("a")
+        assert mock_source.live.call_count == 1
+        mock_monotonic.return_value = 5.0
+        get_live("a")
+        assert mock_source.live.call_count == 2  # noqa: PLR2004
+
+    def test_cache_keyed_by_arguments(self, mock_functions_list: MockFunctionsList, mock_monotonic: MagicMock) -> None:
+        """Test calls with different arguments are cached separately."""
+        get_live = mock_functions_list.functions[1]
+        get_live("a")
+        get_live(key="b")
+        assert mock_source.live.call_count == 2  # noqa: PLR2004
+
+    def test_clear_cache(self, mock_functions_list: MockFunctionsList, mock_monotonic: MagicMock) -> None:
+        """Test clearing the cache forces results to be recomputed."""
+        get_static = mock_functions_list.functions[0]
+        get_static()
+        mock_functions_list.clear_cache()
+        get_static()
+        assert mock_source.static.call_count == 2  # noqa: PLR2004
@@ -0,0 +1,200 @@
+"""Unit tests for the rpi_ai.function_calling.job_manager module."""
+
+import sys
+import time
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from rpi_ai.function_calling.job_manager import STOP_GRACE_SECONDS, JobManager
+from rpi_ai.models import JobConfig, JobInfo, JobStatus
+
+WAIT_TIMEOUT = 10.0
+
+
+def python_command(code: str) -> list[str]:
+    """Get a command running Python code in a subprocess."""
+    return [sys.executable, "-c", code]
+
+
+@pytest.fixture
+def mock_job_manager() -> Generator[JobManager]:
+    """Fixture to create a JobManager instance."""
+    manager = JobManager(JobConfig(timeout=WAIT_TIMEOUT, max_output_lines=3, max_jobs=2))
+    yield manager
+    manager.shutdown()
+
+
+def is_running(pid: int) -> bool:
+    """Check whether a process is running, treating a zombie waiting to be reaped as stopped."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except FileNotFoundError:
+        return False
+    return "State:" in status and "State:\tZ" not in status
+
+
+def wait_for_job(manager: JobManager, job_id: str) -> JobInfo:
+    """Wait for a job to finish."""
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while (job := manager.get(job_id)) is not None and job.status in (JobStatus.PENDING, JobStatus.RUNNING):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert job is not None
+    return job
+
+
+class TestJobManager:
+    """Tests for the JobManager class."""
+
+    def test_submit_succeeds(self, mock_job_manager: JobManager) -> None:
+        """Test a job runs its commands in order and captures their output."""
+        job = mock_job_manager.submit("test", [python_command("print('first')"), python_command("print('second')")])
+        assert job.status in (JobStatus.PENDING, JobStatus.RUNNING)
+
+        job = wait_for_job(mock_job_manager, job.job_id)
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.return_code == 0
+        assert job.stdout == "first\nsecond"
+        assert job.finished_at is not None
+
+    def test_submit_stops_at_failure(self, mock_job_manager: JobManager) -> None:
+        """Test a failing command stops the job."""
+        job = mock_job_manager.submit(
+            "test",
+            [python_command("import sys; sys.stderr.write('failed'); sys.exit(2)"), python_command("print('skipped')")],
+        )
+        job = wait_for_job(mock_job_manager, job.job_id)
+        assert job.status == JobStatus.FAILED
+        assert job.return_code == 2  # noqa: PLR2004
+        assert job.stderr == "failed"
+        assert job.stdout == ""
+
+    def test_submit_missing_command(self, mock_job_manager: JobManager) -> None:
+        """Test a command which cannot be started fails the job."""
+        job = wait_for_job(mock_job_manager, mock_job_manager.submit("test", [["/missing/command"]]).job_id)
+        assert job.status == JobStatus.FAILED
+        assert job.stderr
+
+    def test_output_bounded(self, mock_job_manager: JobManager) -> None:
+        """Test only the most recent output lines are kept."""
+        job = mock_job_manager.submit("test", [python_command("for i in range(5): print(i)")])
+        job = wait_for_job(mock_job_manager, job.job_id)
+        assert job.stdout == "2\n3\n4"
+        assert job.truncated
+
+    def test_output_limit_override(self, mock_job_manager: JobManager) -> None:
+        """Test a job can keep more output lines than the configured limit."""
+        job = mock_job_manager.submit("test", [python_command("for i in range(5): print(i)")], max_output_lines=10)
+        job = wait_for_job(mock_job_manager, job.job_id)
+        assert job.stdout == "0\n1\n2\n3\n4"
+        assert not job.truncated
+
+    def test_wait(self, mock_job_manager: JobManager) -> None:
+        """Test waiting for a job returns it once it has finished."""
+        job = mock_job_manager.submit("test", [python_command("import time; time.sleep(0.1); print('done')")])
+        finished_job = mock_job_manager.wait(job.job_id, timeout=WAIT_TIMEOUT)
+        assert finished_job is not None
+        assert finished_job.status == JobStatus.SUCCEEDED
+        assert finished_job.stdout == "done"
+
+    def test_wait_unknown_job(self, mock_job_manager: JobManager) -> None:
+        """Test waiting for an unknown job returns None."""
+        assert mock_job_manager.wait("missing") is None
+
+    def test_timeout(self, mock_job_manager: JobManager) -> None:
+        """Test a job is stopped once its timeout passes."""
+        job = mock_job_manager.submit("test", [python_command("import time; time.sleep(10)")], timeout=0.1)
+        assert wait_for_job(mock_job_manager, job.job_id).status == JobStatus.TIMED_OUT
+
+    def test_cancel(self, mock_job_manager: JobManager) -> None:
+        """Test cancelling a running job stops its command before the job is reported as cancelled."""
+        job = mock_job_manager.submit(
+            "test", [python_command("import time; print('started', flush=True); time.sleep(10)")]
+        )
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while (running_job := mock_job_manager.get(job.job_id)) is not None and not running_job.stdout:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        assert mock_job_manager.cancel(job.job_id) is not None
+        cancelled_job = mock_job_manager.wait(job.job_id, timeout=WAIT_TIMEOUT)
+        assert cancelled_job is not None
+        assert cancelled_job.status == JobStatus.CANCELLED
+        assert cancelled_job.return_code is None
+
+    @pytest.mark.skipif(not Path("/proc").is_dir(), reason="Requires /proc to check processes")
+    def test_cancel_stops_child_processes(self, mock_job_manager: JobManager) -> None:
+        """Test cancelling a job also stops the processes its command started, as apt is started by sudo."""
+        child = (
+            "import subprocess, sys; print(subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']).pid)"
+        )
+        job = mock_job_manager.submit("test", [python_command(f"{child}; import time; time.sleep(30)")])
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while (running_job := mock_job_manager.get(job.job_id)) is not None and not running_job.stdout:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        assert running_job is not None
+        mock_job_manager.cancel(job.job_id)
+        # The child holds the output pipes open, so the job only finishes promptly once the child is stopped too
+        cancelled_job = mock_job_manager.wait(job.job_id, timeout=STOP_GRACE_SECONDS)
+        assert cancelled_job is not None
+        assert cancelled_job.status == JobStatus.CANCELLED
+        while is_running(int(running_job.stdout)):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    def test_output_line_too_long(self, mock_job_manager: JobManager) -> None:
+        """Test a job writing a line longer than the stream buffer fails rather than running forever."""
+        job = mock_job_manager.submit("test", [python_command("print('x' * 1_000_000)")])
+        job = wait_for_job(mock_job_manager, job.job_id)
+        assert job.status == JobStatus.FAILED
+        assert job.stderr
+
+    def test_exclusive_jobs_run_one_at_a_time(self, mock_job_manager: JobManager) -> None:
+        """Test an exclusive job waits for the running exclusive job to finish, while other jobs run at once."""
+        first = mock_job_manager.submit("first", [python_command("import time; time.sleep(0.3)")], exclusive=True)
+        second = mock_job_manager.submit("second", [python_command("print('second')")], exclusive=True)
+        other = mock_job_manager.submit("other", [python_command("print('other')")])
+
+        assert wait_for_job(mock_job_manager, other.job_id).status == JobStatus.SUCCEEDED
+        waiting_job = mock_job_manager.get(second.job_id)
+        assert waiting_job is not None
+        assert waiting_job.status == JobStatus.PENDING
+
+        first_job = wait_for_job(mock_job_manager, first.job_id)
+        second_job = wait_for_job(mock_job_manager, second.job_id)
+        assert second_job.status == JobStatus.SUCCEEDED
+        assert first_job.finished_at is not None
+        assert second_job.finished_at is not None
+        assert first_job.finished_at <= second_job.finished_at
+
+    def test_cancel_waiting_exclusive_job(self, mock_job_manager: JobManager) -> None:
+        """Test an exclusive job cancelled while waiting for its turn never runs."""
+        first = mock_job_manager.submit("first", [python_command("import time; time.sleep(0.3)")], exclusive=True)
+        second = mock_job_manager.submit("second", [python_command("print('second')")], exclusive=True)
+        mock_job_manager.cancel(second.job_id)
+
+        second_job = wait_for_job(mock_job_manager, second.job_id)
+        assert second_job.status == JobStatus.CANCELLED
+        assert second_job.stdout == ""
+        assert wait_for_job(mock_job_manager, first.job_id).status == JobStatus.SUCCEEDED
+
+    def test_cancel_unknown_job(self, mock_job_manager: JobManager) -> None:
+        """Test cancelling an unknown job returns None."""
+        assert mock_job_manager.cancel("missing") is None
+        assert mock_job_manager.get("missing") is None
+
+    def test_finished_jobs_pruned(self, mock_job_manager: JobManager) -> None:
+        """Test only the most recent finished jobs are kept."""
+        job_ids = []
+        for _ in range(3):
+            job_ids.append(mock_job_manager.submit("test", [python_command("pass")]).job_id)
+            wait_for_job(mock_job_manager, job_ids[-1])
+        mock_job_manager.submit("test", [python_command("pass")])
+
+        remaining = [job.job_id for job in mock_job_manager.list_jobs()]
+        assert job_ids[0] not in remaining
+        assert job_ids[1:] == remaining[:2]
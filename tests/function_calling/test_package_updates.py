@@ -0,0 +1,200 @@
+"""Unit tests for the rpi_ai.function_calling.package_updates module."""
+
+import threading
+import time
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from rpi_ai.function_calling.package_updates import (
+    LOW_PRIORITY_PREFIX,
+    MAX_OUTPUT_LINES,
+    PackageUpdateScheduler,
+)
+from rpi_ai.models import JobInfo, JobStatus, UpgradablePackage
+
+WAIT_TIMEOUT = 5.0
+
+APT_OUTPUT = "\n".join(
+    [
+        "Hit:1 http://deb.debian.org/debian bookworm InRelease",
+        "Listing...",
+        "curl/stable-security 7.88.1-10+deb12u8 arm64 [upgradable from: 7.88.1-10+deb12u7]",
+        "libssl3/stable-security 3.0.15-1~deb12u1 arm64 [upgradable from: 3.0.14-1~deb12u2]",
+    ]
+)
+
+
+@pytest.fixture
+def mock_jobs() -> Generator[MagicMock]:
+    """Mock the job manager used to run the package commands."""
+    with patch("rpi_ai.function_calling.package_updates.JOBS") as mock:
+        mock.submit.return_value = JobInfo(job_id="abc123", name="test", status=JobStatus.RUNNING, created_at=0)
+        mock.wait.return_value = JobInfo(
+            job_id="abc123",
+            name="test",
+            status=JobStatus.SUCCEEDED,
+            created_at=0,
+            finished_at=10,
+            return_code=0,
+            stdout=APT_OUTPUT,
+        )
+        yield mock
+
+
+@pytest.fixture
+def mock_scheduler() -> Generator[PackageUpdateScheduler]:
+    """Fixture to create a PackageUpdateScheduler instance."""
+    scheduler = PackageUpdateScheduler(interval=60.0)
+    yield scheduler
+    scheduler.stop()
+
+
+def wait_for_refreshes(scheduler: PackageUpdateScheduler, mock_jobs: MagicMock, count: int) -> None:
+    """Wait for a number of refreshes to have finished."""
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while mock_jobs.wait.call_count < count or scheduler.status.refreshing:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestPackageUpdateScheduler:
+    """Tests for the PackageUpdateScheduler class."""
+
+    def test_commands(self, mock_scheduler: PackageUpdateScheduler) -> None:
+        """Test the refresh commands run with idle priority."""
+        assert mock_scheduler.commands == [
+            [*LOW_PRIORITY_PREFIX, "/usr/bin/sudo", "/usr/bin/apt", "update"],
+            [*LOW_PRIORITY_PREFIX, "/usr/bin/sudo", "/usr/bin/apt", "list", "--upgradable"],
+        ]
+
+    def test_commands_normal_priority(self, mock_scheduler: PackageUpdateScheduler) -> None:
+        """Test the refresh commands run without a priority prefix when low priority is disabled."""
+        mock_scheduler.low_priority = False
+        assert mock_scheduler.commands == [
+            ["/usr/bin/sudo", "/usr/bin/apt", "update"],
+            ["/usr/bin/sudo", "/usr/bin/apt", "list", "--upgradable"],
+        ]
+
+    def test_parse_upgradable(self) -> None:
+        """Test parsing the upgradable packages from the apt output."""
+        assert PackageUpdateScheduler.parse_upgradable(APT_OUTPUT) == [
+            UpgradablePackage(
+                name="curl",
+                source="stable-security",
+                version="7.88.1-10+deb12u8",
+                architecture="arm64",
+                current_version="7.88.1-10+deb12u7",
+            ),
+            UpgradablePackage(
+                name="libssl3",
+                source="stable-security",
+                version="3.0.15-1~deb12u1",
+                architecture="arm64",
+                current_version="3.0.14-1~deb12u2",
+            ),
+        ]
+
+    def test_refresh(self, mock_scheduler: PackageUpdateScheduler, mock_jobs: MagicMock) -> None:
+        """Test a successful refresh stores the upgradable packages and the time of the check."""
+        status = mock_scheduler.refresh()
+
+        mock_jobs.submit.assert_called_once_with(
+            "refresh_package_updates", mock_scheduler.commands, max_output_lines=MAX_OUTPUT_LINES, exclusive=True
+        )
+        mock_jobs.wait.assert_called_once_with("abc123")
+        assert status == mock_scheduler.status
+        assert status.checked_at == 10  # noqa: PLR2004
+        assert [package.name for package in status.packages] == ["curl", "libssl3"]
+        assert not status.refreshing
+        assert status.error is None
+
+    def test_refresh_failed(self, mock_scheduler: PackageUpdateScheduler, mock_jobs: MagicMock) -> None:
+        """Test a failed refresh keeps the previous result and records the error."""
+        mock_scheduler.refresh()
+        mock_jobs.wait.return_value = mock_jobs.wait.return_value.model_copy(
+            update={"status": JobStatus.FAILED, "stderr": "E: Could not get lock"}
+        )
+
+        status = mock_scheduler.refresh()
+        assert status.checked_at == 10  # noqa: PLR2004
+        assert len(status.packages) == 2  # noqa: PLR2004
+        assert status.error == "Package update check failed: E: Could not get lock"
+        assert not status.refreshing
+
+    def test_request_refresh_not_running(self, mock_scheduler: PackageUpdateScheduler, mock_jobs: MagicMock) -> None:
+        """Test requesting a refresh while the scheduler is stopped runs a single refresh."""
+        mock_scheduler.request_refresh()
+        wait_for_refreshes(mock_scheduler, mock_jobs, 1)
+        mock_scheduler.stop()
+        assert mock_jobs.submit.call_count == 1
+        assert mock_scheduler.status.checked_at == 10  # noqa: PLR2004
+
+    def test_request_refresh_while_refreshing(
+        self, mock_scheduler: PackageUpdateScheduler, mock_jobs: MagicMock
+    ) -> None:
+        """Test requesting a refresh while a requested refresh is running keeps the thread of the running one."""
+        finished_job: JobInfo = mock_jobs.wait.return_value
+        release = threading.Event()
+
+        def slow_wait(_job_id: str) -> JobInfo:
+            release.wait(WAIT_TIMEOUT)
+            return finished_job
+
+        mock_jobs.wait.side_effect = slow_wait
+        mock_scheduler.request_refresh()
+        thread = mock_scheduler._thread
+        mock_scheduler.request_refresh()
+        assert mock_scheduler._thread is thread
+
+        release.set()
+        wait_for_refreshes(mock_scheduler, mock_jobs, 1)
+        assert mock_jobs.submit.call_count == 1
+
+    def test_request_refresh_thread_finishing(
+        self, mock_scheduler: PackageUpdateScheduler, mock_jobs: MagicMock
+    ) -> None:
+        """Test a refresh is skipped while the thread of the last requested refresh has not exited yet."""
+        release = threading.Event()
+        thread = threading.Thread(target=release.wait, args=(WAIT_TIMEOUT,), daemon=True)
+        thread.start()
+        mock_scheduler._thread = thread
+
+        mock_scheduler.request_refresh()
+        assert mock_scheduler._thread is thread
+        assert not mock_scheduler.status.refreshing
+        mock_jobs.submit.assert_not_called()
+        release.set()
+
+    def test_start_and_stop(self, mock_scheduler: PackageUpdateScheduler, mock_jobs: MagicMock) -> None:
+        """Test the scheduler refreshes when started and again when a refresh is requested."""
+        mock_scheduler.start(interval=60.0, low_priority=False)
+        assert mock_scheduler.is_running
+        assert not mock_scheduler.low_priority
+        wait_for_refreshes(mock_scheduler, mock_jobs, 1)
+
+        mock_scheduler.request_refresh()
+        wait_for_refreshes(mock_scheduler, mock_jobs, 2)
+
+        mock_scheduler.stop()
+        assert mock_jobs.submit.call_count == 2  # noqa: PLR2004
+        assert not mock_scheduler.is_running
+
+    def test_stop_cancels_refresh(self, mock_scheduler: PackageUpdateScheduler, mock_jobs: MagicMock) -> None:
+        """Test stopping the scheduler cancels a refresh in progress."""
+        finished_job: JobInfo = mock_jobs.wait.return_value
+
+        def slow_wait(_job_id: str) -> JobInfo:
+            time.sleep(0.2)
+            return finished_job
+
+        mock_jobs.wait.side_effect = slow_wait
+        mock_scheduler.start()
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while mock_scheduler.status.job_id is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        mock_scheduler.stop()
+        mock_jobs.cancel.assert_called_once_with("abc123")
@@ -1,21 +1,29 @@
 """Unit tests for the rpi_ai.function_calling.system_info module."""
 
-import subprocess
+import contextlib
 from collections.abc import Generator
 from datetime import datetime
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import MagicMock, Mock, create_autospec, patch
 
+import numpy as np
 import psutil
 import pytest
 
-from rpi_ai.function_calling.system_info import SystemInfo
+from rpi_ai.function_calling.system_info import SNAPSHOT_FUNCTIONS, SystemInfo
+from rpi_ai.models import JobInfo
 
 
 @pytest.fixture
-def mock_subprocess_run() -> Generator[MagicMock]:
-    """Mock the subprocess.run method to simulate command execution."""
-    with patch("rpi_ai.function_calling.system_info.subprocess.run") as mock:
-        mock.return_value.stdout = "test_output"
+def mock_jobs() -> Generator[MagicMock]:
+    """Mock the job manager used to run package commands."""
+    with patch("rpi_ai.function_calling.system_info.JOBS") as mock:
+        yield mock
+
+
+@pytest.fixture
+def mock_package_updates() -> Generator[MagicMock]:
+    """Mock the package update scheduler."""
+    with patch("rpi_ai.function_calling.system_info.PACKAGE_UPDATES") as mock:
         yield mock
 
 
@@ -66,7 +74,17 @@ def mock_boot_time() -> Generator[MagicMock]:
 def mock_process_iter() -> Generator[MagicMock]:
     """Mock the psutil.process_iter method to return a list of mock processes."""
     with patch("rpi_ai.function_calling.system_info.psutil.process_iter") as mock:
-        mock.return_value = [Mock(info={"pid": 1234, "name": "test_process", "username": "test_user"})]
+        mock.return_value = [
+            Mock(
+                info={
+                    "pid": 1234,
+                    "name": "test_process",
+                    "username": "test_user",
+                    "cpu_percent": 12.34,
+                    "memory_percent": 5.67,
+                }
+            )
+        ]
         yield mock
 
 
@@ -116,63 +134,65 @@ def mock_psutil_temperature() -> Generator[MagicMock]:
         yield mock
 
 
-def test_update_and_check_packages(mock_subprocess_run: MagicMock) -> None:
-    """Test the update_and_check_packages method."""
-    mock_subprocess_run.return_value.stderr = ""
-    response = SystemInfo.update_and_check_packages()
-    expected_update_commands = ["/usr/bin/sudo", "/usr/bin/apt", "update"]
-    expected_check_commands = ["/usr/bin/sudo", "/usr/bin/apt", "list", "--upgradable"]
-    mock_subprocess_run.assert_any_call(expected_update_commands, capture_output=True, text=True, check=True)
-    mock_subprocess_run.assert_any_call(expected_check_commands, capture_output=True, text=True, check=True)
-    assert response == {
-        "stdout": mock_subprocess_run.return_value.stdout,
-        "stderr": mock_subprocess_run.return_value.stderr,
-    }
+@pytest.fixture
+def mock_telemetry() -> Generator[MagicMock]:
+    """Mock the telemetry sampler to return predefined samples."""
+    with patch("rpi_ai.function_calling.system_info.TELEMETRY", spec=True) as mock:
+        yield mock
 
 
-def test_update_and_check_packages_fails(mock_subprocess_run: MagicMock) -> None:
-    """Test the update_and_check_packages method when it fails."""
-    mock_subprocess_run.side_effect = subprocess.CalledProcessError(1, "cmd", stderr="test_error", output="test_output")
-    response = SystemInfo.update_and_check_packages()
-    assert response == {"stdout": "test_output", "stderr": "test_error"}
+def test_update_and_check_packages(mock_package_updates: MagicMock) -> None:
+    """Test the update_and_check_packages method answers from the last scheduled check."""
+    assert SystemInfo.update_and_check_packages() == mock_package_updates.status.model_dump.return_value
+    mock_package_updates.request_refresh.assert_not_called()
 
 
-def test_upgrade_packages(mock_subprocess_run: MagicMock) -> None:
-    """Test the upgrade_packages method."""
-    mock_subprocess_run.return_value.stderr = ""
-    response = SystemInfo.upgrade_packages()
-    expected_commands = ["/usr/bin/sudo", "/usr/bin/apt", "upgrade", "-y"]
-    mock_subprocess_run.assert_called_once_with(expected_commands, capture_output=True, text=True, check=True)
-    assert response == {
-        "stdout": mock_subprocess_run.return_value.stdout,
-        "stderr": mock_subprocess_run.return_value.stderr,
-    }
+def test_update_and_check_packages_refresh(mock_package_updates: MagicMock) -> None:
+    """Test the update_and_check_packages method starts a new check when asked to refresh."""
+    assert SystemInfo.update_and_check_packages(refresh=True) == mock_package_updates.status.model_dump.return_value
+    mock_package_updates.request_refresh.assert_called_once()
 
 
-def test_upgrade_packages_fails(mock_subprocess_run: MagicMock) -> None:
-    """Test the upgrade_packages method when it fails."""
-    mock_subprocess_run.side_effect = subprocess.CalledProcessError(1, "cmd", stderr="test_error", output="test_output")
-    response = SystemInfo.upgrade_packages()
-    assert response == {"stdout": "test_output", "stderr": "test_error"}
+def test_upgrade_packages(mock_jobs: MagicMock) -> None:
+    """Test the upgrade_packages method starts an exclusive background job."""
+    assert SystemInfo.upgrade_packages() == mock_jobs.submit.return_value.model_dump.return_value
+    mock_jobs.submit.assert_called_once_with(
+        "upgrade_packages", [["/usr/bin/sudo", "/usr/bin/apt", "upgrade", "-y"]], exclusive=True
+    )
 
 
-def test_auto_remove_packages(mock_subprocess_run: MagicMock) -> None:
-    """Test the auto_remove_packages method."""
-    mock_subprocess_run.return_value.stderr = ""
-    response = SystemInfo.auto_remove_packages()
-    expected_commands = ["/usr/bin/sudo", "/usr/bin/apt", "autoremove", "-y"]
-    mock_subprocess_run.assert_called_once_with(expected_commands, capture_output=True, text=True, check=True)
-    assert response == {
-        "stdout": mock_subprocess_run.return_value.stdout,
-        "stderr": mock_subprocess_run.return_value.stderr,
-    }
+def test_auto_remove_packages(mock_jobs: MagicMock) -> None:
+    """Test the auto_remove_packages method starts an exclusive background job."""
+    assert SystemInfo.auto_remove_packages() == mock_jobs.submit.return_value.model_dump.return_value
+    mock_jobs.submit.assert_called_once_with(
+        "auto_remove_packages", [["/usr/bin/sudo", "/usr/bin/apt", "autoremove", "-y"]], exclusive=True
+    )
+
+
+def test_get_job_status(mock_jobs: MagicMock, mock_job_info: JobInfo) -> None:
+    """Test the get_job_status method."""
+    mock_jobs.get.return_value = mock_job_info
+    assert SystemInfo.get_job_status("test-job") == mock_job_info.model_dump(mode="json")
+    mock_jobs.get.assert_called_once_with("test-job")
+
+
+def test_get_job_status_unknown_job(mock_jobs: MagicMock) -> None:
+    """Test the get_job_status method with an unknown job."""
+    mock_jobs.get.return_value = None
+    assert SystemInfo.get_job_status("missing") == {"error": "No job found with ID missing."}
+
+
+def test_cancel_job(mock_jobs: MagicMock, mock_job_info: JobInfo) -> None:
+    """Test the cancel_job method."""
+    mock_jobs.cancel.return_value = mock_job_info
+    assert SystemInfo.cancel_job("test-job") == mock_job_info.model_dump(mode="json")
+    mock_jobs.cancel.assert_called_once_with("test-job")
 
 
-def test_auto_remove_packages_fails(mock_subprocess_run: MagicMock) -> None:
-    """Test the auto_remove_packages method when it fails."""
-    mock_subprocess_run.side_effect = subprocess.CalledProcessError(1, "cmd", stderr="test_error", output="test_output")
-    response = SystemInfo.auto_remove_packages()
-    assert response == {"stdout": "test_output", "stderr": "test_error"}
+def test_cancel_job_unknown_job(mock_jobs: MagicMock) -> None:
+    """Test the cancel_job method with an unknown job."""
+    mock_jobs.cancel.return_value = None
+    assert SystemInfo.cancel_job("missing") == {"error": "No job found with ID missing."}
 
 
 def test_get_os_info(mock_platform: MagicMock) -> None:
@@ -197,11 +217,42 @@ def test_get_uptime(mock_boot_time: MagicMock) -> None:
 
 
 def test_get_running_processes(mock_process_iter: MagicMock) -> None:
-    """Test the get_running_processes method."""
-    expected_result = {
-        mock_process_iter.return_value[0].pid: {"pid": 1234, "name": "test_process", "username": "test_user"}
+    """Test the get_running_processes method queries the processes when none have been sampled."""
+    assert SystemInfo.get_running_processes() == {
+        "total": 1,
+        "offset": 0,
+        "processes": [
+            {"pid": 1234, "name": "test_process", "username": "test_user", "cpu_percent": 12.3, "memory_percent": 5.7}
+        ],
     }
-    assert SystemInfo.get_running_processes() == expected_result
+
+
+def test_get_running_processes_from_telemetry(mock_telemetry: MagicMock) -> None:
+    """Test the get_running_processes method filters, sorts and pages the sampled processes."""
+    mock_telemetry.processes.return_value = [
+        {"pid": 1, "name": "python3", "username": "pi", "cpu_percent": 5.0, "memory_percent": 30.0},
+        {"pid": 2, "name": "Python", "username": "root", "cpu_percent": 50.0, "memory_percent": 10.0},
+        {"pid": 3, "name": "sshd", "username": "root", "cpu_percent": 1.0, "memory_percent": 1.0},
+        {"pid": 4, "name": None, "username": None, "cpu_percent": None, "memory_percent": None},
+    ]
+
+    result = SystemInfo.get_running_processes(limit=2)
+    assert result["total"] == 4  # noqa: PLR2004
+    assert [process["pid"] for process in result["processes"]] == [2, 1]
+
+    result = SystemInfo.get_running_processes(sort_by="memory_percent", offset=1, limit=2)
+    assert [process["pid"] for process in result["processes"]] == [2, 3]
+
+    result = SystemInfo.get_running_processes(name="PYTHON")
+    assert [process["pid"] for process in result["processes"]] == [2, 1]
+
+    result = SystemInfo.get_running_processes(username="root")
+    assert [process["pid"] for process in result["processes"]] == [2, 3]
+
+
+def test_get_running_processes_unknown_sort_key() -> None:
+    """Test the get_running_processes method returns an error for an unknown sort key."""
+    assert "error" in SystemInfo.get_running_processes(sort_by="name")
 
 
 def test_get_process_name_by_pid(mock_process: MagicMock) -> None:
@@ -222,6 +273,20 @@ def test_cpu_percent(mock_cpu_percent: MagicMock) -> None:
     assert SystemInfo.get_cpu_percent() == mock_cpu_percent.return_value
 
 
+def test_cpu_percent_from_telemetry(mock_telemetry: MagicMock, mock_cpu_percent: MagicMock) -> None:
+    """Test the get_cpu_percent method reads the latest telemetry sample without blocking."""
+    mock_telemetry.latest.return_value = np.array([10.0, 30.0])
+    assert SystemInfo.get_cpu_percent() == 20.0  # noqa: PLR2004
+    mock_telemetry.latest.assert_called_once_with("cpu_percent")
+    mock_cpu_percent.assert_not_called()
+
+
+def test_get_memory_usage_from_telemetry(mock_telemetry: MagicMock) -> None:
+    """Test the get_memory_usage method reads the latest telemetry sample."""
+    mock_telemetry.latest.return_value = np.array([100, 80, 20, 20.0])
+    assert SystemInfo.get_memory_usage() == {"total": 100, "available": 80, "used": 20, "percent": 20.0}
+
+
 def test_get_memory_usage(mock_virtual_memory: MagicMock) -> None:
     """Test the get_memory_usage method."""
     expected_result = {
@@ -244,6 +309,29 @@ def test_get_disk_usage(mock_disk_usage: MagicMock) -> None:
     assert SystemInfo.get_disk_usage() == expected_result
 
 
+def test_get_io_throughput(mock_telemetry: MagicMock) -> None:
+    """Test the get_io_throughput method."""
+    mock_telemetry.rates.side_effect = [np.array([1.0, 2.0]), np.array([3.0, 4.0])]
+    assert SystemInfo.get_io_throughput() == {
+        "disk_read_bytes_per_second": 1.0,
+        "disk_write_bytes_per_second": 2.0,
+        "network_bytes_sent_per_second": 3.0,
+        "network_bytes_recv_per_second": 4.0,
+    }
+
+
+def test_get_io_throughput_unavailable(mock_telemetry: MagicMock) -> None:
+    """Test the get_io_throughput method before enough telemetry samples are taken."""
+    mock_telemetry.rates.return_value = None
+    assert SystemInfo.get_io_throughput() == {"error": "System telemetry is not available yet."}
+
+
+def test_get_temperature_from_telemetry(mock_telemetry: MagicMock) -> None:
+    """Test the get_temperature method reads the latest telemetry sample."""
+    mock_telemetry.latest.return_value = np.array([45.0])
+    assert SystemInfo.get_temperature() == 45.0  # noqa: PLR2004
+
+
 def test_get_temperature(mock_psutil_temperature: MagicMock) -> None:
     """Test the get_temperature method."""
     assert (
@@ -256,3 +344,100 @@ def test_get_temperature_returns_none_on_error(mock_psutil_temperature: MagicMoc
     """Test the get_temperature method when it fails to retrieve temperature data."""
     mock_psutil_temperature.sensors_temperatures.side_effect = KeyError
     assert SystemInfo.get_temperature() is None
+
+
+@pytest.fixture
+def mock_snapshot_functions() -> Generator[dict[str, MagicMock]]:
+    """Mock the functions gathered by the system snapshot, keeping their names and signatures."""
+    return_values = {
+        "get_cpu_percent": 12.5,
+        "get_memory_usage": {"percent": 20.0},
+        "get_disk_usage": {"percent": 80.0},
+        "get_temperature": 45.0,
+        "get_uptime": "1:00:00",
+        "get_io_throughput": {"disk_read_bytes_per_second": 1.0},
+    }
+    mocks = {
+        name: create_autospec(getattr(SystemInfo, name), return_value=return_value)
+        for name, return_value in return_values.items()
+    }
+    with contextlib.ExitStack() as stack:
+        for name, mock in mocks.items():
+            stack.enter_context(patch.object(SystemInfo, name, mock))
+        yield {field: mocks[name] for field, name in SNAPSHOT_FUNCTIONS.items()}
+
+
+def test_get_system_snapshot(mock_snapshot_functions: dict[str, MagicMock]) -> None:
+    """Test the get_system_snapshot method gathers every field."""
+    assert SystemInfo().get_system_snapshot() == {
+        field: mock.return_value for field, mock in mock_snapshot_functions.items()
+    }
+
+
+def test_get_system_snapshot_selected_fields(mock_snapshot_functions: dict[str, MagicMock]) -> None:
+    """Test the get_system_snapshot method only gathers the requested fields."""
+    snapshot = SystemInfo().get_system_snapshot(["temperature", "cpu_percent"])
+    assert snapshot == {"temperature": 45.0, "cpu_percent": 12.5}
+    mock_snapshot_functions["memory"].assert_not_called()
+
+
+def test_get_system_snapshot_uses_cache(mock_snapshot_functions: dict[str, MagicMock]) -> None:
+    """Test the get_system_snapshot method answers fields with a cache TTL from the cache."""
+    system_info = SystemInfo()
+    system_info.get_system_snapshot(["disk", "cpu_percent"])
+    system_info.get_system_snapshot(["disk", "cpu_percent"])
+    mock_snapshot_functions["disk"].assert_called_once()
+    assert mock_snapshot_functions["cpu_percent"].call_count == 2  # noqa: PLR2004
+
+
+def test_get_system_snapshot_field_error(mock_snapshot_functions: dict[str, MagicMock]) -> None:
+    """Test a failing field returns an error without affecting the other fields."""
+    mock_snapshot_functions["disk"].side_effect = OSError("Disk unavailable")
+    snapshot = SystemInfo().get_system_snapshot(["disk", "uptime"])
+    assert snapshot == {"disk": {"error": "Disk unavailable"}, "uptime": "1:00:00"}
+
+
+def test_get_system_snapshot_unknown_field() -> None:
+    """Test the get_system_snapshot method returns an error for an unknown field."""
+    assert "error" in SystemInfo().get_system_snapshot(["battery"])
+
+
+def test_get_metric_history(mock_telemetry: MagicMock) -> None:
+    """Test the get_metric_history method."""
+    mock_telemetry.history.series.return_value = [(datetime(2025, 1, 1, 12).timestamp(), 42.123)]
+    assert SystemInfo.get_metric_history("temperature", hours=2, points=4) == {
+        "metric": "temperature",
+        "series": [{"time": "2025-01-01T12:00", "value": 42.12}],
+    }
+    _, start, end, points = mock_telemetry.history.series.call_args.args
+    assert end - start == 7200  # noqa: PLR2004
+    assert points == 4  # noqa: PLR2004
+
+
+def test_get_metric_history_unknown_metric(mock_telemetry: MagicMock) -> None:
+    """Test the get_metric_history method with an unknown metric."""
+    assert "error" in SystemInfo.get_metric_history("unknown")
+    mock_telemetry.history.series.assert_not_called()
+
+
+def test_get_metric_history_unavailable(mock_telemetry: MagicMock) -> None:
+    """Test the get_metric_history method when no history is recorded."""
+    mock_telemetry.history = None
+    assert SystemInfo.get_metric_history("cpu_percent") == {"error": "System metrics history is not available."}
+
+
+def test_get_metric_summary(mock_telemetry: MagicMock) -> None:
+    """Test the get_metric_summary method."""
+    summary = {"min": 1.0, "max": 3.0, "mean": 2.0, "p95": 2.9, "samples": 3}
+    mock_telemetry.history.summary.return_value = summary
+    response = SystemInfo.get_metric_summary("cpu_percent", hours=1)
+    assert response["metric"] == "cpu_percent"
+    assert response.items() >= summary.items()
+
+
+def test_get_metric_summary_no_data(mock_telemetry: MagicMock) -> None:
+    """Test the get_metric_summary method when there is no data in the window."""
+    mock_telemetry.history.summary.return_value = None
+    assert SystemInfo.get_metric_summary("cpu_percent", hours=1) == {
+        "error": "No cpu_percent history recorded in the last 1 hours."
+    }
@@ -0,0 +1,206 @@
+"""Unit tests for the rpi_ai.function_calling.telemetry module."""
+
+import time
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock, Mock, patch
+
+import numpy as np
+import pytest
+
+from rpi_ai.function_calling.telemetry import (
+    HISTORY_FIELDS,
+    PROCESS_FIELDS,
+    RingBuffer,
+    TelemetryHistory,
+    TelemetrySampler,
+)
+
+WAIT_TIMEOUT = 5.0
+
+
+def to_list(values: np.ndarray | None) -> list[float]:
+    """Convert a telemetry sample to a list, asserting it is available."""
+    assert values is not None
+    return list(values.tolist())
+
+
+@pytest.fixture
+def mock_psutil() -> Generator[MagicMock]:
+    """Mock the psutil module to return predefined telemetry."""
+    with patch("rpi_ai.function_calling.telemetry.psutil") as mock:
+        mock.cpu_count.return_value = 2
+        mock.cpu_percent.return_value = [10.0, 30.0]
+        mock.virtual_memory.return_value = Mock(total=100, available=80, used=20, percent=20.0)
+        mock.disk_io_counters.return_value = Mock(read_bytes=1000, write_bytes=2000)
+        mock.net_io_counters.return_value = Mock(bytes_sent=300, bytes_recv=400)
+        mock.sensors_temperatures.return_value = {"cpu_thermal": [Mock(current=45.0)]}
+        mock.process_iter.return_value = [
+            Mock(info={"pid": 1, "name": "init", "username": "root", "cpu_percent": 0.5, "memory_percent": 1.0})
+        ]
+        yield mock
+
+
+@pytest.fixture
+def mock_monotonic() -> Generator[MagicMock]:
+    """Mock the time.monotonic method used to timestamp samples."""
+    with patch("rpi_ai.function_calling.telemetry.time.monotonic") as mock:
+        mock.return_value = 0.0
+        yield mock
+
+
+@pytest.fixture
+def mock_telemetry_sampler(mock_psutil: MagicMock) -> Generator[TelemetrySampler]:
+    """Fixture to create a TelemetrySampler instance."""
+    sampler = TelemetrySampler(interval=0.01, buffer_size=3)
+    yield sampler
+    sampler.stop()
+
+
+@pytest.fixture
+def mock_telemetry_history(tmp_path: Path) -> TelemetryHistory:
+    """Fixture to create a TelemetryHistory instance with a few rows."""
+    history = TelemetryHistory(tmp_path / "history.npy", capacity=4)
+    for timestamp, cpu_percent in [(0.0, 10.0), (60.0, 20.0), (120.0, 30.0)]:
+        history.append([timestamp, cpu_percent, 50.0, np.nan, 70.0])
+    return history
+
+
+class TestRingBuffer:
+    """Tests for the RingBuffer class."""
+
+    def test_last(self) -> None:
+        """Test the most recent samples are returned oldest first."""
+        buffer = RingBuffer(size=3, width=1)
+        for value in range(5):
+            buffer.append([value])
+        assert len(buffer) == 3  # noqa: PLR2004
+        assert buffer.last(3)[:, 0].tolist() == [2, 3, 4]
+        assert buffer.last(1)[:, 0].tolist() == [4]
+
+    def test_last_empty(self) -> None:
+        """Test an empty buffer returns no samples."""
+        assert len(RingBuffer(size=3, width=2).last(2)) == 0
+
+
+class TestTelemetryHistory:
+    """Tests for the TelemetryHistory class."""
+
+    def test_persists_across_restarts(self, mock_telemetry_history: TelemetryHistory) -> None:
+        """Test rows are kept on disk and appends continue after the newest row."""
+        history = TelemetryHistory(mock_telemetry_history.filepath, capacity=4)
+        history.append([180.0, 40.0, 50.0, np.nan, 70.0])
+        history.append([240.0, 50.0, 50.0, np.nan, 70.0])
+        timestamps, values = history.window("cpu_percent", 0.0, 300.0)
+        assert timestamps.tolist() == [60.0, 120.0, 180.0, 240.0]
+        assert values.tolist() == [20.0, 30.0, 40.0, 50.0]
+
+    def test_resize_keeps_newest_rows(self, mock_telemetry_history: TelemetryHistory) -> None:
+        """Test changing the capacity keeps the newest rows."""
+        history = TelemetryHistory(mock_telemetry_history.filepath, capacity=2)
+        assert history.window("cpu_percent", 0.0, 300.0)[1].tolist() == [20.0, 30.0]
+        assert np.load(history.filepath).shape == (2, len(HISTORY_FIELDS))
+
+    def test_window_excludes_missing_values(self, mock_telemetry_history: TelemetryHistory) -> None:
+        """Test missing values are excluded from the window."""
+        assert len(mock_telemetry_history.window("temperature", 0.0, 300.0)[1]) == 0
+
+    def test_series(self, mock_telemetry_history: TelemetryHistory) -> None:
+        """Test values are averaged into evenly spaced buckets."""
+        assert mock_telemetry_history.series("cpu_percent", 0.0, 120.0, points=2) == [(0.0, 10.0), (60.0, 25.0)]
+
+    def test_summary(self, mock_telemetry_history: TelemetryHistory) -> None:
+        """Test values are aggregated over the window."""
+        summary = mock_telemetry_history.summary("cpu_percent", 0.0, 120.0)
+        assert summary is not None
+        assert summary["min"] == 10.0  # noqa: PLR2004
+        assert summary["max"] == 30.0  # noqa: PLR2004
+        assert summary["mean"] == 20.0  # noqa: PLR2004
+        assert summary["p95"] == pytest.approx(29.0)
+        assert summary["samples"] == 3  # noqa: PLR2004
+        assert mock_telemetry_history.summary("cpu_percent", 500.0, 600.0) is None
+
+
+class TestTelemetrySampler:
+    """Tests for the TelemetrySampler class."""
+
+    def test_latest_before_sampling(self, mock_telemetry_sampler: TelemetrySampler) -> None:
+        """Test no sample is available before the sampler has run."""
+        assert mock_telemetry_sampler.latest("cpu_percent") is None
+        assert mock_telemetry_sampler.rates("net_io") is None
+
+    def test_sample(self, mock_telemetry_sampler: TelemetrySampler, mock_psutil: MagicMock) -> None:
+        """Test a sample records every measurement."""
+        mock_telemetry_sampler.sample()
+        assert to_list(mock_telemetry_sampler.latest("cpu_percent")) == [10.0, 30.0]
+        assert to_list(mock_telemetry_sampler.latest("memory")) == [100, 80, 20, 20.0]
+        assert to_list(mock_telemetry_sampler.latest("temperature")) == [45.0]
+        mock_psutil.cpu_percent.assert_called_once_with(interval=None, percpu=True)
+
+    def test_sample_without_temperature(self, mock_telemetry_sampler: TelemetrySampler, mock_psutil: MagicMock) -> None:
+        """Test a missing temperature sensor is recorded as NaN."""
+        mock_psutil.sensors_temperatures.return_value = {}
+        mock_telemetry_sampler.sample()
+        temperature = mock_telemetry_sampler.latest("temperature")
+        assert temperature is not None
+        assert np.isnan(temperature[0])
+
+    def test_sample_processes(self, mock_telemetry_sampler: TelemetrySampler, mock_psutil: MagicMock) -> None:
+        """Test a process sample records the usage of every process."""
+        assert mock_telemetry_sampler.processes() is None
+        mock_telemetry_sampler.sample_processes()
+        assert mock_telemetry_sampler.processes() == [mock_psutil.process_iter.return_value[0].info]
+        mock_psutil.process_iter.assert_called_once_with(PROCESS_FIELDS)
+
+    def test_rates(
+        self, mock_telemetry_sampler: TelemetrySampler, mock_psutil: MagicMock, mock_monotonic: MagicMock
+    ) -> None:
+        """Test counter rates are calculated from the last two samples."""
+        mock_telemetry_sampler.sample()
+        mock_monotonic.return_value = 2.0
+        mock_psutil.net_io_counters.return_value = Mock(bytes_sent=500, bytes_recv=1000)
+        mock_telemetry_sampler.sample()
+        assert to_list(mock_telemetry_sampler.rates("net_io")) == [100.0, 300.0]
+
+    def test_mean(self, mock_telemetry_sampler: TelemetrySampler, mock_psutil: MagicMock) -> None:
+        """Test the mean covers the samples in the window and ignores missing values."""
+        assert mock_telemetry_sampler.mean("cpu_percent", 1.0) is None
+        mock_telemetry_sampler.sample()
+        mock_psutil.cpu_percent.return_value = [50.0, 70.0]
+        mock_psutil.sensors_temperatures.return_value = {}
+        mock_telemetry_sampler.sample()
+        assert mock_telemetry_sampler.mean("cpu_percent", 0.01) == 60.0  # noqa: PLR2004
+        assert mock_telemetry_sampler.mean("cpu_percent", 1.0) == 40.0  # noqa: PLR2004
+        assert mock_telemetry_sampler.mean("temperature", 1.0) == 45.0  # noqa: PLR2004
+
+    def test_start_and_stop(self, mock_telemetry_sampler: TelemetrySampler, mock_psutil: MagicMock) -> None:
+        """Test the sampler primes the CPU counters without storing them, samples after one interval and can stop."""
+        mock_telemetry_sampler.start(interval=0.01, buffer_size=5)
+        assert mock_telemetry_sampler.is_running
+        assert mock_telemetry_sampler.buffer_size == 5  # noqa: PLR2004
+        assert mock_telemetry_sampler.processes() is None
+        mock_psutil.cpu_percent.assert_called_with(interval=None, percpu=True)
+        mock_psutil.process_iter.assert_called_once_with(["cpu_percent"])
+
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while mock_telemetry_sampler.processes() is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert mock_telemetry_sampler.latest("cpu_percent") is not None
+        assert mock_psutil.cpu_percent.call_count >= 2  # noqa: PLR2004
+        mock_psutil.process_iter.assert_called_with(PROCESS_FIELDS)
+        mock_telemetry_sampler.stop()
+        assert not mock_telemetry_sampler.is_running
+
+    def test_record_history(
+        self, mock_telemetry_sampler: TelemetrySampler, mock_psutil: MagicMock, tmp_path: Path
+    ) -> None:
+        """Test the average of recent samples is recorded to the history store."""
+        mock_psutil.disk_usage.return_value = Mock(percent=70.0)
+        history = TelemetryHistory(tmp_path / "history.npy", capacity=4)
+        mock_telemetry_sampler.history = history
+        mock_telemetry_sampler.sample()
+        mock_telemetry_sampler.record_history()
+        assert history.window("cpu_percent", 0.0, float("inf"))[1].tolist() == [20.0]
+        assert history.window("temperature", 0.0, float("inf"))[1].tolist() == [45.0]
+        assert history.window("disk_percent", 0.0, float("inf"))[1].tolist() == [70.0]
@@ -0,0 +1,184 @@
+"""Unit tests for the rpi_ai.function_calling.tool_executor module."""
+
+import threading
+import time
+from collections.abc import Callable, Generator
+
+import pytest
+from google.genai.types import FunctionCall
+
+from rpi_ai.function_calling.tool_executor import ToolExecutor, count_stuck_workers
+from rpi_ai.function_calling.tool_results import ToolResultProcessor
+from rpi_ai.metrics import ERRORS, TOOL_DURATION, TOOL_STUCK_WORKERS
+
+WAIT_TIMEOUT = 5.0
+
+
+def add(a: int, b: int) -> int:
+    """Add two numbers."""
+    return a + b
+
+
+def echo(text: str) -> str:
+    """Return the text unchanged."""
+    return text
+
+
+def fail() -> None:
+    """Raise an error."""
+    msg = "Tool failed!"
+    raise ValueError(msg)
+
+
+@pytest.fixture
+def mock_release() -> Generator[threading.Event]:
+    """Fixture to provide an event which releases blocked tools."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def mock_hang(mock_release: threading.Event) -> Generator[Callable[[], None]]:
+    """Fixture to provide a tool which blocks until released, waiting for its stuck workers to finish afterwards."""
+
+    def hang() -> None:
+        """Block until released."""
+        mock_release.wait(WAIT_TIMEOUT)
+
+    yield hang
+    mock_release.set()
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while count_stuck_workers():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def mock_tool_executor(mock_hang: Callable[[], None]) -> Generator[ToolExecutor]:
+    """Fixture to create a ToolExecutor instance."""
+    barrier = threading.Barrier(2, timeout=WAIT_TIMEOUT)
+
+    def wait_for_other() -> str:
+        """Wait until another tool is running at the same time."""
+        barrier.wait()
+        return "done"
+
+    executor = ToolExecutor(
+        functions=[add, echo, fail, wait_for_other, mock_hang],
+        max_workers=4,
+        timeout=WAIT_TIMEOUT,
+        timeouts={"hang": 0.05},
+        result_limits={"echo": 2000},
+        result_processor=ToolResultProcessor(token_budget=10),
+    )
+    yield executor
+    executor.shutdown()
+
+
+class TestToolExecutor:
+    """Tests for the ToolExecutor class."""
+
+    def test_get_timeout(self, mock_tool_executor: ToolExecutor) -> None:
+        """Test per-tool timeouts override the default timeout."""
+        assert mock_tool_executor.get_timeout("hang") == 0.05  # noqa: PLR2004
+        assert mock_tool_executor.get_timeout("add") == WAIT_TIMEOUT
+
+    def test_get_result_limit(self, mock_tool_executor: ToolExecutor) -> None:
+        """Test per-tool result limits override the default limit."""
+        assert mock_tool_executor.get_result_limit("echo") == 2000  # noqa: PLR2004
+        assert mock_tool_executor.get_result_limit("add") == 100000  # noqa: PLR2004
+
+    def test_execute_in_order(self, mock_tool_executor: ToolExecutor) -> None:
+        """Test function responses are returned in the order of the calls."""
+        calls = TOOL_DURATION.count(tool="add")
+        parts = mock_tool_executor.execute(
+            [FunctionCall(name="add", args={"a": 1, "b": 2}), FunctionCall(name="add", args={"a": 3, "b": 4})]
+        )
+        assert [part.function_response.response for part in parts if part.function_response] == [
+            {"result": 3},
+            {"result": 7},
+        ]
+        assert TOOL_DURATION.count(tool="add") == calls + 2
+
+    def test_execute_concurrently(self, mock_tool_executor: ToolExecutor) -> None:
+        """Test independent function calls run at the same time."""
+        parts = mock_tool_executor.execute([FunctionCall(name="wait_for_other"), FunctionCall(name="wait_for_other")])
+        assert all(part.function_response and part.function_response.response == {"result": "done"} for part in parts)
+
+    def test_execute_timeout(self, mock_tool_executor: ToolExecutor) -> None:
+        """Test a hung tool returns an error without blocking the other results and its worker is replaced."""
+        errors = ERRORS.value(stage="tool", error="TimeoutError")
+        parts = mock_tool_executor.execute([FunctionCall(name="hang"), FunctionCall(name="add", args={"a": 1, "b": 1})])
+        responses = [part.function_response.response for part in parts if part.function_response]
+        assert responses[0] == {"error": "Tool hang timed out after 0.05 seconds."}
+        assert responses[1] == {"result": 2}
+        assert ERRORS.value(stage="tool", error="TimeoutError") == errors + 1
+        assert count_stuck_workers() == 1
+        assert TOOL_STUCK_WORKERS.value() == 1
+
+        parts = mock_tool_executor.execute([FunctionCall(name="wait_for_other"), FunctionCall(name="wait_for_other")])
+        assert all(part.function_response and part.function_response.response == {"result": "done"} for part in parts)
+
+    def test_stuck_workers_across_executors(
+        self, mock_tool_executor: ToolExecutor, mock_hang: Callable[[], None]
+    ) -> None:
+        """Test stuck workers are still counted after the executor is replaced."""
+        mock_tool_executor.execute([FunctionCall(name="hang")])
+        executor = ToolExecutor(functions=[mock_hang], max_workers=1, timeout=WAIT_TIMEOUT)
+        assert TOOL_STUCK_WORKERS.value() == 1
+        executor.shutdown()
+
+    def test_execute_timeout_max_stuck_workers(self, mock_hang: Callable[[], None]) -> None:
+        """Test the thread pool is no longer replaced once the maximum number of workers are stuck."""
+        executor = ToolExecutor(
+            functions=[mock_hang], max_workers=2, timeout=WAIT_TIMEOUT, timeouts={"hang": 0.05}, max_stuck_workers=1
+        )
+        executor.execute([FunctionCall(name="hang")])
+        pool = executor._executor
+        parts = executor.execute([FunctionCall(name="hang")])
+        assert parts[0].function_response
+        assert parts[0].function_response.response == {"error": "Tool hang timed out after 0.05 seconds."}
+        assert executor._executor is pool
+        assert count_stuck_workers() == 1
+        executor.shutdown()
+
+    def test_execute_result_too_large(self) -> None:
+        """Test a result over its size limit which cannot be shortened returns an error."""
+        executor = ToolExecutor(functions=[echo], max_workers=1, timeout=WAIT_TIMEOUT, result_limits={"echo": 2000})
+        errors = ERRORS.value(stage="tool", error="ResultTooLarge")
+        parts = executor.execute([FunctionCall(name="echo", args={"text": "a" * 3000})])
+        executor.shutdown()
+        assert parts[0].function_response
+        assert parts[0].function_response.response == {
+            "error": "Tool echo returned 3002 characters, over the limit of 2000."
+        }
+        assert ERRORS.value(stage="tool", error="ResultTooLarge") == errors + 1
+
+    def test_execute_error(self, mock_tool_executor: ToolExecutor) -> None:
+        """Test an exception raised by a tool is returned to the model."""
+        parts = mock_tool_executor.execute([FunctionCall(name="fail")])
+        assert parts[0].function_response
+        assert parts[0].function_response.response == {"error": "Tool failed!"}
+
+    def test_execute_unknown_tool(self, mock_tool_executor: ToolExecutor) -> None:
+        """Test an unknown tool returns an error."""
+        parts = mock_tool_executor.execute([FunctionCall(name="missing")])
+        assert parts[0].function_response
+        assert parts[0].function_response.response == {"error": "Unknown tool: missing"}
+
+    def test_execute_shortens_result(self, mock_tool_executor: ToolExecutor) -> None:
+        """Test results over their token budget are shortened before being returned."""
+        parts = mock_tool_executor.execute([FunctionCall(name="echo", args={"text": "line\n" * 100})])
+        assert parts[0].function_response
+        result = (parts[0].function_response.response or {})["result"]
+        assert result["truncated"]
+        assert result["original_tokens"] > 10  # noqa: PLR2004
+
+    def test_execute_shortens_result_over_size_limit(self, mock_tool_executor: ToolExecutor) -> None:
+        """Test a result over its size limit is shortened instead of rejected."""
+        parts = mock_tool_executor.execute([FunctionCall(name="echo", args={"text": "line\n" * 1000})])
+        assert parts[0].function_response
+        result = (parts[0].function_response.response or {})["result"]
+        assert result["truncated"]
+        assert result["result_id"]
@@ -0,0 +1,122 @@
+"""Unit tests for the rpi_ai.function_calling.tool_results module."""
+
+import json
+
+import pytest
+
+from rpi_ai.function_calling.tool_results import (
+    CHARS_PER_TOKEN,
+    ToolResultProcessor,
+    estimate_tokens,
+    extract_essentials,
+)
+from rpi_ai.metrics import TOOL_RESULTS_SHORTENED
+
+APT_UPGRADE_OUTPUT = "\n".join(
+    [
+        "Reading package lists...",
+        *[f"Get:{i} http://deb.debian.org/debian bookworm/main arm64 package{i} 1.0 [100 kB]" for i in range(50)],
+        "2 upgraded, 0 newly installed, 0 to remove and 1 not upgraded.",
+        "Unpacking curl (7.88.1-10+deb12u8) over (7.88.1-10+deb12u7) ...",
+        "Setting up curl (7.88.1-10+deb12u8) ...",
+        "Setting up libssl3:arm64 (3.0.15-1~deb12u1) ...",
+        "E: Sub-process /usr/bin/dpkg returned an error code (1)",
+    ]
+)
+TOKEN_BUDGET = 100
+
+
+@pytest.fixture
+def mock_tool_result_processor() -> ToolResultProcessor:
+    """Fixture to create a ToolResultProcessor instance."""
+    return ToolResultProcessor(token_budget=TOKEN_BUDGET, token_budgets={"large_tool": 10000}, max_results=2)
+
+
+def test_estimate_tokens() -> None:
+    """Test estimating the number of tokens in a text."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * (CHARS_PER_TOKEN + 1)) == 2  # noqa: PLR2004
+
+
+def test_extract_essentials() -> None:
+    """Test extracting the errors, packages and summary from apt output."""
+    assert extract_essentials(APT_UPGRADE_OUTPUT) == {
+        "error_lines": ["E: Sub-process /usr/bin/dpkg returned an error code (1)"],
+        "package_count": 2,
+        "package_names": ["curl", "libssl3"],
+        "apt_summary": {"upgraded": 2, "newly_installed": 0, "to_remove": 0, "not_upgraded": 1},
+    }
+
+
+def test_extract_essentials_upgradable_list() -> None:
+    """Test extracting the package names from the list of upgradable packages."""
+    output = "Listing...\ncurl/stable-security 7.88.1-10+deb12u8 arm64 [upgradable from: 7.88.1-10+deb12u7]"
+    assert extract_essentials(output) == {"package_count": 1, "package_names": ["curl"]}
+
+
+class TestToolResultProcessor:
+    """Tests for the ToolResultProcessor class."""
+
+    def test_get_budget(self, mock_tool_result_processor: ToolResultProcessor) -> None:
+        """Test per-tool budgets override the default budget."""
+        assert mock_tool_result_processor.get_budget("large_tool") == 10000  # noqa: PLR2004
+        assert mock_tool_result_processor.get_budget("other_tool") == TOKEN_BUDGET
+
+    def test_process_within_budget(self, mock_tool_result_processor: ToolResultProcessor) -> None:
+        """Test results within the budget are returned unchanged."""
+        result = {"status": "succeeded", "stdout": APT_UPGRADE_OUTPUT}
+        assert mock_tool_result_processor.process("large_tool", result) is result
+        assert mock_tool_result_processor.process("other_tool", "short") == "short"
+
+    def test_process_over_budget(self, mock_tool_result_processor: ToolResultProcessor) -> None:
+        """Test results over the budget keep their small fields, essentials and the end of their output."""
+        shortened = TOOL_RESULTS_SHORTENED.value(tool="upgrade_packages")
+        result = {"job_id": "abc123", "status": "failed", "stdout": APT_UPGRADE_OUTPUT, "truncated": False}
+
+        compact = mock_tool_result_processor.process("upgrade_packages", result)
+        assert compact["job_id"] == "abc123"
+        assert compact["status"] == "failed"
+        assert compact["truncated"]
+        assert compact["package_names"] == ["curl", "libssl3"]
+        assert compact["apt_summary"]["upgraded"] == 2  # noqa: PLR2004
+        assert compact["original_tokens"] == estimate_tokens(json.dumps(result))
+        assert APT_UPGRADE_OUTPUT.endswith(compact["stdout"])
+        assert TOOL_RESULTS_SHORTENED.value(tool="upgrade_packages") == shortened + 1
+
+    def test_process_list_over_budget(self, mock_tool_result_processor: ToolResultProcessor) -> None:
+        """Test long lists keep their count and first items."""
+        items = [{"name": f"package{i}"} for i in range(100)]
+        compact = mock_tool_result_processor.process("list_tool", {"packages": items})
+        assert compact["packages_count"] == len(items)
+        assert 0 < len(compact["packages"]) < len(items)
+        assert compact["packages"] == items[: len(compact["packages"])]
+
+    def test_get_tool_output(self, mock_tool_result_processor: ToolResultProcessor) -> None:
+        """Test the full output of a shortened result can be read in pages."""
+        compact = mock_tool_result_processor.process("upgrade_packages", APT_UPGRADE_OUTPUT)
+        page_size = TOKEN_BUDGET * CHARS_PER_TOKEN
+
+        page = mock_tool_result_processor.get_tool_output(compact["result_id"])
+        assert page["text"] == APT_UPGRADE_OUTPUT[:page_size]
+        assert page["next_offset"] == page_size
+        assert page["total_chars"] == len(APT_UPGRADE_OUTPUT)
+
+        text = page["text"]
+        while page["next_offset"] is not None:
+            page = mock_tool_result_processor.get_tool_output(compact["result_id"], page["next_offset"])
+            text += page["text"]
+        assert text == APT_UPGRADE_OUTPUT
+
+    def test_get_tool_output_not_shortened(self, mock_tool_result_processor: ToolResultProcessor) -> None:
+        """Test the pages of full output are never shortened themselves."""
+        page = {"text": APT_UPGRADE_OUTPUT}
+        assert mock_tool_result_processor.process("get_tool_output", page) is page
+
+    def test_get_tool_output_unknown(self, mock_tool_result_processor: ToolResultProcessor) -> None:
+        """Test reading an unknown or evicted output returns an error."""
+        result_ids = [
+            mock_tool_result_processor.process("upgrade_packages", APT_UPGRADE_OUTPUT)["result_id"] for _ in range(3)
+        ]
+        assert "error" in mock_tool_result_processor.get_tool_output(result_ids[0])
+        assert "error" not in mock_tool_result_processor.get_tool_output(result_ids[-1])
+        assert "error" in mock_tool_result_processor.get_tool_output("missing")
@@ -1,25 +1,88 @@
 """Unit tests for the rpi_ai.audiobot module."""
 
 import base64
+import os
+import subprocess
+import wave
+from collections.abc import Generator
 from io import BytesIO
-from unittest.mock import MagicMock
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
-from google.genai.types import Part
+import numpy as np
+import pytest
+from google.genai.types import File, Part
+from gtts import gTTSError
 
 from rpi_ai.audiobot import (
+    AUDIO_PROMPT,
+    EspeakEngine,
+    GTTSEngine,
+    SpeechPipeline,
+    TranscriptFilter,
+    TTSCache,
+    TTSError,
+    create_tts_engine,
     get_audio_bytes_from_text,
     get_audio_request,
-    preprocess_default_list,
-    preprocess_remove_asterisk,
-    preprocess_remove_emojis,
+    iter_audio_from_text,
+    normalise_speech_text,
+    preprocess_wav,
+    resample,
+    sniff_audio_mime_type,
+    split_sentences,
+    split_transcript,
+    trim_silence,
 )
+from rpi_ai.metrics import AUDIO_BYTES_SAVED, TTS_CACHE_REQUESTS, TTS_DURATION
+from rpi_ai.models import TTSConfig
+
+VAD_FRAME_SECONDS = 0.02
+
+
+@pytest.fixture(autouse=True)
+def mock_open_file() -> None:
+    """Use the real Path.open() so the cache writes to temporary directories."""
+
+
+@pytest.fixture
+def mock_subprocess_run() -> Generator[MagicMock]:
+    """Mock subprocess.run in the rpi_ai.audiobot module."""
+    with patch("rpi_ai.audiobot.subprocess.run") as mock:
+        mock.return_value = subprocess.CompletedProcess(args=[], returncode=0, stdout=b"RIFF audio", stderr=b"")
+        yield mock
+
+
+def create_wav(samples: np.ndarray, sample_rate: int, sample_width: int = 2) -> bytes:
+    """Create WAV audio data from samples between -1 and 1 with a channel in each column."""
+    if sample_width == 1:
+        frames = (samples * 127 + 128).astype(np.uint8).tobytes()
+    elif sample_width == 3:  # noqa: PLR2004
+        frames = (samples * (2**23 - 1)).astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    else:
+        frames = (samples * (2 ** (8 * sample_width - 1) - 1)).astype(f"<i{sample_width}").tobytes()
+    output = BytesIO()
+    with wave.open(output, "wb") as writer:
+        writer.setnchannels(samples.shape[1])
+        writer.setsampwidth(sample_width)
+        writer.setframerate(sample_rate)
+        writer.writeframes(frames)
+    return output.getvalue()
+
+
+def create_voice_clip(sample_rate: int) -> np.ndarray:
+    """Create a stereo clip of a half second tone between a second of silence either side."""
+    silence = np.zeros(sample_rate)
+    tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(sample_rate // 2) / sample_rate)
+    mono = np.concatenate([silence, tone, silence])
+    return np.column_stack([mono, mono])
 
 
 def test_get_audio_request() -> None:
     """Test the get_audio_request function."""
     audio_data = b"test_audio_data"
     expected_result = [
-        "Respond to the voice message.",
+        AUDIO_PROMPT,
         Part.from_bytes(
             data=audio_data,
             mime_type="audio/mp3",
@@ -29,6 +92,154 @@ def test_get_audio_request() -> None:
     assert result == expected_result
 
 
+def test_get_audio_request_uploaded_file() -> None:
+    """Test an uploaded file is referenced by its URI."""
+    file = File(uri="https://example.com/files/abc", mime_type="audio/ogg")
+    assert get_audio_request(file) == [
+        AUDIO_PROMPT,
+        Part.from_uri(file_uri="https://example.com/files/abc", mime_type="audio/ogg"),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("<transcript>What time is it?</transcript>\nIt is noon.", ("What time is it?", "It is noon.")),
+        ("  <transcript> Hi </transcript>Hello!", ("Hi", "Hello!")),
+        ("<transcript></transcript>Hello!", (None, "Hello!")),
+        ("It is noon.", (None, "It is noon.")),
+        ("Say <transcript>hi</transcript>", (None, "Say <transcript>hi</transcript>")),
+    ],
+)
+def test_split_transcript(text: str, expected: tuple[str | None, str]) -> None:
+    """Test the transcript is split from the start of a reply."""
+    assert split_transcript(text) == expected
+
+
+class TestTranscriptFilter:
+    """Unit tests for the TranscriptFilter class."""
+
+    def test_transcript_held_back(self) -> None:
+        """Test a transcript split across parts is held back and the text after it is passed on."""
+        on_text = MagicMock()
+        transcript_filter = TranscriptFilter(on_text)
+        for text in ["<trans", "cript>Hello", " there</transcript> ", "Hi", " user!"]:
+            transcript_filter.add_text(text)
+        transcript_filter.close()
+
+        assert transcript_filter.transcript == "Hello there"
+        assert [call.args[0] for call in on_text.call_args_list] == ["Hi", " user!"]
+
+    def test_no_transcript(self) -> None:
+        """Test text is passed on as soon as it cannot start with a transcript."""
+        on_text = MagicMock()
+        transcript_filter = TranscriptFilter(on_text)
+        transcript_filter.add_text("<tr")
+        on_text.assert_not_called()
+        transcript_filter.add_text("y this")
+        on_text.assert_called_once_with("<try this")
+        assert transcript_filter.transcript is None
+
+    def test_unclosed_transcript(self) -> None:
+        """Test text held back in a transcript which is never closed is passed on when the filter is closed."""
+        on_text = MagicMock()
+        transcript_filter = TranscriptFilter(on_text)
+        transcript_filter.add_text("<transcript>Hello")
+        transcript_filter.close()
+        transcript_filter.close()
+        on_text.assert_called_once_with("Hello")
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (b"RIFF\x24\x00\x00\x00WAVEfmt ", "audio/wav"),
+        (b"FORM\x00\x00\x00\x00AIFF", "audio/aiff"),
+        (b"\x00\x00\x00\x20ftypM4A ", "audio/mp4"),
+        (b"ID3\x04\x00", "audio/mp3"),
+        (b"\xff\xfb\x90\x64", "audio/mp3"),
+        (b"\xff\xf1\x50\x80", "audio/aac"),
+        (b"OggS\x00\x02", "audio/ogg"),
+        (b"fLaC\x00\x00", "audio/flac"),
+        (b"\x1a\x45\xdf\xa3\x9f", "audio/webm"),
+        (b"unknown", "audio/mp3"),
+    ],
+)
+def test_sniff_audio_mime_type(header: bytes, expected: str) -> None:
+    """Test the container type is detected from the first bytes of the audio."""
+    assert sniff_audio_mime_type(header) == expected
+
+
+def test_trim_silence() -> None:
+    """Test the silence either side of the speech is trimmed down to the padding."""
+    samples = create_voice_clip(1000)[:, 0]
+    trimmed = trim_silence(samples, 1000, threshold_db=-40.0, padding_ms=100)
+    assert len(trimmed) == 500 + 2 * 100
+    assert np.array_equal(trimmed[100:600], samples[1000:1500])
+
+
+def test_trim_silence_no_speech() -> None:
+    """Test audio without speech is kept in full."""
+    samples = np.zeros(1000)
+    assert trim_silence(samples, 1000, threshold_db=-40.0, padding_ms=100) is samples
+
+
+def test_resample() -> None:
+    """Test audio is resampled down to the target rate while keeping frequencies below its Nyquist frequency."""
+    samples = np.sin(2 * np.pi * 440 * np.arange(48000) / 48000)
+    resampled = resample(samples, 48000, 16000)
+    assert len(resampled) == 16000  # noqa: PLR2004
+    expected = np.sin(2 * np.pi * 440 * np.arange(16000) / 16000)
+    assert np.allclose(resampled[100:-100], expected[100:-100], atol=0.05)
+
+
+def test_resample_shorter_than_filter() -> None:
+    """Test audio shorter than the filter is still resampled to the target rate."""
+    assert len(resample(np.ones(3), 48000, 16000)) == 1
+
+
+def test_resample_not_above_target_rate() -> None:
+    """Test audio at or below the target rate is not resampled."""
+    samples = np.zeros(8000)
+    assert resample(samples, 8000, 16000) is samples
+
+
+@pytest.mark.parametrize("sample_width", [1, 2, 3, 4])
+def test_preprocess_wav(sample_width: int) -> None:
+    """Test WAV clips are trimmed, mixed down to mono and resampled to 16-bit audio at the target rate."""
+    audio = create_wav(create_voice_clip(48000), 48000, sample_width)
+    count = AUDIO_BYTES_SAVED.count()
+
+    processed = preprocess_wav(audio, sample_rate=16000, silence_threshold_db=-40.0, silence_padding_ms=200)
+    with wave.open(BytesIO(processed), "rb") as reader:
+        assert reader.getnchannels() == 1
+        assert reader.getsampwidth() == 2  # noqa: PLR2004
+        assert reader.getframerate() == 16000  # noqa: PLR2004
+        assert abs(reader.getnframes() - 16000 * 0.9) <= 16000 * VAD_FRAME_SECONDS
+    assert AUDIO_BYTES_SAVED.count() == count + 1
+
+
+@pytest.mark.parametrize("length", [50, -1])
+def test_preprocess_wav_truncated(length: int) -> None:
+    """Test clips which end part way through a frame are preprocessed from their whole frames."""
+    audio = create_wav(create_voice_clip(48000), 48000, sample_width=3)[:length]
+    with wave.open(BytesIO(preprocess_wav(audio, sample_rate=16000)), "rb") as reader:
+        assert reader.getnchannels() == 1
+        assert reader.getframerate() == 16000  # noqa: PLR2004
+
+
+def test_preprocess_wav_not_smaller() -> None:
+    """Test the original clip is kept when preprocessing would not make it smaller."""
+    audio = create_wav(np.full((1000, 1), 0.5), 8000, sample_width=1)
+    assert preprocess_wav(audio, sample_rate=16000) == audio
+
+
+def test_preprocess_wav_invalid() -> None:
+    """Test clips which cannot be read as PCM WAV files are sent unprocessed."""
+    audio = b"RIFF\x00\x00\x00\x00WAVEnot a wav file"
+    assert preprocess_wav(audio) == audio
+
+
 def test_get_audio_bytes_from_text(mock_gtts: MagicMock) -> None:
     """Test the get_audio_bytes_from_text function."""
     text = "Hello, world!"
@@ -45,26 +256,313 @@ def test_get_audio_bytes_from_text(mock_gtts: MagicMock) -> None:
         text,
         lang="en",
         tld="co.uk",
-        pre_processor_funcs=[
-            *preprocess_default_list(),
-            preprocess_remove_asterisk,
-            preprocess_remove_emojis,
-        ],
+        pre_processor_funcs=[],
     )
     mock_gtts_instance.write_to_fp.assert_called_once()
 
 
-def test_preprocess_remove_asterisk() -> None:
-    """Test the preprocess_remove_asterisk function."""
-    text = "Hello *world*!"
-    expected_result = "Hello world!"
-    result = preprocess_remove_asterisk(text)
-    assert result == expected_result
+def test_get_audio_bytes_from_text_records_engine(mock_subprocess_run: MagicMock) -> None:
+    """Test converting text with a selected engine records the synthesis duration for that engine."""
+    count = TTS_DURATION.count(engine="espeak")
+    result = get_audio_bytes_from_text("Hello", EspeakEngine(TTSConfig(engine="espeak")))
+    assert result == base64.b64encode(b"RIFF audio").decode("utf-8")
+    assert TTS_DURATION.count(engine="espeak") == count + 1
 
 
-def test_preprocess_remove_emojis() -> None:
-    """Test the preprocess_remove_emojis function."""
-    text = "Hello 🌍!"
-    expected_result = "Hello !"
-    result = preprocess_remove_emojis(text)
-    assert result == expected_result
+def test_get_audio_bytes_from_text_cached(mock_subprocess_run: MagicMock) -> None:
+    """Test repeated text is synthesised once and then returned from the cache."""
+    engine = EspeakEngine(TTSConfig(engine="espeak"))
+    cache = TTSCache()
+    hits = TTS_CACHE_REQUESTS.value(engine="espeak", result="hit")
+
+    first = get_audio_bytes_from_text("Hello *world*", engine, cache)
+    second = get_audio_bytes_from_text("Hello world", engine, cache)
+    assert first == second == base64.b64encode(b"RIFF audio").decode("utf-8")
+    mock_subprocess_run.assert_called_once()
+    assert TTS_CACHE_REQUESTS.value(engine="espeak", result="hit") == hits + 1
+
+
+def test_get_audio_bytes_from_text_sentences() -> None:
+    """Test sentences are synthesised once each and their audio is joined in order."""
+    engine = MagicMock(spec=GTTSEngine, NAME="gtts")
+    engine.preprocess.side_effect = GTTSEngine.preprocess
+    engine.join.side_effect = GTTSEngine.join
+    engine.synthesise.side_effect = lambda sentence: sentence[0].encode()
+
+    result = get_audio_bytes_from_text("One. Two!\nOne. Three?", engine, max_workers=3)
+    assert base64.b64decode(result) == b"OTOT"
+    assert sorted(call.args[0] for call in engine.synthesise.call_args_list) == ["One.", "Three?", "Two!"]
+
+
+def test_iter_audio_from_text_normalised_once(mock_gtts: MagicMock) -> None:
+    """Test the text is normalised once rather than again for each sentence's cache key and synthesis."""
+    mock_gtts.return_value.write_to_fp.side_effect = lambda fp: fp.write(b"mp3")
+    with patch("rpi_ai.audiobot.normalise_speech_text", wraps=normalise_speech_text) as mock_normalise:
+        assert list(iter_audio_from_text("*One*. Two.", GTTSEngine(TTSConfig()), TTSCache(), max_workers=1)) == [
+            b"mp3",
+            b"mp3",
+        ]
+    mock_normalise.assert_called_once_with("*One*. Two.")
+    assert [call.args[0] for call in mock_gtts.call_args_list] == ["One.", "Two."]
+
+
+def test_get_audio_bytes_from_text_sentence_error() -> None:
+    """Test an error synthesising any sentence is raised."""
+    engine = MagicMock(spec=GTTSEngine, NAME="gtts")
+    engine.preprocess.side_effect = GTTSEngine.preprocess
+    engine.synthesise.side_effect = ["audio", TTSError("TTS error")]
+    with pytest.raises(TTSError, match="TTS error"):
+        get_audio_bytes_from_text("One. Two.", engine, max_workers=1)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [("Sure! :)", [b"S"]), ("Hello. ... Bye.", [b"H", b"B"]), ("... :)", [])],
+)
+def test_iter_audio_from_text_punctuation_only(text: str, expected: list[bytes]) -> None:
+    """Test fragments with nothing to speak, such as an emoticon or an ellipsis, are not synthesised."""
+    engine = MagicMock(spec=GTTSEngine, NAME="gtts", STREAMABLE=True)
+    engine.preprocess.side_effect = GTTSEngine.preprocess
+    engine.synthesise.side_effect = lambda sentence: sentence[0].encode()
+    assert list(iter_audio_from_text(text, engine, max_workers=2)) == expected
+    assert all(call.args[0][0].isalnum() for call in engine.synthesise.call_args_list)
+
+
+def test_iter_audio_from_text_not_streamable(mock_subprocess_run: MagicMock) -> None:
+    """Test engines which cannot be streamed yield the whole text as one chunk."""
+    engine = EspeakEngine(TTSConfig(engine="espeak"))
+    with patch.object(EspeakEngine, "join", return_value=b"joined") as mock_join:
+        assert list(iter_audio_from_text("One. Two.", engine, max_workers=2)) == [b"joined"]
+    mock_join.assert_called_once_with([b"RIFF audio", b"RIFF audio"])
+
+
+class TestSpeechPipeline:
+    """Unit tests for the SpeechPipeline class."""
+
+    @pytest.fixture
+    def mock_engine(self) -> MagicMock:
+        """Fixture to create an engine which returns the sentence as its audio."""
+        engine = MagicMock(spec=GTTSEngine, NAME="gtts", STREAMABLE=True)
+        engine.preprocess.side_effect = GTTSEngine.preprocess
+        engine.join.side_effect = GTTSEngine.join
+        engine.synthesise.side_effect = lambda sentence: sentence.encode()
+        return engine
+
+    def test_sentences_streamed_in_order(self, mock_engine: MagicMock) -> None:
+        """Test text split across additions is synthesised per sentence and yielded in order."""
+        pipeline = SpeechPipeline(mock_engine, max_workers=2)
+        chunks = iter(pipeline)
+        pipeline.add_text("Hello *there*")
+        pipeline.add_text(". How are")
+        assert next(chunks) == b"Hello there."
+
+        pipeline.add_text(" you?\nHello there. Bye")
+        pipeline.close()
+        pipeline.add_text("Ignored.")
+        assert list(chunks) == [b"How are you?", b"Hello there.", b"Bye"]
+        assert mock_engine.synthesise.call_count == 3  # noqa: PLR2004
+
+    def test_code_block_across_sentences(self, mock_engine: MagicMock) -> None:
+        """Test code blocks which arrive over several sentences are not spoken."""
+        pipeline = SpeechPipeline(mock_engine, max_workers=1)
+        pipeline.add_text("Try this:\n```python\nx = 1\n")
+        pipeline.add_text("print(x)\n``` It prints 1.\n- Done")
+        pipeline.close()
+        assert list(pipeline) == [b"Try this:", b"It prints 1.", b"Done"]
+
+    def test_punctuation_only(self, mock_engine: MagicMock) -> None:
+        """Test fragments with nothing to speak are not synthesised."""
+        pipeline = SpeechPipeline(mock_engine, max_workers=1)
+        pipeline.add_text("Hello. ... Bye. :)")
+        pipeline.close()
+        assert list(pipeline) == [b"Hello.", b"Bye."]
+
+    def test_not_streamable(self, mock_engine: MagicMock) -> None:
+        """Test engines which cannot be streamed yield the joined audio once the pipeline is closed."""
+        mock_engine.STREAMABLE = False
+        pipeline = SpeechPipeline(mock_engine)
+        pipeline.add_text("One. Two.")
+        pipeline.close()
+        assert list(pipeline) == [b"One.Two."]
+
+    def test_tts_error(self, mock_engine: MagicMock) -> None:
+        """Test the audio ends with an error at the first sentence which fails to synthesise."""
+        mock_engine.synthesise.side_effect = [b"One.", TTSError("TTS error"), b"Three."]
+        pipeline = SpeechPipeline(mock_engine, max_workers=1)
+        pipeline.add_text("One. Two. Three.")
+        pipeline.close()
+        chunks = iter(pipeline)
+        assert next(chunks) == b"One."
+        with pytest.raises(TTSError, match="TTS error"):
+            next(chunks)
+
+    def test_cancel(self, mock_engine: MagicMock) -> None:
+        """Test cancelling the pipeline ends the audio without synthesising the remaining text."""
+        pipeline = SpeechPipeline(mock_engine, max_workers=1)
+        chunks = iter(pipeline)
+        pipeline.add_text("One. Two")
+        assert next(chunks) == b"One."
+
+        pipeline.cancel()
+        pipeline.add_text(". Three.")
+        assert list(chunks) == []
+        mock_engine.synthesise.assert_called_once_with("One.")
+
+
+def test_split_sentences() -> None:
+    """Test text is split at sentence-ending punctuation and line breaks."""
+    assert split_sentences("Hi there! It is 3.5 degrees.\n\nAnything else?  ") == [
+        "Hi there!",
+        "It is 3.5 degrees.",
+        "Anything else?",
+    ]
+
+
+def test_split_sentences_punctuation_only() -> None:
+    """Test fragments without a word character are dropped."""
+    assert split_sentences("Hello. ... Bye! :)") == ["Hello.", "Bye!"]
+
+
+def test_espeak_engine_join() -> None:
+    """Test WAV files are joined into one file with a single header."""
+
+    def wav(frames: bytes) -> bytes:
+        output = BytesIO()
+        with wave.open(output, "wb") as writer:
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(22050)
+            writer.writeframes(frames)
+        return output.getvalue()
+
+    joined = EspeakEngine.join([wav(b"\x01\x00"), wav(b"\x02\x00\x03\x00")])
+    with wave.open(BytesIO(joined), "rb") as reader:
+        assert reader.getframerate() == 22050  # noqa: PLR2004
+        assert reader.readframes(reader.getnframes()) == b"\x01\x00\x02\x00\x03\x00"
+
+
+def test_create_tts_engine() -> None:
+    """Test creating the engine selected in the configuration."""
+    assert isinstance(create_tts_engine(TTSConfig()), GTTSEngine)
+    assert isinstance(create_tts_engine(TTSConfig(engine="espeak")), EspeakEngine)
+
+
+def test_gtts_engine_error(mock_gtts: MagicMock) -> None:
+    """Test gTTS errors are raised as TTSError."""
+    mock_gtts.return_value.write_to_fp.side_effect = gTTSError("gTTS error")
+    with pytest.raises(TTSError, match="gTTS error"):
+        GTTSEngine(TTSConfig()).synthesise("Hello")
+
+
+def test_gtts_engine_nothing_to_speak() -> None:
+    """Test text which gTTS finds nothing to speak in is raised as TTSError."""
+    with pytest.raises(TTSError, match="No text to send"):
+        GTTSEngine(TTSConfig()).synthesise(":")
+
+
+def test_espeak_engine_synthesise(mock_subprocess_run: MagicMock) -> None:
+    """Test espeak-ng is run with the configured voice and speed and the text on stdin."""
+    config = TTSConfig(engine="espeak", espeak_voice="en-us", espeak_speed=180, timeout=5.0)
+    assert EspeakEngine(config).synthesise("Hello world") == b"RIFF audio"
+    mock_subprocess_run.assert_called_once_with(
+        ["espeak-ng", "--stdout", "-v", "en-us", "-s", "180"],
+        input=b"Hello world",
+        capture_output=True,
+        check=True,
+        timeout=5.0,
+    )
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        FileNotFoundError("espeak-ng"),
+        subprocess.CalledProcessError(1, "espeak-ng"),
+        subprocess.TimeoutExpired("espeak-ng", 5.0),
+    ],
+)
+def test_espeak_engine_error(mock_subprocess_run: MagicMock, error: Exception) -> None:
+    """Test espeak-ng failures are raised as TTSError."""
+    mock_subprocess_run.side_effect = error
+    with pytest.raises(TTSError, match="espeak-ng failed"):
+        EspeakEngine(TTSConfig(engine="espeak")).synthesise("Hello")
+
+
+def test_cache_key() -> None:
+    """Test cache keys depend on the text, engine and voice."""
+    engine = GTTSEngine(TTSConfig())
+    assert engine.cache_key("Hello") == engine.cache_key("Hello")
+    assert engine.cache_key("Hello") != engine.cache_key("Hello world")
+    assert engine.cache_key("Hello") != GTTSEngine(TTSConfig(gtts_tld="com")).cache_key("Hello")
+    assert engine.cache_key("Hello") != EspeakEngine(TTSConfig()).cache_key("Hello")
+
+
+class TestTTSCache:
+    """Unit tests for the TTSCache class."""
+
+    def test_memory_lru(self) -> None:
+        """Test the least recently used entry is evicted from memory."""
+        cache = TTSCache(max_entries=2)
+        cache.put("a", b"a")
+        cache.put("b", b"b")
+        cache.get("a")
+        cache.put("c", b"c")
+        assert cache.get("a") == b"a"
+        assert cache.get("b") is None
+
+    def test_disk_tier(self, tmp_path: Path) -> None:
+        """Test entries evicted from memory are read back from disk."""
+        cache = TTSCache(max_entries=1, directory=tmp_path / "tts_cache")
+        cache.put("a", b"audio")
+        cache.put("b", b"other")
+        assert (tmp_path / "tts_cache" / "a").read_bytes() == b"audio"
+        assert cache.get("a") == b"audio"
+        assert TTSCache(directory=tmp_path / "tts_cache").get("b") == b"other"
+
+    def test_disk_size_limit(self, tmp_path: Path) -> None:
+        """Test the least recently used files are removed once the disk tier is over its size limit."""
+        cache = TTSCache(max_entries=0, directory=tmp_path, max_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        os.utime(tmp_path / "a", (2000, 2000))
+        os.utime(tmp_path / "b", (1000, 1000))
+        cache.put("c", b"12345")
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["a", "c"]
+
+    def test_disk_write_error(self, tmp_path: Path) -> None:
+        """Test audio is still cached in memory when the disk tier cannot be written."""
+        (tmp_path / "file").write_text("")
+        cache = TTSCache(directory=tmp_path / "file" / "tts_cache")
+        cache.put("a", b"audio")
+        assert cache.get("a") == b"audio"
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Hello *world*! `code` 🌍", "Hello world! code"),
+        ("Héllo, ça va? Très bien 👍🏽", "Héllo, ça va? Très bien"),
+        ("# Title\n## Subtitle\nText", "Title\nSubtitle\nText"),
+        ("- One\n* Two\n  + Three\n1. Four\n2) Five\n> Quote", "One\nTwo\nThree\nFour\nFive\nQuote"),
+        ("Run this:\n```python\nprint('hi')\n```\nDone.", "Run this:\n\nDone."),
+        ("Unfinished:\n```\ncode", "Unfinished:"),
+        ("See [the docs](https://example.com) and ![a cat](cat.png).", "See the docs and a cat."),
+        ("Above\n---\nBelow", "Above\n\nBelow"),
+        ("| a | b |", "a   b"),
+        ("Dr. Smith and John Doe, Esq. met", "Dr Smith and John Doe, Esquire met"),
+        ("Really?!Yes", "Really?! Yes"),
+        ("hyphen-\nated", "hyphenated"),
+        ("-5 degrees", "-5 degrees"),
+        ("2024. Was a year", "2024. Was a year"),
+        ("See [docs](http://x.com/a_(b)).", "See docs."),
+    ],
+)
+def test_normalise_speech_text(text: str, expected: str) -> None:
+    """Test markdown, emojis and unspoken characters are removed while accented characters are kept."""
+    assert normalise_speech_text(text) == expected
+
+
+def test_normalise_speech_text_idempotent() -> None:
+    """Test normalising text twice gives the same text, so sentences normalised again keep their cache keys."""
+    text = normalise_speech_text("# Hi\n- Dr. *Who*?!Yes [link](url) ✨")
+    assert normalise_speech_text(text) == text
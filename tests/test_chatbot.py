@@ -1,14 +1,42 @@
 """Unit tests for the rpi_ai.chatbot module."""
 
-from unittest.mock import MagicMock
-
+import threading
+import time
+from collections.abc import Generator, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import ANY, MagicMock, patch
+
+import httpx
 import pytest
 from google.genai.errors import ServerError
-from google.genai.types import GenerateContentConfig, GoogleSearch
+from google.genai.types import (
+    AutomaticFunctionCallingConfig,
+    Content,
+    File,
+    FunctionCall,
+    GenerateContentConfig,
+    GenerateContentResponseUsageMetadata,
+    GoogleSearch,
+    Part,
+    Tool,
+    UploadFileConfig,
+)
 from gtts import gTTSError
 
+from rpi_ai.audiobot import AUDIO_PROMPT, EspeakEngine, TTSCache, TTSError, get_audio_bytes_from_text, split_sentences
 from rpi_ai.chatbot import Chatbot
-from rpi_ai.models import ChatbotConfig
+from rpi_ai.metrics import BLOCKED_MESSAGES, TOKENS
+from rpi_ai.models import ChatbotConfig, ChatMemoryList, LoadGovernorConfig
+
+
+@pytest.fixture
+def mock_load_governor() -> Generator[MagicMock]:
+    """Mock the load governor consulted by the chatbot, reporting the system as under heavy load."""
+    with patch("rpi_ai.chatbot.LOAD_GOVERNOR") as mock:
+        mock.degraded_config = LoadGovernorConfig(max_output_tokens=20)
+        yield mock
 
 
 class TestChatbot:
@@ -41,9 +69,14 @@ class TestChatbot:
         assert config.temperature == mock_chatbot_config.temperature
         assert config.safety_settings == mock_chatbot.SAFETY_SETTINGS
         assert config.candidate_count == mock_chatbot.CANDIDATE_COUNT
-        assert isinstance(config.tools, list)
-        assert len(config.tools) > 0
-        assert config.tools[0] in mock_chatbot._functions
+        assert config.tools == [Tool(function_declarations=mock_chatbot._declarations)]
+        assert config.automatic_function_calling == AutomaticFunctionCallingConfig(disable=True)
+
+    def test_generation_configs_cached(self, mock_chatbot: Chatbot) -> None:
+        """Test the generation configurations are built once and share the base configuration."""
+        assert mock_chatbot._model_config is mock_chatbot._model_config
+        assert mock_chatbot._chat_config is mock_chatbot._chat_config
+        assert mock_chatbot._model_config.tools is None
 
     def test_web_search_config(self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig) -> None:
         """Test the web search configuration of the Chatbot."""
@@ -60,6 +93,11 @@ class TestChatbot:
         assert len(config.tools) == 1
         assert config.tools[0].google_search == GoogleSearch()
 
+    def test_models(self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig) -> None:
+        """Test the primary model is followed by the fallback models."""
+        assert mock_chatbot.models == [mock_chatbot_config.model, *mock_chatbot_config.fallback_models]
+        assert mock_chatbot.active_model == mock_chatbot_config.model
+
     def test_chat_history(self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock) -> None:
         """Test the chat history of the Chatbot."""
         history = mock_chatbot.chat_history
@@ -101,6 +139,29 @@ class TestChatbot:
         assert mock_chatbot._memory.entries[-1].vector == mock_vector
         mock_genai_client.return_value.models.embed_content.assert_called_once()
 
+    def test_create_memory_concurrently(self, mock_chatbot: Chatbot, mock_genai_client: MagicMock) -> None:
+        """Test memories created concurrently are all stored and saved one at a time."""
+        mock_genai_client.return_value.models.embed_content.return_value = MagicMock(
+            embeddings=[MagicMock(values=[0.1, 0.2, 0.3])]
+        )
+        mock_chatbot._embedding_config.max_memories = 100
+        initial_count = len(mock_chatbot._memory.entries)
+        saving = threading.Lock()
+
+        def save_to_file(_filepath: Path) -> None:
+            assert saving.acquire(blocking=False), "Memories were saved concurrently"
+            time.sleep(0.001)
+            saving.release()
+
+        with (
+            patch.object(ChatMemoryList, "save_to_file", side_effect=save_to_file) as mock_save,
+            ThreadPoolExecutor(max_workers=8) as executor,
+        ):
+            list(executor.map(mock_chatbot.create_memory, [f"Memory {index}" for index in range(20)]))
+
+        assert len(mock_chatbot._memory.entries) == initial_count + 20
+        assert mock_save.call_count == 20  # noqa: PLR2004
+
     def test_retrieve_memories(self, mock_chatbot: Chatbot, mock_genai_client: MagicMock) -> None:
         """Test retrieving relevant memories based on a query."""
         mock_vector = [0.1, 0.2, 0.3]
@@ -148,8 +209,11 @@ class TestChatbot:
         mock_genai_client.return_value.models.generate_content.assert_called_once_with(
             contents=query,
             model=mock_chatbot._config.model,
-            config=mock_chatbot._web_search_config,
+            config=ANY,
         )
+        config = mock_genai_client.return_value.models.generate_content.call_args.kwargs["config"]
+        assert config.tools == mock_chatbot._web_search_config.tools
+        assert 0 < config.http_options.timeout <= mock_chatbot._config.retry_config.deadline * 1000
         assert result == "search results"
 
     def test_extract_blocked_categories(self, mock_chatbot: Chatbot) -> None:
@@ -173,11 +237,128 @@ class TestChatbot:
         """Test retrieving the configuration of the Chatbot."""
         assert mock_chatbot.get_config() == mock_chatbot_config
 
-    def test_update_config(self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig) -> None:
-        """Test updating the configuration of the Chatbot."""
-        mock_chatbot_config.model = "new-model"
-        mock_chatbot.update_config(mock_chatbot_config)
-        assert mock_chatbot.get_config() == mock_chatbot_config
+    def test_update_config(
+        self,
+        mock_chatbot: Chatbot,
+        mock_chatbot_config: ChatbotConfig,
+        mock_chat_instance: MagicMock,
+        mock_genai_client: MagicMock,
+    ) -> None:
+        """Test updating the configuration carries the conversation over into a new chat."""
+        mock_chatbot.send_message("Hi model!")
+        history = mock_chatbot.chat_history.messages
+        new_config = mock_chatbot_config.model_copy(update={"model": "new-model", "max_output_tokens": 100})
+
+        mock_chatbot.update_config(new_config)
+        assert mock_chatbot.get_config() == new_config
+        assert mock_chatbot.active_model == "new-model"
+        assert mock_chatbot.chat_history.messages == history
+        assert mock_chatbot._model_config.max_output_tokens == new_config.max_output_tokens
+        mock_genai_client.return_value.chats.create.assert_called_with(
+            model="new-model",
+            config=mock_chatbot._chat_config,
+            history=list(mock_chat_instance.get_history.return_value),
+        )
+
+    def test_update_config_unchanged(
+        self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig, mock_genai_client: MagicMock
+    ) -> None:
+        """Test updating with an identical configuration keeps the existing chat and generation configs."""
+        chat_config = mock_chatbot._chat_config
+        mock_chatbot.update_config(mock_chatbot_config.model_copy())
+        assert mock_chatbot._chat_config is chat_config
+        mock_genai_client.return_value.chats.create.assert_called_once()
+
+    def test_update_config_tool_config(self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig) -> None:
+        """Test updating the tool configuration recreates the tool executor and updates the token budgets."""
+        tool_executor = mock_chatbot._tool_executor
+        tool_config = mock_chatbot_config.tool_config.model_copy(update={"token_budget": 500})
+        mock_chatbot.update_config(mock_chatbot_config.model_copy(update={"tool_config": tool_config}))
+        assert mock_chatbot._tool_executor is not tool_executor
+        assert mock_chatbot._tool_results.get_budget("get_os_info") == 500  # noqa: PLR2004
+
+    def test_update_config_tts_config(self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig) -> None:
+        """Test updating the text-to-speech configuration switches the engine."""
+        tts_config = mock_chatbot_config.tts_config.model_copy(update={"engine": "espeak"})
+        mock_chatbot.update_config(mock_chatbot_config.model_copy(update={"tts_config": tts_config}))
+        assert isinstance(mock_chatbot._tts_engine, EspeakEngine)
+
+    def test_degraded_mode(
+        self,
+        mock_chatbot: Chatbot,
+        mock_chatbot_config: ChatbotConfig,
+        mock_chat_instance: MagicMock,
+        mock_genai_client: MagicMock,
+        mock_load_governor: MagicMock,
+    ) -> None:
+        """Test the chatbot switches to cheaper settings under load and back once the load has recovered."""
+        tool_executor = mock_chatbot._tool_executor
+        mock_chatbot.send_message("Hi model!")
+        assert mock_chatbot._model_config.max_output_tokens == 20  # noqa: PLR2004
+        assert mock_chatbot._tts_workers == 1
+        assert mock_chatbot._tool_executor is not tool_executor
+        assert mock_chatbot._tool_executor._max_workers == 1
+        assert isinstance(tools := mock_chatbot._chat_config.tools, list)
+        assert "web_search" not in [declaration.name for declaration in tools[0].function_declarations or []]
+        mock_genai_client.return_value.chats.create.assert_called_with(
+            model=mock_chatbot_config.model,
+            config=mock_chatbot._chat_config,
+            history=list(mock_chat_instance.get_history.return_value),
+        )
+
+        assert mock_chatbot.web_search("test query") == Chatbot.WEB_SEARCH_DISABLED_REPLY
+        mock_genai_client.return_value.models.generate_content.assert_not_called()
+
+        mock_load_governor.degraded_config = None
+        mock_chatbot.send_message("Hi again!")
+        assert mock_chatbot._model_config.max_output_tokens == mock_chatbot_config.max_output_tokens
+        assert mock_chatbot._tts_workers == mock_chatbot_config.tts_config.max_workers
+        assert mock_chatbot._tool_executor._max_workers == mock_chatbot_config.tool_config.max_workers
+        assert mock_chatbot._chat_config.tools == [Tool(function_declarations=mock_chatbot._declarations)]
+
+    def test_degraded_mode_unchanged(
+        self, mock_chatbot: Chatbot, mock_genai_client: MagicMock, mock_load_governor: MagicMock
+    ) -> None:
+        """Test the chat is only recreated when the load governor changes state."""
+        mock_chatbot.send_message("Hi model!")
+        mock_chatbot.send_message("Hi again!")
+        assert mock_genai_client.return_value.chats.create.call_count == 1 + 1
+
+    def test_prerender_replies(self, mock_chatbot: Chatbot, mock_gtts: MagicMock) -> None:
+        """Test the canned replies are synthesised into the cache so sending them does not synthesise again."""
+        mock_chatbot._tts_cache = TTSCache()
+        mock_gtts.return_value.write_to_fp.side_effect = lambda fp: fp.write(b"audio")
+        mock_chatbot.prerender_replies()
+        sentence_count = sum(len(split_sentences(reply)) for reply in Chatbot.CANNED_AUDIO_REPLIES)
+        assert mock_gtts.call_count == sentence_count
+
+        for reply in Chatbot.CANNED_AUDIO_REPLIES:
+            get_audio_bytes_from_text(reply, mock_chatbot._tts_engine, mock_chatbot._tts_cache)
+        assert mock_gtts.call_count == sentence_count
+
+    def test_prerender_replies_tts_error(self, mock_chatbot: Chatbot, mock_gtts: MagicMock) -> None:
+        """Test a reply which fails to synthesise is skipped."""
+        mock_gtts.return_value.write_to_fp.side_effect = gTTSError("gTTS error")
+        mock_chatbot.prerender_replies()
+        # Sentences still queued when one fails are cancelled, so only the first attempt of each reply is certain
+        assert len(Chatbot.CANNED_AUDIO_REPLIES) <= mock_gtts.call_count
+        assert mock_gtts.call_count <= sum(len(split_sentences(reply)) for reply in Chatbot.CANNED_AUDIO_REPLIES)
+
+    def test_load_tools(self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig) -> None:
+        """Test the enabled tool sets are sent to the model ahead of the chatbot's own tools."""
+        assert [declaration.name for declaration in mock_chatbot._declarations] == [
+            "create_memory",
+            "retrieve_memories",
+            "clear_memories",
+            "web_search",
+            "get_tool_output",
+        ]
+
+        mock_chatbot.update_config(mock_chatbot_config.model_copy(update={"tool_sets": ["system_info", "missing"]}))
+        names = [declaration.name for declaration in mock_chatbot._declarations]
+        assert names[0] == "update_and_check_packages"
+        assert names[-1] == "get_tool_output"
+        assert names == [tool.__name__ for tool in mock_chatbot._tools]
 
     def test_start_chat(self, mock_chatbot: Chatbot, mock_genai_client: MagicMock) -> None:
         """Test starting a new chat session."""
@@ -189,7 +370,8 @@ class TestChatbot:
                 temperature=mock_chatbot._config.temperature,
                 safety_settings=Chatbot.SAFETY_SETTINGS,
                 candidate_count=1,
-                tools=mock_chatbot._functions,
+                tools=[Tool(function_declarations=mock_chatbot._declarations)],
+                automatic_function_calling=AutomaticFunctionCallingConfig(disable=True),
             ),
         )
         assert len(mock_chatbot.chat_history.messages) == 1
@@ -201,7 +383,7 @@ class TestChatbot:
         mock_chat_instance.send_message.return_value = mock_response
 
         response = mock_chatbot.send_message(mock_msg)
-        mock_chat_instance.send_message.assert_called_once_with(mock_msg)
+        mock_chat_instance.send_message.assert_called_once_with(mock_msg, config=ANY)
 
         assert mock_chatbot.chat_history.messages[-2].message == mock_msg
         assert mock_chatbot.chat_history.messages[-2].is_user_message
@@ -209,12 +391,48 @@ class TestChatbot:
         assert mock_chatbot.chat_history.messages[-1].message == response.message
         assert not mock_chatbot.chat_history.messages[-1].is_user_message
 
+    def test_send_message_executes_tool_calls(self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock) -> None:
+        """Test tool calls requested by the model are executed and their results sent back."""
+        tool_response = MagicMock(function_calls=[FunctionCall(name="clear_memories", args={})])
+        mock_chat_instance.send_message.side_effect = [tool_response, MagicMock(text="Hi user!", function_calls=None)]
+
+        response = mock_chatbot.send_message("Hi model!")
+        assert response.message == "Hi user!"
+        assert mock_chat_instance.send_message.call_count == 2  # noqa: PLR2004
+        function_response = mock_chat_instance.send_message.call_args.args[0][0].function_response
+        assert function_response.name == "clear_memories"
+        assert "result" in function_response.response
+
+    def test_send_message_limits_tool_rounds(
+        self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_chatbot_config: ChatbotConfig
+    ) -> None:
+        """Test the tool loop stops after the maximum number of tool rounds."""
+        mock_chat_instance.send_message.return_value = MagicMock(
+            text="Hi user!", function_calls=[FunctionCall(name="clear_memories", args={})]
+        )
+
+        mock_chatbot.send_message("Hi model!")
+        assert mock_chat_instance.send_message.call_count == mock_chatbot_config.tool_config.max_remote_calls + 1
+
+    def test_send_message_records_token_usage(self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock) -> None:
+        """Test sending a message records the token usage of the response."""
+        mock_chat_instance.send_message.return_value = MagicMock(
+            text="Hi user!",
+            usage_metadata=GenerateContentResponseUsageMetadata(prompt_token_count=7, candidates_token_count=3),
+        )
+        prompt_tokens = TOKENS.value(type="prompt")
+        candidates_tokens = TOKENS.value(type="candidates")
+
+        mock_chatbot.send_message("Hi model!")
+        assert TOKENS.value(type="prompt") == prompt_tokens + 7
+        assert TOKENS.value(type="candidates") == candidates_tokens + 3
+
     def test_send_message_with_no_response(self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock) -> None:
         """Test sending a message when no response is received from the model."""
         mock_msg = "Hi model!"
         mock_chat_instance.send_message.return_value = MagicMock(text="")
         response = mock_chatbot.send_message(mock_msg)
-        mock_chat_instance.send_message.assert_called_once_with(mock_msg)
+        mock_chat_instance.send_message.assert_called_once_with(mock_msg, config=ANY)
         assert response.message == "Failed to send message to chatbot!"
         assert len(mock_chatbot.chat_history.messages) == 1
 
@@ -230,12 +448,16 @@ class TestChatbot:
             MagicMock(text="Blocked message"),
         ]
         mock_chat_instance.send_message.side_effect = mock_responses
+        blocked_messages = BLOCKED_MESSAGES.value(category="['test']")
 
         response = mock_chatbot.send_message(mock_msg)
         assert response.message == "Blocked message"
+        assert BLOCKED_MESSAGES.value(category="['test']") == blocked_messages + 1
         assert len(mock_chatbot.chat_history.messages) == 1 + 2
 
-    def test_send_message_with_server_error(self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock) -> None:
+    def test_send_message_with_server_error(
+        self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_chatbot_config: ChatbotConfig
+    ) -> None:
         """Test sending a message when a server error occurs."""
         mock_msg = "Hi model!"
         mock_chat_instance.send_message.side_effect = ServerError(
@@ -245,10 +467,38 @@ class TestChatbot:
         )
 
         response = mock_chatbot.send_message(mock_msg)
-        mock_chat_instance.send_message.assert_called_once_with(mock_msg)
+        mock_chat_instance.send_message.assert_called_with(mock_msg, config=ANY)
+        assert mock_chat_instance.send_message.call_count == (mock_chatbot_config.retry_config.max_retries + 1) * len(
+            mock_chatbot.models
+        )
         assert response.message == "Model overloaded! Please try again."
         assert len(mock_chatbot.chat_history.messages) == 1
 
+    def test_send_message_with_fallback_model(
+        self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_genai_client: MagicMock
+    ) -> None:
+        """Test sending a message falls back to the next model when the primary model is overloaded."""
+        server_error = ServerError(
+            code=503,
+            response_json={"error": {"message": "Model overloaded!"}},
+            response=MagicMock(body_segments=[{"error": {"message": "Model overloaded!"}}]),
+        )
+        fallback_chat = MagicMock()
+        fallback_chat.send_message.return_value = MagicMock(text="Hi from fallback!")
+        mock_genai_client.return_value.chats.create.return_value = fallback_chat
+        mock_chat_instance.send_message.side_effect = server_error
+
+        response = mock_chatbot.send_message("Hi model!")
+        mock_genai_client.return_value.chats.create.assert_called_with(
+            model="test-fallback-model",
+            config=mock_chatbot._chat_config,
+            history=list(mock_chat_instance.get_history.return_value),
+        )
+        assert response.message == "Hi from fallback!"
+        assert response.model == "test-fallback-model"
+        assert mock_chatbot.active_model == "test-fallback-model"
+        assert mock_chatbot.chat_history.messages[-1].model == "test-fallback-model"
+
     def test_send_audio_with_valid_response(
         self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_get_audio_bytes_from_text: MagicMock
     ) -> None:
@@ -261,12 +511,46 @@ class TestChatbot:
         response = mock_chatbot.send_audio(b"test_audio_data")
         mock_chat_instance.send_message.assert_called_once()
 
-        assert mock_chatbot.chat_history.messages[-2].message == "Respond to the voice message."
+        assert mock_chatbot.chat_history.messages[-2].message == AUDIO_PROMPT
         assert mock_chatbot.chat_history.messages[-2].is_user_message
 
         assert mock_chatbot.chat_history.messages[-1].message == response.message
         assert not mock_chatbot.chat_history.messages[-1].is_user_message
 
+    def test_send_audio_with_transcript(
+        self,
+        mock_chatbot: Chatbot,
+        mock_chat_instance: MagicMock,
+        mock_genai_client: MagicMock,
+        mock_get_audio_bytes_from_text: MagicMock,
+    ) -> None:
+        """Test the transcript is recorded as the user message and the audio is removed from the chat history."""
+        mock_chat_instance.send_message.return_value = MagicMock(
+            text="<transcript>What time is it?</transcript>\nIt is noon."
+        )
+        prompt = Content(
+            role="user", parts=[Part.from_text(text=AUDIO_PROMPT), Part.from_bytes(data=b"a", mime_type="audio/mp3")]
+        )
+        reply = Content(
+            role="model", parts=[Part.from_text(text="<transcript>What time is it?</transcript> It is noon.")]
+        )
+        mock_chat_instance.get_history.return_value = [prompt, reply]
+        mock_get_audio_bytes_from_text.return_value = "test_audio_response"
+
+        response = mock_chatbot.send_audio(b"test_audio_data")
+        assert response.message == "It is noon."
+        mock_get_audio_bytes_from_text.assert_called_once()
+        assert mock_get_audio_bytes_from_text.call_args.args[0] == "It is noon."
+        assert mock_chatbot.chat_history.messages[-2].message == "What time is it?"
+        assert mock_chatbot.chat_history.messages[-2].is_user_message
+        assert mock_chatbot.chat_history.messages[-1].message == "It is noon."
+
+        mock_genai_client.return_value.chats.create.assert_called_with(
+            model=mock_chatbot.active_model,
+            config=mock_chatbot._chat_config,
+            history=[Content(role="user", parts=[Part.from_text(text=AUDIO_PROMPT)]), reply],
+        )
+
     def test_send_audio_with_no_response(
         self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_get_audio_bytes_from_text: MagicMock
     ) -> None:
@@ -304,7 +588,11 @@ class TestChatbot:
         assert len(mock_chatbot.chat_history.messages) == 1 + 2
 
     def test_send_audio_with_server_error(
-        self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_get_audio_bytes_from_text: MagicMock
+        self,
+        mock_chatbot: Chatbot,
+        mock_chat_instance: MagicMock,
+        mock_get_audio_bytes_from_text: MagicMock,
+        mock_chatbot_config: ChatbotConfig,
     ) -> None:
         """Test sending an audio message when a server error occurs."""
         mock_chat_instance.send_message.side_effect = ServerError(
@@ -317,20 +605,253 @@ class TestChatbot:
         mock_get_audio_bytes_from_text.return_value = mock_audio
 
         response = mock_chatbot.send_audio(b"test_audio_data")
-        mock_chat_instance.send_message.assert_called_once()
+        assert mock_chat_instance.send_message.call_count == (mock_chatbot_config.retry_config.max_retries + 1) * len(
+            mock_chatbot.models
+        )
         assert response.message == "Model overloaded! Please try again."
         assert response.bytes == mock_audio
         assert len(mock_chatbot.chat_history.messages) == 1
 
-    def test_send_audio_with_gtts_error(
+    def test_send_audio_stream(
+        self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_gtts: MagicMock
+    ) -> None:
+        """Test streaming a speech response yields the audio of each sentence after recording the reply."""
+        mock_chatbot._tts_cache = TTSCache()
+        mock_chat_instance.send_message.return_value = MagicMock(text="Hi user! Bye.")
+        mock_gtts.return_value.write_to_fp.side_effect = lambda fp: fp.write(b"mp3")
+
+        reply, audio = mock_chatbot.send_audio_stream(b"test_audio_data")
+        assert reply.message == "Hi user! Bye."
+        assert mock_chatbot.chat_history.messages[-1].message == reply.message
+        assert list(audio) == [b"mp3", b"mp3"]
+        assert mock_chatbot.audio_mime_type == "audio/mpeg"
+
+    def test_send_audio_text_only(
+        self,
+        mock_chatbot: Chatbot,
+        mock_chat_instance: MagicMock,
+        mock_get_audio_bytes_from_text: MagicMock,
+        mock_load_governor: MagicMock,
+    ) -> None:
+        """Test audio messages are answered without speech while the system is under heavy load."""
+        mock_chat_instance.send_message.return_value = MagicMock(text="Hi user!")
+
+        response = mock_chatbot.send_audio(b"test_audio_data")
+        assert response.message == "Hi user!"
+        assert response.bytes == ""
+
+        reply, audio = mock_chatbot.send_audio_stream(b"test_audio_data")
+        assert reply.message == "Hi user!"
+        assert list(audio) == []
+        mock_get_audio_bytes_from_text.assert_not_called()
+
+    def test_send_audio_stream_tts_error(
+        self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_gtts: MagicMock
+    ) -> None:
+        """Test the audio stream raises an error when the text-to-speech engine fails."""
+        mock_chatbot._tts_cache = TTSCache()
+        mock_chat_instance.send_message.return_value = MagicMock(text="Hi user!")
+        mock_gtts.return_value.write_to_fp.side_effect = gTTSError("gTTS error")
+
+        _reply, audio = mock_chatbot.send_audio_stream(b"test_audio_data")
+        with pytest.raises(TTSError):
+            list(audio)
+
+    def test_prepare_audio_inline(self, mock_chatbot: Chatbot, mock_genai_client: MagicMock) -> None:
+        """Test small clips are read from their file to be sent inline."""
+        assert mock_chatbot._prepare_audio(BytesIO(b"OggS audio")) == b"OggS audio"
+        assert mock_chatbot._prepare_audio(b"OggS audio") == b"OggS audio"
+        mock_genai_client.return_value.files.upload.assert_not_called()
+
+    def test_prepare_audio_upload(
+        self, mock_chatbot: Chatbot, mock_genai_client: MagicMock, mock_chatbot_config: ChatbotConfig
+    ) -> None:
+        """Test clips over the inline limit are uploaded with their sniffed type."""
+        audio_file = BytesIO(b"OggS" + b"0" * mock_chatbot_config.audio_upload_config.inline_max_bytes)
+        uploaded = mock_chatbot._prepare_audio(audio_file)
+
+        mock_upload = mock_genai_client.return_value.files.upload
+        assert uploaded == mock_upload.return_value
+        mock_upload.assert_called_once_with(file=audio_file, config=UploadFileConfig(mime_type="audio/ogg"))
+        assert audio_file.tell() == 0
+
+    def test_send_audio_deletes_upload(
+        self,
+        mock_chatbot: Chatbot,
+        mock_chat_instance: MagicMock,
+        mock_genai_client: MagicMock,
+        mock_chatbot_config: ChatbotConfig,
+        mock_get_audio_bytes_from_text: MagicMock,
+    ) -> None:
+        """Test an uploaded clip is removed from the chat and deleted once its turn is over."""
+        uploaded = File(name="files/audio", uri="https://files/audio", mime_type="audio/ogg")
+        mock_genai_client.return_value.files.upload.return_value = uploaded
+        mock_chat_instance.send_message.return_value = MagicMock(text="It is noon.")
+        prompt = Content(
+            role="user",
+            parts=[
+                Part.from_text(text=AUDIO_PROMPT),
+                Part.from_uri(file_uri="https://files/audio", mime_type="audio/ogg"),
+            ],
+        )
+        reply = Content(role="model", parts=[Part.from_text(text="It is noon.")])
+        mock_chat_instance.get_history.return_value = [prompt, reply]
+        mock_get_audio_bytes_from_text.return_value = "test_audio_response"
+
+        audio = b"OggS" + b"0" * mock_chatbot_config.audio_upload_config.inline_max_bytes
+        assert mock_chatbot.send_audio(audio).message == "It is noon."
+        mock_genai_client.return_value.files.delete.assert_called_once_with(name="files/audio")
+        assert mock_genai_client.return_value.chats.create.call_args.kwargs["history"] == [
+            Content(role="user", parts=[Part.from_text(text=AUDIO_PROMPT)]),
+            reply,
+        ]
+
+    def test_prepare_audio_wav(self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig) -> None:
+        """Test WAV clips are preprocessed with the upload configuration before being sent."""
+        upload_config = mock_chatbot_config.audio_upload_config
+        with patch("rpi_ai.chatbot.audiobot.preprocess_wav", return_value=b"RIFF processed") as mock_preprocess:
+            assert mock_chatbot._prepare_audio(b"RIFF\x00\x00\x00\x00WAVE") == b"RIFF processed"
+
+        mock_preprocess.assert_called_once_with(
+            b"RIFF\x00\x00\x00\x00WAVE",
+            sample_rate=upload_config.sample_rate,
+            silence_threshold_db=upload_config.silence_threshold_db,
+            silence_padding_ms=upload_config.silence_padding_ms,
+        )
+
+    def test_prepare_audio_wav_too_large_to_preprocess(
+        self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig
+    ) -> None:
+        """Test WAV clips over the preprocessing limit are sent unchanged."""
+        audio = b"RIFF\x00\x00\x00\x00WAVE" + b"0" * mock_chatbot_config.audio_upload_config.preprocess_max_bytes
+        mock_chatbot_config.audio_upload_config.inline_max_bytes = len(audio)
+        with patch("rpi_ai.chatbot.audiobot.preprocess_wav") as mock_preprocess:
+            assert mock_chatbot._prepare_audio(audio) == audio
+        mock_preprocess.assert_not_called()
+
+    def test_prepare_audio_wav_preprocess_disabled(
+        self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig
+    ) -> None:
+        """Test WAV clips are sent unchanged when preprocessing is disabled."""
+        mock_chatbot_config.audio_upload_config.preprocess = False
+        with patch("rpi_ai.chatbot.audiobot.preprocess_wav") as mock_preprocess:
+            assert mock_chatbot._prepare_audio(b"RIFF\x00\x00\x00\x00WAVE") == b"RIFF\x00\x00\x00\x00WAVE"
+        mock_preprocess.assert_not_called()
+
+    def test_send_audio_pipelined(self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock) -> None:
+        """Test the reply is fed to the speech pipeline as it is generated, after running the requested tools."""
+        tool_chunk = MagicMock(text=None, function_calls=[FunctionCall(name="clear_memories", args={})])
+        text_chunks = [
+            MagicMock(text="Hi user", function_calls=None, usage_metadata=None),
+            MagicMock(text="! Bye.", function_calls=None, usage_metadata=None),
+        ]
+        mock_chat_instance.send_message_stream.side_effect = [iter([tool_chunk]), iter(text_chunks)]
+        pipeline = MagicMock()
+
+        reply = mock_chatbot.send_audio_pipelined(b"test_audio_data", pipeline)
+        assert reply.message == "Hi user! Bye."
+        assert reply.model == mock_chatbot.active_model
+        assert [call.args[0] for call in pipeline.add_text.call_args_list] == ["Hi user", "! Bye."]
+        pipeline.close.assert_called_once()
+        function_response = mock_chat_instance.send_message_stream.call_args.args[0][0].function_response
+        assert function_response.name == "clear_memories"
+        assert mock_chatbot.chat_history.messages[-1].message == reply.message
+
+    def test_send_audio_pipelined_transcript(self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock) -> None:
+        """Test the transcript streamed at the start of the reply is recorded but not spoken."""
+        text_chunks = [
+            MagicMock(text=" <transcript>Hello", function_calls=None, usage_metadata=None),
+            MagicMock(text=" there</transcript> Hi", function_calls=None, usage_metadata=None),
+            MagicMock(text=" user!", function_calls=None, usage_metadata=None),
+        ]
+        mock_chat_instance.send_message_stream.return_value = iter(text_chunks)
+        pipeline = MagicMock()
+
+        reply = mock_chatbot.send_audio_pipelined(b"test_audio_data", pipeline)
+        assert reply.message == "Hi user!"
+        assert [call.args[0] for call in pipeline.add_text.call_args_list] == ["Hi", " user!"]
+        assert mock_chatbot.chat_history.messages[-2].message == "Hello there"
+
+    def test_send_audio_pipelined_server_error(self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock) -> None:
+        """Test the canned reply is spoken when no model is available."""
+        mock_chat_instance.send_message_stream.side_effect = ServerError(
+            code=503,
+            response_json={"error": {"message": "Model overloaded!"}},
+            response=MagicMock(body_segments=[{"error": {"message": "Model overloaded!"}}]),
+        )
+        pipeline = MagicMock()
+
+        reply = mock_chatbot.send_audio_pipelined(b"test_audio_data", pipeline)
+        assert reply.message == Chatbot.MODEL_OVERLOADED_REPLY
+        pipeline.add_text.assert_called_once_with(Chatbot.MODEL_OVERLOADED_REPLY)
+        pipeline.close.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            ServerError(code=503, response_json={"error": {"message": "Model overloaded!"}}),
+            httpx.ReadTimeout("Request timed out"),
+        ],
+    )
+    def test_send_audio_pipelined_error_mid_stream(
+        self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, error: Exception
+    ) -> None:
+        """Test the audio ends with the canned reply when the stream fails or times out after the first chunk."""
+
+        def stream() -> Iterator[MagicMock]:
+            yield MagicMock(text="Hi user", function_calls=None, usage_metadata=None)
+            raise error
+
+        mock_chat_instance.send_message_stream.return_value = stream()
+        pipeline = MagicMock()
+
+        reply = mock_chatbot.send_audio_pipelined(b"test_audio_data", pipeline)
+        assert reply.message == Chatbot.SEND_AUDIO_FAILED_REPLY
+        assert reply.model is None
+        assert [call.args[0] for call in pipeline.add_text.call_args_list] == [
+            "Hi user",
+            Chatbot.SEND_AUDIO_FAILED_REPLY,
+        ]
+        pipeline.close.assert_called_once()
+        assert len(mock_chatbot.chat_history.messages) == 1
+
+    def test_send_audio_pipelined_degraded(
+        self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_load_governor: MagicMock
+    ) -> None:
+        """Test the mode of the turn sets the pipeline workers, or leaves the pipeline silent for text-only audio."""
+        mock_chat_instance.send_message_stream.return_value = iter(
+            [MagicMock(text="Hi user!", function_calls=None, usage_metadata=None)]
+        )
+        mock_load_governor.degraded_config = LoadGovernorConfig(tts_workers=1, text_only_audio=False)
+        pipeline = MagicMock(max_workers=4)
+        mock_chatbot.send_audio_pipelined(b"test_audio_data", pipeline)
+        assert pipeline.max_workers == 1
+        pipeline.add_text.assert_called_once_with("Hi user!")
+
+        mock_chat_instance.send_message.return_value = MagicMock(text="Hi again!")
+        mock_load_governor.degraded_config = LoadGovernorConfig(text_only_audio=True)
+        pipeline = MagicMock()
+        reply = mock_chatbot.send_audio_pipelined(b"test_audio_data", pipeline)
+        assert reply.message == "Hi again!"
+        pipeline.add_text.assert_not_called()
+        pipeline.close.assert_called_once()
+
+    def test_create_speech_pipeline(self, mock_chatbot: Chatbot, mock_chatbot_config: ChatbotConfig) -> None:
+        """Test the speech pipeline uses the configured engine and cache."""
+        pipeline = mock_chatbot.create_speech_pipeline()
+        assert pipeline.engine is mock_chatbot._tts_engine
+        assert pipeline.cache is mock_chatbot._tts_cache
+        pipeline.close()
+
+    def test_send_audio_with_tts_error(
         self, mock_chatbot: Chatbot, mock_chat_instance: MagicMock, mock_get_audio_bytes_from_text: MagicMock
     ) -> None:
-        """Test sending an audio message when gTTS raises an error."""
+        """Test sending an audio message when the text-to-speech engine raises an error."""
         mock_chat_instance.send_message.return_value = MagicMock(text="Hi user!")
-        mock_get_audio_bytes_from_text.side_effect = gTTSError("gTTS error")
+        mock_get_audio_bytes_from_text.side_effect = TTSError("TTS error")
 
         response = mock_chatbot.send_audio(b"test_audio_data")
         mock_chat_instance.send_message.assert_called_once()
-        assert response.message == "gTTS error"
+        assert response.message == "TTS error"
         assert response.bytes == ""
-        assert len(mock_chatbot.chat_history.messages) == 1
+        assert len(mock_chatbot.chat_history.messages) == 1 + 2
@@ -3,7 +3,9 @@
 import asyncio
 import json
 from collections.abc import Generator
+from http import HTTPStatus
 from importlib.metadata import PackageMetadata
+from io import BytesIO
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -11,11 +13,19 @@ from fastapi import HTTPException, Request, Security
 from fastapi.routing import APIRoute
 from fastapi.security import APIKeyHeader
 from fastapi.testclient import TestClient
+from google.genai.errors import ClientError
+from gtts import gTTSError
+from python_template_server.constants import CONFIG_DIR
 from python_template_server.models import ResponseCode
+from starlette.datastructures import UploadFile
 
+from rpi_ai.audiobot import TTSCache
 from rpi_ai.chatbot import Chatbot
 from rpi_ai.chatbot_server import ChatbotServer
-from rpi_ai.models import ChatbotMessage, ChatbotServerConfig, ChatbotSpeech
+from rpi_ai.load_governor import LoadGovernor
+from rpi_ai.metrics import CONTENT_TYPE
+from rpi_ai.models import ChatbotMessage, ChatbotServerConfig, ChatbotSpeech, JobInfo, LoadGovernorConfig, LoadStatus
+from rpi_ai.request_queue import QueueFullError
 
 
 @pytest.fixture(autouse=True)
@@ -33,6 +43,18 @@ def mock_package_metadata() -> Generator[MagicMock]:
         yield mock_metadata
 
 
+def parse_multipart(content_type: str, content: bytes) -> list[tuple[str, bytes]]:
+    """Split a multipart reply into the media type and body of each part."""
+    boundary = content_type.split("boundary=")[1]
+    parts = content.split(f"\r\n--{boundary}".encode())
+    assert parts[0] == b""
+    assert parts[-1] == b"--\r\n"
+    return [
+        (headers.decode().removeprefix("\r\nContent-Type: "), body)
+        for headers, body in (part.split(b"\r\n\r\n", 1) for part in parts[1:-1])
+    ]
+
+
 @pytest.fixture
 def mock_chatbot_server(
     mock_chatbot_server_config: ChatbotServerConfig, mock_chatbot: Chatbot
@@ -69,6 +91,44 @@ class TestChatbotServer:
         with pytest.raises(ValueError, match="GEMINI_API_KEY variable not set!"):
             ChatbotServer(mock_chatbot_server_config)
 
+    def test_run(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test running the server starts and stops the background telemetry, load and package update checks."""
+        with (
+            patch("rpi_ai.chatbot_server.TemplateServer.run") as mock_run,
+            patch("rpi_ai.chatbot_server.TELEMETRY") as mock_telemetry,
+            patch("rpi_ai.chatbot_server.TelemetryHistory") as mock_history,
+            patch("rpi_ai.chatbot_server.JOBS") as mock_jobs,
+            patch("rpi_ai.chatbot_server.PACKAGE_UPDATES") as mock_package_updates,
+            patch("rpi_ai.chatbot_server.LOAD_GOVERNOR") as mock_load_governor,
+            patch("rpi_ai.chatbot_server.threading.Thread") as mock_thread,
+        ):
+            mock_chatbot_server.run()
+        telemetry_config = mock_chatbot_server.config.telemetry_config
+        mock_history.assert_called_once_with(
+            CONFIG_DIR / telemetry_config.history_filepath, telemetry_config.history_capacity
+        )
+        mock_telemetry.start.assert_called_once_with(
+            interval=telemetry_config.interval,
+            buffer_size=telemetry_config.buffer_size,
+            history=mock_history.return_value,
+            history_interval=telemetry_config.history_interval,
+            process_interval=telemetry_config.process_interval,
+        )
+        mock_load_governor.start.assert_called_once_with(mock_chatbot_server.config.load_governor_config)
+        package_update_config = mock_chatbot_server.config.package_update_config
+        mock_package_updates.start.assert_called_once_with(
+            interval=package_update_config.interval, low_priority=package_update_config.low_priority
+        )
+        mock_run.assert_called_once()
+        mock_thread.assert_called_once_with(
+            target=mock_chatbot_server.chatbot.prerender_replies, name="tts-prerender", daemon=True
+        )
+        mock_thread.return_value.start.assert_called_once()
+        mock_package_updates.stop.assert_called_once()
+        mock_load_governor.stop.assert_called_once()
+        mock_telemetry.stop.assert_called_once()
+        mock_jobs.shutdown.assert_called_once()
+
     def test_validate_config(
         self, mock_chatbot_server: ChatbotServer, mock_chatbot_server_config: ChatbotServerConfig
     ) -> None:
@@ -97,16 +157,47 @@ class TestChatbotServerRoutes:
         expected_endpoints = [
             "/health",
             "/login",
+            "/metrics",
             "/config",
             "/chat/history",
             "/chat/restart",
+            "/jobs",
+            "/jobs/{job_id}",
+            "/jobs/{job_id}/cancel",
+            "/system/load",
             "/chat/message",
             "/chat/audio",
+            "/chat/audio/stream",
+            "/chat/audio/pipeline",
         ]
         for endpoint in expected_endpoints:
             assert endpoint in routes
 
 
+class TestMetricsEndpoint:
+    """Integration tests for the /metrics endpoint."""
+
+    def test_get_metrics(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test the /metrics endpoint method."""
+        request = MagicMock(spec=Request)
+        response = asyncio.run(mock_chatbot_server.get_metrics(request))
+
+        assert response.media_type == CONTENT_TYPE
+        assert b"# TYPE rpi_ai_stage_duration_seconds histogram" in response.body
+
+    def test_get_metrics_endpoint(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test /metrics endpoint returns 200 and records request durations by route."""
+        app = mock_chatbot_server.app
+        client = TestClient(app)
+
+        client.get("/config")
+        response = client.get("/metrics")
+        assert response.status_code == ResponseCode.OK
+        assert response.headers["content-type"] == CONTENT_TYPE
+        assert 'rpi_ai_request_duration_seconds_count{method="GET",route="/config",status="200"}' in response.text
+        assert "rpi_ai_memory_entries " in response.text
+
+
 class TestConfigEndpoint:
     """Integration tests for the /config endpoint."""
 
@@ -130,6 +221,39 @@ class TestConfigEndpoint:
         updated_config = mock_chatbot_server.chatbot.get_config()
         assert updated_config == new_config
 
+    def test_post_config_partial_keeps_history(
+        self, mock_chatbot_server: ChatbotServer, mock_chat_instance: MagicMock
+    ) -> None:
+        """Test a partial config update keeps unspecified fields and the conversation."""
+        mock_chatbot_server.chatbot.send_message("Hello model!")
+        history = mock_chatbot_server.chatbot.chat_history.messages
+        fallback_models = mock_chatbot_server.chatbot.get_config().fallback_models
+
+        request = MagicMock(spec=Request)
+        request.json = AsyncMock(return_value={"temperature": 0.2})
+        asyncio.run(mock_chatbot_server.post_config(request))
+
+        updated_config = mock_chatbot_server.chatbot.get_config()
+        assert updated_config.temperature == 0.2  # noqa: PLR2004
+        assert updated_config.fallback_models == fallback_models
+        assert mock_chatbot_server.chatbot.chat_history.messages == history
+
+    @pytest.mark.parametrize("error", [QueueFullError(retry_after=3), RuntimeError("update failed")])
+    def test_post_config_failed_keeps_config(self, mock_chatbot_server: ChatbotServer, error: Exception) -> None:
+        """Test a configuration update which is rejected or fails leaves the server configuration unchanged."""
+        config = mock_chatbot_server.config.chatbot_config.model_copy(deep=True)
+        request = MagicMock(spec=Request)
+        request.json = AsyncMock(return_value={"temperature": 0.2})
+
+        with (
+            patch.object(mock_chatbot_server.chat_queue, "submit", side_effect=error),
+            patch.object(ChatbotServerConfig, "save_to_file") as mock_save,
+            pytest.raises((HTTPException, RuntimeError)),
+        ):
+            asyncio.run(mock_chatbot_server.post_config(request))
+        assert mock_chatbot_server.config.chatbot_config == config
+        mock_save.assert_not_called()
+
     def test_get_config_endpoint(self, mock_chatbot_server: ChatbotServer) -> None:
         """Test /config endpoint returns 200."""
         app = mock_chatbot_server.app
@@ -207,6 +331,79 @@ class TestRestartChatEndpoint:
         assert len(mock_chatbot_server.chatbot.chat_history.messages) == 1
 
 
+@pytest.fixture
+def mock_jobs() -> Generator[MagicMock]:
+    """Mock the job manager used by the server."""
+    with patch("rpi_ai.chatbot_server.JOBS") as mock:
+        yield mock
+
+
+class TestJobsEndpoint:
+    """Integration tests for the /jobs endpoints."""
+
+    def test_get_jobs(self, mock_chatbot_server: ChatbotServer, mock_jobs: MagicMock, mock_job_info: JobInfo) -> None:
+        """Test the /jobs endpoint method."""
+        mock_jobs.list_jobs.return_value = [mock_job_info]
+        response = asyncio.run(mock_chatbot_server.get_jobs(MagicMock(spec=Request)))
+        assert response.message == "Successfully retrieved background jobs."
+        assert response.jobs == [mock_job_info]
+
+    def test_get_job_endpoint(
+        self, mock_chatbot_server: ChatbotServer, mock_jobs: MagicMock, mock_job_info: JobInfo
+    ) -> None:
+        """Test /jobs/{job_id} endpoint returns the job."""
+        mock_jobs.get.return_value = mock_job_info
+        client = TestClient(mock_chatbot_server.app)
+
+        response = client.get(f"/jobs/{mock_job_info.job_id}")
+        assert response.status_code == ResponseCode.OK
+        assert response.json()["job"] == mock_job_info.model_dump(mode="json")
+        mock_jobs.get.assert_called_once_with(mock_job_info.job_id)
+
+    def test_get_job_endpoint_not_found(self, mock_chatbot_server: ChatbotServer, mock_jobs: MagicMock) -> None:
+        """Test /jobs/{job_id} endpoint returns 404 for an unknown job."""
+        mock_jobs.get.return_value = None
+        client = TestClient(mock_chatbot_server.app)
+
+        response = client.get("/jobs/missing")
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_post_cancel_job_endpoint(
+        self, mock_chatbot_server: ChatbotServer, mock_jobs: MagicMock, mock_job_info: JobInfo
+    ) -> None:
+        """Test /jobs/{job_id}/cancel endpoint cancels the job."""
+        mock_jobs.cancel.return_value = mock_job_info
+        client = TestClient(mock_chatbot_server.app)
+
+        response = client.post(f"/jobs/{mock_job_info.job_id}/cancel")
+        assert response.status_code == ResponseCode.OK
+        assert response.json()["message"] == "Successfully cancelled background job."
+        mock_jobs.cancel.assert_called_once_with(mock_job_info.job_id)
+
+    def test_post_cancel_job_endpoint_not_found(self, mock_chatbot_server: ChatbotServer, mock_jobs: MagicMock) -> None:
+        """Test /jobs/{job_id}/cancel endpoint returns 404 for an unknown job."""
+        mock_jobs.cancel.return_value = None
+        client = TestClient(mock_chatbot_server.app)
+
+        response = client.post("/jobs/missing/cancel")
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestLoadEndpoint:
+    """Integration tests for the /system/load endpoint."""
+
+    def test_get_load_endpoint(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test /system/load returns the state of the load governor."""
+        status = LoadStatus(degraded=True, reasons=["CPU usage 95.0% >= 90.0%"], cpu_percent=95.0, checked_at=10)
+        client = TestClient(mock_chatbot_server.app)
+
+        with patch.object(LoadGovernor, "status", new=status):
+            response = client.get("/system/load")
+        assert response.status_code == ResponseCode.OK
+        assert response.json()["message"] == "Successfully retrieved load governor state."
+        assert response.json()["load"] == status.model_dump(mode="json")
+
+
 class TestPostMessageEndpoint:
     """Integration and unit tests for the /chat/message endpoint."""
 
@@ -237,6 +434,20 @@ class TestPostMessageEndpoint:
         with pytest.raises(HTTPException, match="No message provided in request body"):
             asyncio.run(mock_chatbot_server.post_message_text(request))
 
+    def test_post_message_text_queue_full(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test the /chat/message method sheds load when the chat request queue is full."""
+        request = MagicMock(spec=Request)
+        request.json = AsyncMock(return_value={"message": "Hello model!"})
+
+        with (
+            patch.object(mock_chatbot_server.chat_queue, "submit", side_effect=QueueFullError(retry_after=3)),
+            pytest.raises(HTTPException, match="Too many pending chat requests") as exc_info,
+        ):
+            asyncio.run(mock_chatbot_server.post_message_text(request))
+
+        assert exc_info.value.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert exc_info.value.headers == {"Retry-After": "3"}
+
     def test_post_message_text_endpoint(
         self, mock_chatbot_server: ChatbotServer, mock_chat_instance: MagicMock
     ) -> None:
@@ -266,9 +477,7 @@ class TestPostAudioEndpoint:
     ) -> None:
         """Test the /chat/audio method handles a valid audio file and returns a speech response."""
         request = MagicMock(spec=Request)
-        file_mock = MagicMock()
-        file_mock.read = AsyncMock(return_value=b"sound-bytes")
-        request.form = AsyncMock(return_value={"audio": file_mock})
+        request.form = AsyncMock(return_value={"audio": UploadFile(BytesIO(b"sound-bytes"), size=11)})
         mock_chat_instance.send_message.return_value = MagicMock(text="Hi user!")
         mock_get_audio_bytes_from_text.return_value = "test_audio_response"
         response = asyncio.run(mock_chatbot_server.post_message_audio(request))
@@ -293,15 +502,38 @@ class TestPostAudioEndpoint:
         with pytest.raises(HTTPException, match="No audio file provided in request body"):
             asyncio.run(mock_chatbot_server.post_message_audio(request))
 
-    def test_post_message_audio_read_error(self, mock_chatbot_server: ChatbotServer) -> None:
-        """Test the /chat/audio method handles audio read errors."""
+    def test_post_message_audio_too_large(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test the /chat/audio method rejects an audio file over the maximum size."""
         request = MagicMock(spec=Request)
-        file_mock = MagicMock()
-        file_mock.read = AsyncMock(side_effect=Exception("read failed"))
-        request.form = AsyncMock(return_value={"audio": file_mock})
+        max_bytes = mock_chatbot_server.config.chatbot_config.audio_upload_config.max_bytes
+        request.form = AsyncMock(
+            return_value={"audio": UploadFile(BytesIO(b"0" * (max_bytes + 1)), size=max_bytes + 1)}
+        )
 
-        with pytest.raises(HTTPException, match="Failed to read audio file"):
+        with pytest.raises(HTTPException, match="exceeds the maximum size") as exc_info:
             asyncio.run(mock_chatbot_server.post_message_audio(request))
+        assert exc_info.value.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+    def test_post_message_audio_content_length_too_large(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test the /chat/audio endpoint rejects a request over the maximum size before reading its body."""
+        client = TestClient(mock_chatbot_server.app)
+        max_bytes = mock_chatbot_server.config.chatbot_config.audio_upload_config.max_bytes
+        files = {"audio": ("audio.wav", b"0" * (max_bytes + 1), "audio/wav")}
+
+        with patch.object(Request, "form") as mock_form:
+            response = client.post("/chat/audio", files=files)
+        assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        mock_form.assert_not_called()
+
+    def test_post_message_audio_without_content_length(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test the /chat/audio method rejects a request without a content length before reading its body."""
+        request = MagicMock(spec=Request, headers={})
+        request.form = AsyncMock()
+
+        with pytest.raises(HTTPException, match="Content-Length header is required") as exc_info:
+            asyncio.run(mock_chatbot_server.post_message_audio(request))
+        assert exc_info.value.status_code == HTTPStatus.LENGTH_REQUIRED
+        request.form.assert_not_called()
 
     def test_post_message_audio_endpoint(
         self,
@@ -324,3 +556,151 @@ class TestPostAudioEndpoint:
         assert response_body["message"] == "Audio processed successfully"
         assert isinstance(response_body["timestamp"], str)
         assert isinstance(response_body["reply"], dict)
+
+
+class TestPostAudioStreamEndpoint:
+    """Integration tests for the /chat/audio/stream endpoint."""
+
+    def test_post_message_audio_stream_endpoint(
+        self, mock_chatbot_server: ChatbotServer, mock_chat_instance: MagicMock, mock_gtts: MagicMock
+    ) -> None:
+        """Test /chat/audio/stream sends the reply text followed by the audio of each sentence."""
+        client = TestClient(mock_chatbot_server.app)
+        files = {"audio": ("audio.wav", b"sound-bytes", "audio/wav")}
+        mock_chatbot_server.chatbot._tts_cache = TTSCache()
+        mock_chat_instance.send_message.return_value = MagicMock(text="Hi audio! How are you?")
+        mock_gtts.return_value.write_to_fp.side_effect = lambda fp: fp.write(b"mp3")
+
+        response = client.post("/chat/audio/stream", files=files)
+        assert response.status_code == ResponseCode.OK
+        assert response.headers["content-type"].startswith("multipart/mixed; boundary=")
+        assert "content-length" not in response.headers
+        (reply_type, reply), (audio_type, audio) = parse_multipart(response.headers["content-type"], response.content)
+        assert reply_type == "application/json"
+        assert ChatbotMessage.model_validate_json(reply).message == "Hi audio! How are you?"
+        assert audio_type == "audio/mpeg"
+        assert audio == b"mp3mp3"
+
+    def test_post_message_audio_stream_tts_error(
+        self, mock_chatbot_server: ChatbotServer, mock_chat_instance: MagicMock, mock_gtts: MagicMock
+    ) -> None:
+        """Test /chat/audio/stream ends with an error part when the text-to-speech engine fails."""
+        client = TestClient(mock_chatbot_server.app)
+        files = {"audio": ("audio.wav", b"sound-bytes", "audio/wav")}
+        mock_chatbot_server.chatbot._tts_cache = TTSCache()
+        mock_chat_instance.send_message.return_value = MagicMock(text="Hi audio!")
+        mock_gtts.return_value.write_to_fp.side_effect = gTTSError("gTTS error")
+
+        response = client.post("/chat/audio/stream", files=files)
+        assert response.status_code == ResponseCode.OK
+        parts = parse_multipart(response.headers["content-type"], response.content)
+        assert [media_type for media_type, _body in parts] == ["application/json", "audio/mpeg", "application/json"]
+        assert parts[1][1] == b""
+        assert json.loads(parts[2][1])["error"].startswith("Text-to-speech failed: ")
+
+    def test_post_message_audio_stream_no_file(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test /chat/audio/stream rejects a request without an audio file."""
+        request = MagicMock(spec=Request)
+        request.form = AsyncMock(return_value={})
+
+        with pytest.raises(HTTPException, match="No audio file provided in request body"):
+            asyncio.run(mock_chatbot_server.post_message_audio_stream(request))
+
+
+class TestPostAudioPipelineEndpoint:
+    """Integration tests for the /chat/audio/pipeline endpoint."""
+
+    def test_post_message_audio_pipeline_endpoint(
+        self, mock_chatbot_server: ChatbotServer, mock_chat_instance: MagicMock, mock_gtts: MagicMock
+    ) -> None:
+        """Test /chat/audio/pipeline streams the audio of each sentence as the reply is generated."""
+        client = TestClient(mock_chatbot_server.app)
+        files = {"audio": ("audio.wav", b"sound-bytes", "audio/wav")}
+        mock_chatbot_server.chatbot._tts_cache = TTSCache()
+        mock_chat_instance.send_message_stream.return_value = iter(
+            [
+                MagicMock(text="Hi audio! How", function_calls=None, usage_metadata=None),
+                MagicMock(text=" are you?", function_calls=None, usage_metadata=None),
+            ]
+        )
+        mock_gtts.return_value.write_to_fp.side_effect = lambda fp: fp.write(b"mp3")
+
+        response = client.post("/chat/audio/pipeline", files=files)
+        assert response.status_code == ResponseCode.OK
+        (audio_type, audio), (reply_type, reply) = parse_multipart(response.headers["content-type"], response.content)
+        assert audio_type == "audio/mpeg"
+        assert audio == b"mp3mp3"
+        assert reply_type == "application/json"
+        assert ChatbotMessage.model_validate_json(reply).message == "Hi audio! How are you?"
+        assert mock_chatbot_server.chatbot.chat_history.messages[-1].message == "Hi audio! How are you?"
+
+    def test_post_message_audio_pipeline_fallback_reply(
+        self, mock_chatbot_server: ChatbotServer, mock_chat_instance: MagicMock, mock_gtts: MagicMock
+    ) -> None:
+        """Test /chat/audio/pipeline sends a fallback reply which is not recorded in the chat history."""
+        client = TestClient(mock_chatbot_server.app)
+        files = {"audio": ("audio.wav", b"sound-bytes", "audio/wav")}
+        mock_chatbot_server.chatbot._tts_cache = TTSCache()
+        mock_chat_instance.send_message_stream.side_effect = ClientError(
+            code=400, response_json={"error": {"message": "Bad request"}}
+        )
+        mock_gtts.return_value.write_to_fp.side_effect = lambda fp: fp.write(b"mp3")
+
+        response = client.post("/chat/audio/pipeline", files=files)
+        (_audio_type, audio), (_reply_type, reply) = parse_multipart(response.headers["content-type"], response.content)
+        assert audio == b"mp3"
+        assert ChatbotMessage.model_validate_json(reply).message == Chatbot.SEND_AUDIO_FAILED_REPLY
+        assert len(mock_chatbot_server.chatbot.chat_history.messages) == 1
+
+    def test_iter_pipeline_cancelled(self) -> None:
+        """Test the speech pipeline is cancelled when the response is closed before the audio ends."""
+        pipeline = MagicMock()
+        pipeline.__iter__.return_value = iter([b"mp3", b"mp3"])
+        audio = ChatbotServer._iter_pipeline(pipeline)
+        assert next(audio) == b"mp3"
+        pipeline.cancel.assert_not_called()
+
+        audio.close()
+        pipeline.cancel.assert_called_once()
+
+    def test_post_message_audio_pipeline_text_only(
+        self, mock_chatbot_server: ChatbotServer, mock_chat_instance: MagicMock, mock_gtts: MagicMock
+    ) -> None:
+        """Test /chat/audio/pipeline uses the load mode of each turn when the load governor switches between them."""
+        client = TestClient(mock_chatbot_server.app)
+        files = {"audio": ("audio.wav", b"sound-bytes", "audio/wav")}
+        mock_chatbot_server.chatbot._tts_cache = TTSCache()
+        mock_chat_instance.send_message_stream.return_value = iter(
+            [MagicMock(text="Hi audio!", function_calls=None, usage_metadata=None)]
+        )
+        mock_chat_instance.send_message.return_value = MagicMock(text="Hi again!")
+        mock_gtts.return_value.write_to_fp.side_effect = lambda fp: fp.write(b"mp3")
+
+        with patch("rpi_ai.chatbot.LOAD_GOVERNOR") as mock_load_governor:
+            mock_load_governor.degraded_config = None
+            response = client.post("/chat/audio/pipeline", files=files)
+            (_audio_type, audio), (_reply_type, reply) = parse_multipart(
+                response.headers["content-type"], response.content
+            )
+            assert audio == b"mp3"
+            assert ChatbotMessage.model_validate_json(reply).message == "Hi audio!"
+
+            mock_load_governor.degraded_config = LoadGovernorConfig(text_only_audio=True)
+            response = client.post("/chat/audio/pipeline", files=files)
+        assert response.status_code == ResponseCode.OK
+        (_audio_type, audio), (_reply_type, reply) = parse_multipart(response.headers["content-type"], response.content)
+        assert audio == b""
+        assert ChatbotMessage.model_validate_json(reply).message == "Hi again!"
+        mock_gtts.assert_called_once()
+
+    def test_post_message_audio_pipeline_queue_full(self, mock_chatbot_server: ChatbotServer) -> None:
+        """Test /chat/audio/pipeline rejects the request when the chat queue is full."""
+        request = MagicMock(spec=Request)
+        request.form = AsyncMock(return_value={"audio": UploadFile(BytesIO(b"sound-bytes"), size=11)})
+
+        with (
+            patch.object(mock_chatbot_server.chat_queue, "enqueue", side_effect=QueueFullError(retry_after=3)),
+            pytest.raises(HTTPException) as exc_info,
+        ):
+            asyncio.run(mock_chatbot_server.post_message_audio_pipeline(request))
+        assert exc_info.value.status_code == HTTPStatus.TOO_MANY_REQUESTS
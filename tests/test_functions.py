@@ -1,12 +1,46 @@
 """Unit tests for the rpi_ai.functions module."""
 
-from rpi_ai.functions import FUNCTIONS
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from rpi_ai.function_calling.system_info import SystemInfo
+from rpi_ai.functions import FUNCTION_LISTS, _instances, get_function_list, get_function_lists
+
+
+@pytest.fixture
+def mock_registry() -> Generator[None]:
+    """Restore the registered function lists and their instances after the test."""
+    with patch.dict(FUNCTION_LISTS), patch.dict(_instances):
+        yield
+
+
+@pytest.fixture
+def mock_entry_points() -> Generator[MagicMock]:
+    """Mock the entry points used to discover function list plugins."""
+    with patch("rpi_ai.functions.entry_points") as mock:
+        mock.return_value = []
+        yield mock
 
 
 class TestFunctions:
-    """Tests for the FUNCTIONS list in the rpi_ai.functions module."""
+    """Tests for the function list registry in the rpi_ai.functions module."""
+
+    def test_get_function_list(self) -> None:
+        """Test a built-in function list is created once and reused."""
+        function_list = get_function_list("system_info")
+        assert isinstance(function_list, SystemInfo)
+        assert len(function_list.functions) != 0
+        assert len(function_list.declarations) == len(function_list.functions)
+        assert get_function_list("system_info") is function_list
+
+    def test_get_function_list_plugin(self, mock_registry: None, mock_entry_points: MagicMock) -> None:
+        """Test a function list which is not built in is discovered from the entry points."""
+        mock_entry_points.return_value = [MagicMock(load=MagicMock(return_value=SystemInfo))]
+        assert isinstance(get_function_list("plugin"), SystemInfo)
+        mock_entry_points.assert_called_once_with(group="rpi_ai.function_lists", name="plugin")
 
-    def test_check_functions(self) -> None:
-        """Test that FUNCTIONS is a non-empty list."""
-        assert isinstance(FUNCTIONS, list)
-        assert len(FUNCTIONS) != 0
+    def test_get_function_lists_skips_unknown(self, mock_entry_points: MagicMock) -> None:
+        """Test unknown function lists are skipped."""
+        assert get_function_lists(["missing", "system_info"]) == [get_function_list("system_info")]
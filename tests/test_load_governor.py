@@ -0,0 +1,111 @@
+"""Unit tests for the rpi_ai.load_governor module."""
+
+import time
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from rpi_ai.load_governor import LoadGovernor
+from rpi_ai.metrics import LOAD_DEGRADED
+from rpi_ai.models import LoadGovernorConfig
+
+WAIT_TIMEOUT = 5.0
+
+
+@pytest.fixture
+def mock_telemetry() -> Generator[MagicMock]:
+    """Mock the telemetry sampler to return predefined averages."""
+    with patch("rpi_ai.load_governor.TELEMETRY") as mock:
+        mock.averages = {"temperature": 50.0, "cpu_percent": 20.0}
+        mock.mean.side_effect = lambda name, _seconds: mock.averages[name]
+        yield mock
+
+
+@pytest.fixture
+def mock_load_governor() -> Generator[LoadGovernor]:
+    """Fixture to create a LoadGovernor instance."""
+    governor = LoadGovernor(LoadGovernorConfig(interval=0.01))
+    yield governor
+    governor.stop()
+
+
+class TestLoadGovernor:
+    """Tests for the LoadGovernor class."""
+
+    def test_check_normal(self, mock_load_governor: LoadGovernor, mock_telemetry: MagicMock) -> None:
+        """Test the governor stays in normal mode below the high thresholds."""
+        status = mock_load_governor.check()
+        assert not status.degraded
+        assert status.reasons == []
+        assert status.temperature == 50.0  # noqa: PLR2004
+        assert status.cpu_percent == 20.0  # noqa: PLR2004
+        assert status.changed_at is None
+        assert mock_load_governor.degraded_config is None
+        mock_telemetry.mean.assert_any_call("temperature", mock_load_governor.config.window)
+
+    @pytest.mark.parametrize(
+        ("temperature", "cpu_percent", "reasons"),
+        [
+            (80.0, 20.0, ["CPU temperature 80.0 C >= 75.0 C"]),
+            (50.0, 95.0, ["CPU usage 95.0% >= 90.0%"]),
+            (80.0, 95.0, ["CPU temperature 80.0 C >= 75.0 C", "CPU usage 95.0% >= 90.0%"]),
+        ],
+    )
+    def test_check_degraded(
+        self,
+        mock_load_governor: LoadGovernor,
+        mock_telemetry: MagicMock,
+        temperature: float,
+        cpu_percent: float,
+        reasons: list[str],
+    ) -> None:
+        """Test the governor degrades once either measurement reaches its high threshold."""
+        mock_telemetry.averages = {"temperature": temperature, "cpu_percent": cpu_percent}
+        status = mock_load_governor.check()
+        assert status.degraded
+        assert status.reasons == reasons
+        assert status.changed_at == status.checked_at
+        assert mock_load_governor.degraded_config == mock_load_governor.config
+        assert LOAD_DEGRADED.value() == 1
+
+    def test_check_hysteresis(self, mock_load_governor: LoadGovernor, mock_telemetry: MagicMock) -> None:
+        """Test the governor stays degraded until both measurements fall below their low thresholds."""
+        mock_telemetry.averages = {"temperature": 80.0, "cpu_percent": 20.0}
+        changed_at = mock_load_governor.check().changed_at
+
+        mock_telemetry.averages = {"temperature": 70.0, "cpu_percent": 20.0}
+        status = mock_load_governor.check()
+        assert status.degraded
+        assert status.reasons == ["CPU temperature 70.0 C >= 65.0 C"]
+        assert status.changed_at == changed_at
+
+        mock_telemetry.averages = {"temperature": 60.0, "cpu_percent": 20.0}
+        assert not mock_load_governor.check().degraded
+        assert LOAD_DEGRADED.value() == 0
+
+    def test_check_missing_measurements(self, mock_load_governor: LoadGovernor, mock_telemetry: MagicMock) -> None:
+        """Test measurements which are not available never degrade the chatbot."""
+        mock_telemetry.averages = {"temperature": None, "cpu_percent": None}
+        assert not mock_load_governor.check().degraded
+
+    def test_start_and_stop(self, mock_load_governor: LoadGovernor, mock_telemetry: MagicMock) -> None:
+        """Test the governor checks the load until stopped and returns to normal mode when stopped."""
+        mock_telemetry.averages = {"temperature": 80.0, "cpu_percent": 20.0}
+        mock_load_governor.start()
+        assert mock_load_governor.is_running
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while not mock_load_governor.status.degraded:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        mock_load_governor.stop()
+        status = mock_load_governor.status
+        assert not status.degraded
+        assert not mock_load_governor.is_running
+
+    def test_start_disabled(self, mock_load_governor: LoadGovernor) -> None:
+        """Test a disabled governor does not start its thread."""
+        mock_load_governor.start(LoadGovernorConfig(enabled=False))
+        assert not mock_load_governor.is_running
+        assert mock_load_governor.degraded_config is None
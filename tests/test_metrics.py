@@ -0,0 +1,101 @@
+"""Unit tests for the rpi_ai.metrics module."""
+
+from google.genai.types import GenerateContentResponseUsageMetadata
+
+from rpi_ai.metrics import (
+    TOKENS,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    record_usage,
+)
+
+
+class TestCounter:
+    """Tests for the Counter class."""
+
+    def test_inc(self) -> None:
+        """Test incrementing a labelled counter."""
+        counter = Counter("test_total", "Test counter.", ("stage",))
+        counter.inc(stage="a")
+        counter.inc(2, stage="a")
+        assert counter.value(stage="a") == 1 + 2
+        assert counter.value(stage="b") == 0
+
+    def test_render(self) -> None:
+        """Test rendering a counter in the Prometheus text format."""
+        counter = Counter("test_total", "Test counter.", ("stage",))
+        counter.inc(stage='say "hi"')
+        assert counter.render() == (
+            '# HELP test_total Test counter.\n# TYPE test_total counter\ntest_total{stage="say \\"hi\\""} 1'
+        )
+
+
+class TestGauge:
+    """Tests for the Gauge class."""
+
+    def test_set(self) -> None:
+        """Test setting a gauge value."""
+        gauge = Gauge("test_gauge", "Test gauge.")
+        gauge.set(1.5)
+        assert gauge.value() == 1.5  # noqa: PLR2004
+        assert gauge.samples() == ["test_gauge 1.5"]
+
+    def test_set_function(self) -> None:
+        """Test reading a gauge value from a callback."""
+        values = [1, 2]
+        gauge = Gauge("test_gauge", "Test gauge.")
+        gauge.set_function(lambda: len(values))
+        assert gauge.value() == len(values)
+        values.append(3)
+        assert gauge.samples() == ["test_gauge 3"]
+
+
+class TestHistogram:
+    """Tests for the Histogram class."""
+
+    def test_observe(self) -> None:
+        """Test observations are counted in cumulative buckets."""
+        histogram = Histogram("test_seconds", "Test histogram.", ("stage",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+        histogram.observe(5.0, stage="a")
+        assert histogram.count(stage="a") == 1 + 1 + 1
+        assert histogram.samples() == [
+            'test_seconds_bucket{stage="a",le="0.1"} 1',
+            'test_seconds_bucket{stage="a",le="1"} 2',
+            'test_seconds_bucket{stage="a",le="+Inf"} 3',
+            'test_seconds_sum{stage="a"} 5.55',
+            'test_seconds_count{stage="a"} 3',
+        ]
+
+    def test_time(self) -> None:
+        """Test timing a block records one observation."""
+        histogram = Histogram("test_seconds", "Test histogram.", ("stage",))
+        with histogram.time(stage="a"):
+            pass
+        assert histogram.count(stage="a") == 1
+
+
+class TestMetricsRegistry:
+    """Tests for the MetricsRegistry class."""
+
+    def test_render(self) -> None:
+        """Test rendering every registered metric."""
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("test_total", "Test counter."))
+        counter.inc()
+        rendered = registry.render()
+        assert "# TYPE test_total counter" in rendered
+        assert rendered.endswith("test_total 1\n")
+
+
+def test_record_usage() -> None:
+    """Test recording token counts from response usage metadata."""
+    prompt_tokens = TOKENS.value(type="prompt")
+    total_tokens = TOKENS.value(type="total")
+    record_usage(GenerateContentResponseUsageMetadata(prompt_token_count=10, total_token_count=15))
+    record_usage(None)
+    assert TOKENS.value(type="prompt") == prompt_tokens + 10
+    assert TOKENS.value(type="total") == total_tokens + 15
@@ -3,7 +3,9 @@
 from pathlib import Path
 from unittest.mock import MagicMock
 
+import pytest
 from google.genai.types import Content, Part
+from pydantic import ValidationError
 
 from rpi_ai.models import (
     ChatbotConfig,
@@ -16,6 +18,7 @@ from rpi_ai.models import (
     EmbeddingConfig,
     GetChatHistoryResponse,
     GetConfigResponse,
+    LoadGovernorConfig,
     PostAudioResponse,
     PostMessageResponse,
 )
@@ -43,12 +46,20 @@ class TestChatbotMessage:
         )
         assert chatbot_message.model_dump() == mock_chatbot_message_model_dict
 
+    def test_model_message_with_model(self, mock_chatbot_message_model_dict: dict) -> None:
+        """Test creating a model message which records the answering model."""
+        chatbot_message = ChatbotMessage.model_message(
+            mock_chatbot_message_model_dict["message"], mock_chatbot_message_model_dict["timestamp"], model="test-model"
+        )
+        assert chatbot_message.model == "test-model"
+
     def test_new_chat_message(self) -> None:
         """Test creating a new chat message."""
         expected_dict = {
             "message": "What's on your mind today?",
             "timestamp": 1234567890,
             "is_user_message": False,
+            "model": None,
         }
         assert isinstance(expected_dict["timestamp"], int)
         chatbot_message = ChatbotMessage.new_chat_message(expected_dict["timestamp"])
@@ -149,13 +160,18 @@ class TestChatMemoryList:
         assert mock_chat_memory_list.entries == []
 
     def test_save_to_file(
-        self, mock_chat_memory_list: ChatMemoryList, mock_open_file: MagicMock, mock_json_dump: MagicMock
+        self,
+        mock_chat_memory_list: ChatMemoryList,
+        mock_open_file: MagicMock,
+        mock_replace_file: MagicMock,
+        mock_json_dump: MagicMock,
     ) -> None:
-        """Test saving ChatMemoryList to a file."""
+        """Test saving ChatMemoryList to a temporary file which then replaces the file."""
         file_path = Path("chat_memory.json")
         mock_chat_memory_list.save_to_file(file_path)
         mock_open_file.assert_called_once_with("w")
         mock_json_dump.assert_called_once_with(mock_chat_memory_list.model_dump(), mock_open_file(), indent=2)
+        mock_replace_file.assert_called_once_with(file_path)
 
     def test_load_from_file(
         self, mock_chat_memory_list: ChatMemoryList, mock_open_file: MagicMock, mock_json_load: MagicMock
@@ -212,6 +228,22 @@ class TestChatbotServerConfig:
 
 
 # Chatbot Server Response Models
+class TestLoadGovernorConfig:
+    """Unit tests for the LoadGovernorConfig class."""
+
+    @pytest.mark.parametrize(
+        ("thresholds", "error"),
+        [
+            ({"temperature_low": 75.0, "temperature_high": 75.0}, "temperature_low"),
+            ({"cpu_low": 95.0, "cpu_high": 90.0}, "cpu_low"),
+        ],
+    )
+    def test_thresholds_out_of_order(self, thresholds: dict[str, float], error: str) -> None:
+        """Test a low threshold which is not below its high threshold is rejected."""
+        with pytest.raises(ValidationError, match=error):
+            LoadGovernorConfig.model_validate(thresholds)
+
+
 class TestGetConfigResponse:
     """Unit tests for the TestGetConfigResponse class."""
 
@@ -0,0 +1,81 @@
+"""Unit tests for the rpi_ai.request_queue module."""
+
+import asyncio
+import threading
+
+import pytest
+
+from rpi_ai.request_queue import QueueFullError, RequestQueue
+
+
+class TestRequestQueue:
+    """Tests for the RequestQueue class."""
+
+    def test_submit_returns_result(self) -> None:
+        """Test a submitted request returns the function result."""
+        queue = RequestQueue(max_depth=2)
+        assert asyncio.run(queue.submit(lambda x: x * 2, 21)) == 42  # noqa: PLR2004
+
+    def test_submit_raises_function_error(self) -> None:
+        """Test an exception raised by the function is propagated to the caller."""
+        queue = RequestQueue(max_depth=2)
+
+        def _fail() -> None:
+            msg = "failed"
+            raise ValueError(msg)
+
+        with pytest.raises(ValueError, match="failed"):
+            asyncio.run(queue.submit(_fail))
+
+    def test_enqueue_returns_future(self) -> None:
+        """Test an enqueued request resolves its future without the caller awaiting it first."""
+        queue = RequestQueue(max_depth=2)
+
+        def _double(x: int) -> int:
+            return x * 2
+
+        async def _run() -> int:
+            future = queue.enqueue(_double, 21)
+            assert not future.done()
+            return await future
+
+        assert asyncio.run(_run()) == 42  # noqa: PLR2004
+
+    def test_requests_processed_in_order(self) -> None:
+        """Test requests are processed one at a time in submission order."""
+        queue = RequestQueue(max_depth=5)
+        order: list[int] = []
+        lock = threading.Lock()
+
+        def _record(i: int) -> int:
+            assert lock.acquire(blocking=False)
+            order.append(i)
+            lock.release()
+            return i
+
+        async def _run() -> list[int]:
+            return await asyncio.gather(*(queue.submit(_record, i) for i in range(5)))
+
+        assert asyncio.run(_run()) == list(range(5))
+        assert order == list(range(5))
+
+    def test_submit_sheds_load_when_full(self) -> None:
+        """Test requests beyond the maximum depth fail fast with a retry delay."""
+        queue = RequestQueue(max_depth=1)
+        release = threading.Event()
+
+        async def _run() -> None:
+            first = asyncio.ensure_future(queue.submit(release.wait))
+            await asyncio.sleep(0.05)
+            second = asyncio.ensure_future(queue.submit(release.wait))
+            await asyncio.sleep(0)
+            try:
+                with pytest.raises(QueueFullError) as exc_info:
+                    await queue.submit(release.wait)
+                assert exc_info.value.retry_after >= 1
+                assert queue.depth == 1
+            finally:
+                release.set()
+            await asyncio.gather(first, second)
+
+        asyncio.run(_run())
@@ -0,0 +1,146 @@
+"""Unit tests for the rpi_ai.resilience module."""
+
+from collections.abc import Generator
+from unittest.mock import ANY, MagicMock, patch
+
+import httpx
+import pytest
+from google.genai.errors import ClientError, ServerError
+
+from rpi_ai.models import RetryConfig
+from rpi_ai.resilience import CircuitBreaker, ModelCaller, ModelUnavailableError
+
+
+@pytest.fixture
+def mock_server_error() -> ServerError:
+    """Fixture to provide a ServerError raised by an overloaded model."""
+    return ServerError(
+        code=503,
+        response_json={"error": {"message": "Model overloaded!"}},
+        response=MagicMock(body_segments=[{"error": {"message": "Model overloaded!"}}]),
+    )
+
+
+@pytest.fixture
+def mock_sleep() -> Generator[MagicMock]:
+    """Mock the time.sleep method used between retries."""
+    with patch("rpi_ai.resilience.time.sleep") as mock:
+        yield mock
+
+
+@pytest.fixture
+def mock_model_caller(mock_retry_config: RetryConfig) -> ModelCaller:
+    """Fixture to create a ModelCaller instance."""
+    return ModelCaller(mock_retry_config)
+
+
+class TestCircuitBreaker:
+    """Tests for the CircuitBreaker class."""
+
+    def test_opens_after_threshold(self) -> None:
+        """Test the circuit opens after consecutive failures reach the threshold."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+        breaker.record_failure()
+        assert not breaker.is_open
+        breaker.record_failure()
+        assert breaker.is_open
+
+    def test_success_closes_circuit(self) -> None:
+        """Test a successful request resets the failure count."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+        breaker.record_failure()
+        assert breaker.is_open
+        breaker.record_success()
+        assert not breaker.is_open
+
+    def test_allows_trial_after_reset_timeout(self) -> None:
+        """Test an open circuit allows a trial request once the reset timeout elapses."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+        breaker.record_failure()
+        assert not breaker.is_open
+
+
+class TestModelCaller:
+    """Tests for the ModelCaller class."""
+
+    def test_call_success(self, mock_model_caller: ModelCaller) -> None:
+        """Test a successful request returns the result and the answering model."""
+        request = MagicMock(return_value="reply")
+        assert mock_model_caller.call(["model-a", "model-b"], request) == ("reply", "model-a")
+        request.assert_called_once_with("model-a", ANY)
+
+    def test_call_retries_then_succeeds(
+        self, mock_model_caller: ModelCaller, mock_server_error: ServerError, mock_sleep: MagicMock
+    ) -> None:
+        """Test a transient server error is retried on the same model."""
+        request = MagicMock(side_effect=[mock_server_error, "reply"])
+        assert mock_model_caller.call(["model-a", "model-b"], request) == ("reply", "model-a")
+        assert request.call_count == 2  # noqa: PLR2004
+        mock_sleep.assert_called_once()
+
+    def test_call_falls_back(
+        self, mock_model_caller: ModelCaller, mock_server_error: ServerError, mock_sleep: MagicMock
+    ) -> None:
+        """Test the next model is used once retries on the primary model are exhausted."""
+
+        def _request(model: str, _timeout: float) -> str:
+            if model == "model-a":
+                raise mock_server_error
+            return "reply"
+
+        assert mock_model_caller.call(["model-a", "model-b"], _request) == ("reply", "model-b")
+
+    def test_call_skips_open_circuit(
+        self, mock_model_caller: ModelCaller, mock_server_error: ServerError, mock_sleep: MagicMock
+    ) -> None:
+        """Test a model with an open circuit is routed around."""
+        breaker = mock_model_caller.get_breaker("model-a")
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+        request = MagicMock(return_value="reply")
+        assert mock_model_caller.call(["model-a", "model-b"], request) == ("reply", "model-b")
+        request.assert_called_once_with("model-b", ANY)
+
+    def test_call_all_models_fail(
+        self, mock_model_caller: ModelCaller, mock_server_error: ServerError, mock_sleep: MagicMock
+    ) -> None:
+        """Test ModelUnavailableError is raised when every model fails."""
+        request = MagicMock(side_effect=mock_server_error)
+        with pytest.raises(ModelUnavailableError):
+            mock_model_caller.call(["model-a", "model-b"], request)
+
+    def test_call_deadline_exceeded(
+        self, mock_retry_config: RetryConfig, mock_server_error: ServerError, mock_sleep: MagicMock
+    ) -> None:
+        """Test no further attempts are made once the deadline has passed."""
+        mock_retry_config.deadline = 0.0
+        request = MagicMock(side_effect=mock_server_error)
+        with pytest.raises(ModelUnavailableError):
+            ModelCaller(mock_retry_config).call(["model-a", "model-b"], request)
+        request.assert_called_once_with("model-a", ANY)
+
+    def test_call_attempt_times_out_at_deadline(self, mock_retry_config: RetryConfig) -> None:
+        """Test each attempt is given the time left as its timeout and a timed out attempt ends the call."""
+        mock_retry_config.deadline = 5.0
+        request = MagicMock(side_effect=httpx.ReadTimeout("Request timed out"))
+        with pytest.raises(ModelUnavailableError, match="before the deadline"):
+            ModelCaller(mock_retry_config).call(["model-a", "model-b"], request)
+        request.assert_called_once_with("model-a", ANY)
+        assert 0 < request.call_args.args[1] <= mock_retry_config.deadline
+
+    def test_call_raises_non_retryable_error(self, mock_model_caller: ModelCaller) -> None:
+        """Test client errors other than rate limiting are not retried."""
+        error = ClientError(code=400, response_json={"error": {"message": "Bad request"}})
+        request = MagicMock(side_effect=error)
+        with pytest.raises(ClientError):
+            mock_model_caller.call(["model-a", "model-b"], request)
+        request.assert_called_once_with("model-a", ANY)
+
+    def test_update_config_resets_breakers(
+        self, mock_model_caller: ModelCaller, mock_retry_config: RetryConfig
+    ) -> None:
+        """Test updating the configuration resets the circuit breakers."""
+        breaker = mock_model_caller.get_breaker("model-a")
+        mock_model_caller.update_config(mock_retry_config)
+        assert mock_model_caller.get_breaker("model-a") is not breaker